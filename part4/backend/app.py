@@ -1,16 +1,20 @@
 from flask import Flask, jsonify
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
-from flasgger import Swagger, LazyString
-import os
-import yaml
-import threading
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 
 from backend.models import db
 from backend.routes import register_blueprints
+from backend.commands import register_commands
 from backend.config import Config
+from backend.utils.assets import init_assets
+from backend.utils.auth_decorators import init_token_scopes
+from backend.utils.compression import init_compression
+from backend.utils.engine import engine_options, init_engines
+from backend.utils.hashing import HashingBusyError
+from backend.utils.metrics import init_metrics
+from backend.utils.openapi import init_docs
+from backend.utils.ratelimit import RateLimitedError
+from backend.utils.revocation import init_revocation
 
 
 def create_app():
@@ -18,69 +22,30 @@ def create_app():
     app.config.from_object(Config)
 
     # Init extensions
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
     db.init_app(app)
+    init_engines(app, db)
     Migrate(app, db)
-    JWTManager(app)
+    jwt = JWTManager(app)
+    init_revocation(jwt)
+    init_token_scopes(jwt)
 
     # ----------------------------
     # Swagger configuration
     # ----------------------------
-    SWAGGER_PATH = os.path.join(os.path.dirname(__file__), "swagger_spec.yaml")
-
-    def load_swagger():
-        """Load YAML spec dynamically."""
-        with open(SWAGGER_PATH, "r", encoding="utf-8") as f:
-            return yaml.safe_load(f)
-
-    # Important: initialize SWAGGER config BEFORE creating Swagger(app)
-    app.config["SWAGGER"] = {
-        "title": "Holberton RPG Portfolio API",
-        "uiversion": 3,
-        "specs_route": "/apidocs/",
-        # Désactive le modèle Swagger 2.0 interne
-        "openapi": "3.0.2"
-    }
-
-    # Load YAML directly without merging Flasgger's 2.0 defaults
-    swagger_template = load_swagger()
-    swagger = Swagger(app, template=swagger_template, merge=False, config={
-        "headers": [],
-        "specs": [
-            {
-                "endpoint": 'apispec_1',
-                "route": '/apispec_1.json',
-                "rule_filter": lambda rule: True,
-                "model_filter": lambda tag: True,
-            }
-        ],
-        "static_url_path": "/flasgger_static",
-        "swagger_ui": True,
-        "specs_route": "/apidocs/"
-    })
-
-    # 🧠 Watcher to hot-reload YAML
-    class SwaggerFileWatcher(FileSystemEventHandler):
-        """Watch swagger_spec.yaml for changes and reload live."""
-
-        def on_modified(self, event):
-            if event.src_path.endswith("swagger_spec.yaml"):
-                print("🔁 Swagger spec updated — reloading...")
-                swagger.template = load_swagger()
-
-    def start_watcher():
-        observer = Observer()
-        observer.schedule(SwaggerFileWatcher(), os.path.dirname(
-            SWAGGER_PATH), recursive=False)
-        observer_thread = threading.Thread(target=observer.start, daemon=True)
-        observer_thread.start()
-
-    if app.config.get("DEBUG", False):
-        start_watcher()
+    # The spec is compiled on first use and cached on disk; Flasgger is
+    # only imported when /apidocs/ is first requested.
+    init_docs(app)
 
     # ----------------------------
     # Register blueprints
     # ----------------------------
     register_blueprints(app)
+    init_metrics(app)
+    init_compression(app)
+    init_assets(app)
+    register_commands(app)
 
     # ----------------------------
     # Global error handlers
@@ -89,6 +54,18 @@ def create_app():
     def not_found_error(error):
         return jsonify({"error": "Resource not found"}), 404
 
+    @app.errorhandler(HashingBusyError)
+    def hashing_busy_error(error):
+        response = jsonify({"success": False, "error": "Server busy, retry later"})
+        response.headers["Retry-After"] = str(error.retry_after)
+        return response, 503
+
+    @app.errorhandler(RateLimitedError)
+    def rate_limited_error(error):
+        response = jsonify({"success": False, "error": "Too many attempts, retry later"})
+        response.headers["Retry-After"] = str(error.retry_after)
+        return response, 429
+
     @app.errorhandler(500)
     def internal_error(error):
         return jsonify({"error": "Internal server error"}), 500
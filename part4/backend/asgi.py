@@ -0,0 +1,239 @@
+"""
+ASGI entry point for the API.
+
+    uvicorn backend.asgi:asgi_app
+
+The event loop owns the client connections, so idle or slow clients
+cost no thread. Read requests (GET/HEAD) run the Flask app on the event
+loop itself, with db.session bound to an async database driver (see
+backend/utils/async_db.py): their queries await instead of holding a
+thread. Other requests, and every request when no async driver is
+installed, run on a bounded thread pool (ASGI_THREADS); writes keep the
+sync driver and password hashing stays off the loop. The routes, ORM
+session and flush hooks are the same code in every mode, so responses
+are byte-for-byte identical. Streamed bodies (e.g. /api/export) are
+relayed chunk by chunk with backpressure.
+
+Long-lived streams (e.g. /api/stream/progress) can also give their
+thread back while idle: when the environ carries ASYNC_WAIT, a body may
+yield an object with an `async wait()` method instead of bytes. The
+adapter awaits it on the event loop and resumes the iteration where
+it ran before, so an idle stream only costs a coroutine.
+"""
+import asyncio
+import contextvars
+import io
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from backend.utils.async_db import get_async_engine, run_bound, wait_for
+
+# Chunks buffered between the worker thread and the client
+STREAM_BUFFER = 8
+# Environ key telling the app that bodies may yield awaitable waits
+ASYNC_WAIT = "asgi.async_wait"
+# Served on the event loop when an async driver is available
+READ_METHODS = ("GET", "HEAD")
+
+
+class ClientDisconnected(Exception):
+    """Raised in the worker (thread or greenlet) when the client went away."""
+
+
+class WsgiToAsgi:
+    """Serve a WSGI application from an ASGI server."""
+
+    def __init__(self, wsgi_app, max_threads=None, async_engine=None):
+        self.wsgi_app = wsgi_app
+        self.async_engine = async_engine
+        self.executor = ThreadPoolExecutor(
+            max_threads or int(os.getenv("ASGI_THREADS", 32)),
+            thread_name_prefix="asgi-wsgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        if scope["type"] != "http":
+            raise ValueError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        environ = build_environ(scope, body)
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(STREAM_BUFFER)
+        disconnected = threading.Event()
+        response = {}
+        on_loop = self.async_engine is not None and scope["method"] in READ_METHODS
+
+        def dispatch(fn, *args):
+            if on_loop:
+                # A fresh context, as a pool thread would have
+                return contextvars.Context().run(
+                    loop.create_task, run_bound(self.async_engine, fn, *args))
+            return loop.run_in_executor(self.executor, fn, *args)
+
+        def put(message):
+            if disconnected.is_set():
+                raise ClientDisconnected()
+            if on_loop:
+                wait_for(queue.put(message))
+            else:
+                asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [(name.lower().encode("latin-1"),
+                                    value.encode("latin-1"))
+                                   for name, value in headers]
+
+        def close(result):
+            if hasattr(result, "close"):
+                result.close()
+
+        def pump(result, iterator):
+            try:
+                try:
+                    for chunk in iterator:
+                        if not isinstance(chunk, bytes):
+                            # Parked: the loop awaits it, then resumes us
+                            put(("wait", chunk))
+                            return
+                        if chunk:
+                            put(("body", chunk))
+                except BaseException:
+                    close(result)
+                    raise
+                close(result)
+            except ClientDisconnected:
+                return
+            except BaseException as e:
+                put(("error", e))
+                return
+            put(("end", None))
+
+        def run():
+            try:
+                result = self.wsgi_app(environ, start_response)
+            except BaseException as e:
+                put(("error", e))
+                return
+            response["result"], response["iterator"] = result, iter(result)
+            pump(result, response["iterator"])
+
+        future = dispatch(run)
+        started = False
+        parked = False
+        try:
+            while True:
+                kind, payload = await queue.get()
+                if kind == "error":
+                    raise payload
+                if not started:
+                    await send({"type": "http.response.start",
+                                "status": response["status"],
+                                "headers": response["headers"]})
+                    started = True
+                if kind == "end":
+                    await send({"type": "http.response.body", "body": b""})
+                    break
+                if kind == "wait":
+                    parked = True
+                    await payload.wait()
+                    parked = False
+                    future = dispatch(pump, response["result"], response["iterator"])
+                    continue
+                await send({"type": "http.response.body", "body": payload,
+                            "more_body": True})
+        except BaseException:
+            disconnected.set()
+            # Unblock the worker if it is waiting on a full queue
+            while not queue.empty():
+                queue.get_nowait()
+            if parked:
+                await dispatch(close, response["result"])
+            raise
+        finally:
+            await asyncio.wait([future])
+
+    @staticmethod
+    async def _read_body(receive):
+        """Return the request body, or None when the client went away."""
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+        return b"".join(chunks)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.aclose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def aclose(self):
+        """Stop the thread pool and close the async driver's connections."""
+        self.executor.shutdown(wait=False)
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
+
+
+def build_environ(scope, body):
+    """Translate an ASGI HTTP scope into a WSGI environ (PEP 3333)."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("127.0.0.1", 0)
+    path = scope.get("raw_path")
+    path = (path.split(b"?", 1)[0].decode("latin-1") if path
+            else scope["path"].encode("utf-8").decode("latin-1"))
+    root_path = scope.get("root_path", "")
+
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": root_path.encode("utf-8").decode("latin-1"),
+        "PATH_INFO": path[len(root_path):] if path.startswith(root_path) else path,
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+        ASYNC_WAIT: True,
+        "CONTENT_LENGTH": str(len(body)),
+    }
+    for name, value in scope.get("headers", []):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+            continue
+        if name == "CONTENT_LENGTH":
+            continue
+        key = f"HTTP_{name}"
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+def create_asgi_app(flask_app=None, max_threads=None):
+    """Wrap a Flask app (the default one when omitted) for ASGI servers."""
+    if flask_app is None:
+        from backend.app import app as flask_app
+    return WsgiToAsgi(flask_app, max_threads, get_async_engine(flask_app))
+
+
+asgi_app = create_asgi_app()
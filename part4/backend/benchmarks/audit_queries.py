@@ -0,0 +1,162 @@
+"""
+EXPLAIN every query the API routes issue and flag full table scans.
+
+Seeds a temporary SQLite database (or uses --database-url, a scratch
+database that will be written to), replays one request per route of
+bench_routes, captures the SQL each one runs and prints its plan:
+
+    python -m backend.benchmarks.audit_queries
+    python -m backend.benchmarks.audit_queries --verbose
+    python -m backend.benchmarks.audit_queries --database-url mysql://u:p@localhost/rpg_scratch
+
+Exits with status 1 when a scan is found that is not listed in
+EXPECTED_SCANS.
+"""
+import argparse
+import os
+import re
+import sys
+import tempfile
+from collections import namedtuple
+
+# Routes whose job is to read a whole table (exports, in-process index
+# rebuilds), so a full scan is the right plan there
+EXPECTED_SCANS = {
+    "GET /api/export": {"players", "player_skills", "quests", "quest_skills", "skills"},
+    "GET /api/leaderboard": {"players"},
+    "GET /api/leaderboard/me": {"players"},
+    "GET /api/quests/search": {"quests"},
+    "GET /api/players/<int:player_id>/recommended-quests": {"player_skills", "quest_skills",
+                                                            "quests"},
+}
+
+Plan = namedtuple("Plan", "statement lines scans")
+
+
+def explain(connection, statement, parameters):
+    """Return (plan lines, fully scanned tables) for one statement."""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        rows = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters).all()
+        lines = [row[-1] for row in rows]
+        scans = {m.group(2) for line in lines
+                 for m in [re.match(r"SCAN (TABLE )?(\w+)$", line)] if m}
+    elif dialect in ("mysql", "mariadb"):
+        result = connection.exec_driver_sql("EXPLAIN " + statement, parameters)
+        rows = [row._mapping for row in result]
+        lines = [f"{row['table']}: type={row['type']} key={row['key']} "
+                 f"rows={row['rows']}" for row in rows]
+        scans = {row["table"] for row in rows if row["type"] == "ALL"}
+    else:
+        lines = [row[0] for row in connection.exec_driver_sql(
+            "EXPLAIN " + statement, parameters)]
+        scans = {m.group(1) for line in lines
+                 for m in [re.search(r"Seq Scan on (\w+)", line)] if m}
+    return lines, scans
+
+
+def capture(app, send, scenario, ids, token):
+    """Run one request of the scenario and return the statements it issued."""
+    from sqlalchemy import event
+    from backend.models import db
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if executemany:
+            return
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if verb in ("SELECT", "UPDATE", "DELETE", "WITH") or \
+                (verb == "INSERT" and "SELECT" in statement.upper()):
+            statements.append((statement, parameters))
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        path, body = scenario.build(0, ids)
+        status, _ = send(scenario.method, path, body, token)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return status, statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", help="Scratch database to audit")
+    parser.add_argument("--players", type=int, default=500)
+    parser.add_argument("--quests", type=int, default=1000)
+    parser.add_argument("--skills", type=int, default=50)
+    parser.add_argument("--verbose", "-v", action="store_true",
+                        help="Print every plan, not only the flagged ones")
+    args = parser.parse_args()
+
+    db_file = None
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+    else:
+        db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    os.environ.setdefault("METRICS_ENABLED", "False")
+    os.environ.setdefault("RATELIMIT_ENABLED", "False")
+    os.environ.setdefault("SSE_MAX_DURATION", "0.01")
+
+    from backend.app import create_app
+    from backend.benchmarks.bench_routes import (
+        SCENARIOS, check_coverage, client_transport, login, refresh_tokens, seed,
+        token_for)
+    from backend.models import db
+
+    app = create_app()
+    check_coverage(app)
+    args.requests, args.seed = 1, 42
+    ids = seed(app, args)
+    with app.app_context():
+        # Give the planner real statistics, as a production database has
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql(
+                "ANALYZE" if connection.dialect.name != "mysql"
+                else "ANALYZE TABLE players, quests, skills, player_skills, quest_skills")
+
+    send = client_transport(app)
+    user, admin = login(send, "bench-user"), login(send, "bench-admin")
+    tokens = {"user": user["access_token"], "admin": admin["access_token"],
+              "refresh": refresh_tokens(app, "bench-user", len(SCENARIOS))}
+
+    flagged = 0
+    try:
+        for i, scenario in enumerate(SCENARIOS):
+            route = f"{scenario.method} {scenario.rule}"
+            status, statements = capture(
+                app, send, scenario, ids, token_for(tokens, scenario.role, i))
+            plans, seen = [], set()
+            with app.app_context(), db.engine.connect() as connection:
+                for statement, parameters in statements:
+                    if statement in seen:
+                        continue
+                    seen.add(statement)
+                    lines, scans = explain(connection, statement, parameters)
+                    plans.append(Plan(statement, lines, scans))
+
+            unexpected = {t for p in plans for t in p.scans} - \
+                EXPECTED_SCANS.get(route, set())
+            marker = "FULL SCAN" if unexpected else "ok"
+            print(f"{marker:9} {route} ({status}, {len(plans)} statements)")
+            for plan in plans:
+                if not args.verbose and not (plan.scans & unexpected):
+                    continue
+                print("    " + " ".join(plan.statement.split())[:200])
+                for line in plan.lines:
+                    print("        " + line)
+            flagged += bool(unexpected)
+    finally:
+        if db_file:
+            os.unlink(db_file)
+
+    print(f"{flagged} route(s) with unexpected full scans")
+    sys.exit(1 if flagged else 0)
+
+
+if __name__ == "__main__":
+    main()
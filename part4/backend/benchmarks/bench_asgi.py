@@ -0,0 +1,112 @@
+"""
+WSGI vs. ASGI serving: throughput and memory at a given concurrency.
+
+Opens --connections concurrent clients, each sending --requests GET
+/api/skills. In WSGI mode every connection holds a server thread (as a
+threaded WSGI server does); in ASGI mode connections are event-loop
+tasks, and the reads await the async driver (aiosqlite) on the loop,
+falling back to --threads worker threads when it is not installed:
+
+    python -m backend.benchmarks.bench_asgi --connections 500
+"""
+import argparse
+import asyncio
+import os
+import resource
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def setup():
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+
+    from flask_jwt_extended import create_access_token
+    from backend.app import create_app
+    from backend.models import db, Player, Skill
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        player = Player(name="Bench", class_name="Tester", password_hash="x")
+        db.session.add_all([player] + [Skill(name=f"Skill {i}") for i in range(50)])
+        db.session.commit()
+        token = create_access_token(identity=str(player.id))
+    return app, token, db_file
+
+
+def run_wsgi(app, token, connections, requests):
+    from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+    def client(_):
+        for _ in range(requests):
+            environ = EnvironBuilder(
+                path="/api/skills",
+                headers={"Authorization": f"Bearer {token}"}).get_environ()
+            run_wsgi_app(app, environ, buffered=True)
+
+    with ThreadPoolExecutor(connections) as pool:
+        list(pool.map(client, range(connections)))
+        return threading.active_count()
+
+
+def run_asgi(app, token, connections, requests, threads):
+    from backend.asgi import create_asgi_app
+
+    adapter = create_asgi_app(app, max_threads=threads)
+    scope = {"type": "http", "method": "GET", "path": "/api/skills",
+             "query_string": b"", "headers": [
+                 (b"authorization", f"Bearer {token}".encode())]}
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    async def client():
+        for _ in range(requests):
+            await adapter(scope, receive, send)
+
+    async def main():
+        await asyncio.gather(*(client() for _ in range(connections)))
+        count = threading.active_count()
+        await adapter.aclose()
+        return count
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["wsgi", "asgi"], default=None,
+                        help="Run one mode (default: both, WSGI first)")
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    app, token, db_file = setup()
+    baseline = rss_mb()
+    for mode in [args.mode] if args.mode else ["wsgi", "asgi"]:
+        start = time.perf_counter()
+        if mode == "wsgi":
+            threads = run_wsgi(app, token, args.connections, args.requests)
+        else:
+            threads = run_asgi(app, token, args.connections, args.requests,
+                               args.threads)
+        elapsed = time.perf_counter() - start
+        total = args.connections * args.requests
+        print(f"{mode}: {total / elapsed:7.1f} req/s, {threads} threads, "
+              f"peak RSS +{rss_mb() - baseline:.1f} MB")
+    os.unlink(db_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Login throughput vs. concurrent GET latency.
+
+Simulates a server with a fixed number of worker threads: a burst of
+logins and a stream of GET /api/skills share the same workers. Run it
+once with hashing on the request thread and once on the process pool:
+
+    python -m backend.benchmarks.bench_login --hash-workers 0
+    python -m backend.benchmarks.bench_login --hash-workers 4
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hash-workers", type=int, default=4)
+    parser.add_argument("--server-threads", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--gets", type=int, default=400)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    os.environ["PASSWORD_HASH_WORKERS"] = str(args.hash_workers)
+    os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.logins)
+    os.environ.setdefault("RATELIMIT_ENABLED", "False")
+
+    from flask_jwt_extended import create_access_token
+    from backend.app import create_app
+    from backend.models import db, Player, Skill
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        player = Player(name="Bench", class_name="Tester")
+        player.set_password("benchpass")
+        db.session.add_all([player] + [Skill(name=f"Skill {i}") for i in range(50)])
+        db.session.commit()
+        token = create_access_token(identity=str(player.id))
+
+    def login(_):
+        with app.test_client() as client:
+            res = client.post("/auth/login",
+                              json={"name": "Bench", "password": "benchpass"})
+            return res.status_code
+
+    def get_skills(_):
+        start = time.perf_counter()
+        with app.test_client() as client:
+            client.get("/api/skills",
+                       headers={"Authorization": f"Bearer {token}"})
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(args.server_threads) as workers:
+        start = time.perf_counter()
+        logins = workers.map(login, range(args.logins))
+        latencies = list(workers.map(get_skills, range(args.gets)))
+        statuses = list(logins)
+        elapsed = time.perf_counter() - start
+
+    os.unlink(db_file)
+    ms = [latency * 1000 for latency in latencies]
+    print(f"hash workers:        {args.hash_workers or 'inline'}")
+    print(f"login throughput:    {statuses.count(200) / elapsed:.1f} req/s "
+          f"({statuses.count(503)} x 503)")
+    print(f"GET latency p50/p95: {statistics.median(ms):.1f} / "
+          f"{percentile(ms, 95):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
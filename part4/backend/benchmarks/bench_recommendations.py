@@ -0,0 +1,52 @@
+"""
+Quest recommendations: time QuestRecommender.recommend() in-process.
+
+Fills the recommender's sparse skill sets with --quests open quests and
+--players players drawn from --skills skills (no database involved) and
+reports the latency of one recommendation per player:
+
+    python -m backend.benchmarks.bench_recommendations --quests 100000 --skills 10000
+"""
+import argparse
+import random
+import statistics
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--quests", type=int, default=100000)
+    parser.add_argument("--skills", type=int, default=10000)
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--skills-per-quest", type=int, default=2)
+    parser.add_argument("--skills-per-player", type=int, default=3)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    from backend.utils.recommendations import QuestRecommender
+
+    rng = random.Random(args.seed)
+    skills = range(1, args.skills + 1)
+    recommender = QuestRecommender()
+    for quest_id in range(1, args.quests + 1):
+        recommender._put_quest(quest_id, rng.sample(skills, args.skills_per_quest))
+    for player_id in range(1, args.players + 1):
+        recommender._player_skills[player_id] = frozenset(
+            rng.sample(skills, args.skills_per_player))
+
+    timings = []
+    for player_id in range(1, args.players + 1):
+        start = time.perf_counter()
+        recommender.recommend(player_id, args.limit)
+        timings.append(time.perf_counter() - start)
+
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99) - 1]
+    print(f"{args.quests} quests, {args.skills} skills: "
+          f"mean {statistics.mean(timings) * 1e3:.3f} ms, "
+          f"p99 {p99 * 1e3:.3f} ms per recommendation")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,443 @@
+"""
+Latency and throughput of every API and auth route.
+
+Seeds a temporary SQLite database (--players / --quests / --skills),
+then sends --requests requests per route from --concurrency threads,
+through the Flask test client or to a local server process:
+
+    python -m backend.benchmarks.bench_routes --mode client --save-baseline
+    python -m backend.benchmarks.bench_routes --mode client
+    python -m backend.benchmarks.bench_routes --mode server --concurrency 8
+
+Each run is compared with the baseline stored for its mode: a route
+whose p95 grew more than --threshold (and more than --min-delta-ms)
+fails the run with exit status 1.
+"""
+import argparse
+import http.client
+import json
+import logging
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+PASSWORD = "benchpass"
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_DIR = os.path.dirname(os.path.dirname(BENCH_DIR))
+CLASSES = ["Warrior", "Mage", "Rogue", "Cleric", "Ranger"]
+WORDS = ["dragon", "forest", "castle", "goblin", "river", "tower", "crypt",
+         "potion", "sword", "shadow", "crystal", "mountain"]
+BULK_SIZE = 10
+
+Scenario = namedtuple("Scenario", "method rule role build")
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+# ------------------------
+# Dataset
+# ------------------------
+def seed(app, args):
+    """Fill the database and return the ids the scenarios draw from."""
+    from backend.models import db, Player, Quest, Skill
+    from backend.utils.hashing import hash_password
+
+    rng = random.Random(args.seed)
+    with app.app_context():
+        db.create_all()
+        password_hash = hash_password(PASSWORD)
+
+        def player(name, is_admin=False):
+            return Player(name=name, class_name=rng.choice(CLASSES),
+                          level=rng.randint(1, 50), xp=rng.randint(0, 50000),
+                          is_admin=is_admin, password_hash=password_hash)
+
+        skills = [Skill(name=f"skill-{i}", level=rng.randint(1, 10))
+                  for i in range(args.skills)]
+        players = [player("bench-admin", True), player("bench-user")]
+        players += [player(f"player-{i}") for i in range(args.players)]
+        for p in players:
+            p.skills = rng.sample(skills, min(3, len(skills)))
+        quests = [Quest(title=f"The {rng.choice(WORDS)} of the {rng.choice(WORDS)} {i}",
+                        xp=rng.randint(10, 1000),
+                        summary=" ".join(rng.choices(WORDS, k=8)),
+                        player=rng.choice(players) if rng.random() < 0.5 else None,
+                        skills=rng.sample(skills, min(2, len(skills))))
+                  for i in range(args.quests)]
+        doomed = ([player(f"doomed-{i}") for i in range(args.requests)],
+                  [Quest(title=f"Doomed quest {i}", xp=1) for i in range(args.requests)],
+                  [Skill(name=f"doomed-skill-{i}") for i in range(args.requests)])
+
+        db.session.add_all(skills + players + quests)
+        for group in doomed:
+            db.session.add_all(group)
+        db.session.commit()
+
+        return {
+            "players": [p.id for p in players[2:]] or [players[1].id],
+            "quests": [q.id for q in quests],
+            "skills": [s.id for s in skills],
+            "doomed_players": [p.id for p in doomed[0]],
+            "doomed_quests": [q.id for q in doomed[1]],
+            "doomed_skills": [s.id for s in doomed[2]],
+        }
+
+
+# ------------------------
+# Scenarios (one per route)
+# ------------------------
+def pick(ids, i):
+    return ids[i % len(ids)]
+
+
+def bulk(i, make):
+    return {"items": [make(i * BULK_SIZE + j) for j in range(BULK_SIZE)]}
+
+
+SCENARIOS = [
+    # Auth
+    Scenario("POST", "/auth/login", None,
+             lambda i, ids: ("/auth/login", {"name": "bench-user", "password": PASSWORD})),
+    Scenario("POST", "/auth/register", None,
+             lambda i, ids: ("/auth/register", {"name": f"reg-{i}", "password": PASSWORD})),
+    Scenario("POST", "/auth/refresh", "refresh",
+             lambda i, ids: ("/auth/refresh", None)),
+    Scenario("POST", "/auth/logout", "refresh",
+             lambda i, ids: ("/auth/logout", None)),
+    Scenario("GET", "/auth/me", "user", lambda i, ids: ("/auth/me", None)),
+    # Players
+    Scenario("GET", "/api/players", "user",
+             lambda i, ids: ("/api/players?sort=-xp&limit=50", None)),
+    Scenario("GET", "/api/players/<int:player_id>", "user",
+             lambda i, ids: (f"/api/players/{pick(ids['players'], i)}", None)),
+    Scenario("GET", "/api/players/<int:player_id>/recommended-quests", "user",
+             lambda i, ids: (f"/api/players/{pick(ids['players'], i)}/recommended-quests", None)),
+    Scenario("GET", "/api/progress/<int:player_id>", "user",
+             lambda i, ids: (f"/api/progress/{pick(ids['players'], i)}", None)),
+    Scenario("POST", "/api/players", "admin",
+             lambda i, ids: ("/api/players", {"name": f"new-player-{i}",
+                                              "class_name": "Bench", "password": PASSWORD})),
+    Scenario("PUT", "/api/players/<int:player_id>", "admin",
+             lambda i, ids: (f"/api/players/{pick(ids['players'], i)}", {"xp": i})),
+    Scenario("POST", "/api/players/bulk", "admin",
+             lambda i, ids: ("/api/players/bulk", bulk(i, lambda n: {
+                 "name": f"bulk-player-{n}", "class_name": "Bench", "password": PASSWORD}))),
+    Scenario("PUT", "/api/players/bulk", "admin",
+             lambda i, ids: ("/api/players/bulk", bulk(i, lambda n: {
+                 "id": pick(ids["players"], n), "level": n % 50 + 1}))),
+    # Quests
+    Scenario("GET", "/api/quests", "user",
+             lambda i, ids: ("/api/quests?sort=-xp&limit=50", None)),
+    Scenario("GET", "/api/quests/<int:quest_id>", "user",
+             lambda i, ids: (f"/api/quests/{pick(ids['quests'], i)}", None)),
+    Scenario("GET", "/api/quests/search", "user",
+             lambda i, ids: (f"/api/quests/search?q={pick(WORDS, i)}", None)),
+    Scenario("POST", "/api/quests", "admin",
+             lambda i, ids: ("/api/quests", {"title": f"New quest {i}", "xp": 50})),
+    Scenario("PUT", "/api/quests/<int:quest_id>", "admin",
+             lambda i, ids: (f"/api/quests/{pick(ids['quests'], i)}", {"xp": i + 1})),
+    Scenario("POST", "/api/quests/bulk", "admin",
+             lambda i, ids: ("/api/quests/bulk", bulk(i, lambda n: {
+                 "title": f"Bulk quest {n}", "xp": 25}))),
+    Scenario("PUT", "/api/quests/bulk", "admin",
+             lambda i, ids: ("/api/quests/bulk", bulk(i, lambda n: {
+                 "id": pick(ids["quests"], n), "xp": n + 1}))),
+    # Skills
+    Scenario("GET", "/api/skills", "user",
+             lambda i, ids: ("/api/skills?sort=name&limit=50", None)),
+    Scenario("GET", "/api/skills/<int:skill_id>", "user",
+             lambda i, ids: (f"/api/skills/{pick(ids['skills'], i)}", None)),
+    Scenario("POST", "/api/skills", "admin",
+             lambda i, ids: ("/api/skills", {"name": f"new-skill-{i}"})),
+    Scenario("PUT", "/api/skills/<int:skill_id>", "admin",
+             lambda i, ids: (f"/api/skills/{pick(ids['skills'], i)}", {"level": i % 10 + 1})),
+    Scenario("POST", "/api/skills/bulk", "admin",
+             lambda i, ids: ("/api/skills/bulk", bulk(i, lambda n: {"name": f"bulk-skill-{n}"}))),
+    Scenario("PUT", "/api/skills/bulk", "admin",
+             lambda i, ids: ("/api/skills/bulk", bulk(i, lambda n: {
+                 "id": pick(ids["skills"], n), "level": n % 10 + 1}))),
+    # Leaderboard, export, admin
+    Scenario("GET", "/api/leaderboard", "user",
+             lambda i, ids: ("/api/leaderboard?limit=50", None)),
+    Scenario("GET", "/api/leaderboard/me", "user",
+             lambda i, ids: ("/api/leaderboard/me", None)),
+    Scenario("GET", "/api/export", "admin",
+             lambda i, ids: ("/api/export?format=ndjson", None)),
+    Scenario("GET", "/api/admin/pool-stats", "admin",
+             lambda i, ids: ("/api/admin/pool-stats", None)),
+    Scenario("POST", "/api/stream/token", "user",
+             lambda i, ids: ("/api/stream/token", None)),
+    # Ends after SSE_MAX_DURATION (shortened in main)
+    Scenario("GET", "/api/stream/progress", "user",
+             lambda i, ids: ("/api/stream/progress", None)),
+    # Deletes last, on rows seeded for them
+    Scenario("DELETE", "/api/players/<int:player_id>", "admin",
+             lambda i, ids: (f"/api/players/{ids['doomed_players'][i]}", None)),
+    Scenario("DELETE", "/api/quests/<int:quest_id>", "admin",
+             lambda i, ids: (f"/api/quests/{ids['doomed_quests'][i]}", None)),
+    Scenario("DELETE", "/api/skills/<int:skill_id>", "admin",
+             lambda i, ids: (f"/api/skills/{ids['doomed_skills'][i]}", None)),
+]
+
+
+def check_coverage(app):
+    """Fail early when a route of api.py or auth.py has no scenario."""
+    covered = {(s.method, s.rule) for s in SCENARIOS}
+    missing = sorted(
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules()
+        if rule.endpoint.startswith(("api.", "auth."))
+        for method in rule.methods - {"HEAD", "OPTIONS"}
+        if (method, rule.rule) not in covered)
+    if missing:
+        sys.exit("No benchmark scenario for: " + ", ".join(missing))
+
+
+# ------------------------
+# Transports
+# ------------------------
+def client_transport(app):
+    """Send requests through one Flask test client per thread."""
+    local = threading.local()
+
+    def send(method, path, body, token):
+        if not hasattr(local, "client"):
+            local.client = app.test_client()
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        res = local.client.open(path, method=method, json=body, headers=headers)
+        return res.status_code, res.get_data()
+
+    return send
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port):
+    """Run the app in a separate threaded server process."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "backend.benchmarks.bench_routes", "--serve", str(port)],
+        cwd=PROJECT_DIR, env=os.environ.copy())
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=1).close()
+            return proc
+        except OSError:
+            if proc.poll() is not None:
+                sys.exit("Benchmark server exited during startup")
+            time.sleep(0.1)
+    proc.terminate()
+    sys.exit("Benchmark server did not start")
+
+
+def server_transport(port):
+    """Send requests over HTTP to the local server process."""
+
+    def send(method, path, body, token):
+        headers = {"Authorization": f"Bearer {token}"} if token else {}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers["Content-Type"] = "application/json"
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        try:
+            conn.request(method, path, body=data, headers=headers)
+            res = conn.getresponse()
+            return res.status, res.read()
+        finally:
+            conn.close()
+
+    return send
+
+
+def serve(port):
+    from werkzeug.serving import make_server
+    from backend.app import create_app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    make_server("127.0.0.1", port, create_app(), threaded=True).serve_forever()
+
+
+# ------------------------
+# Measurement
+# ------------------------
+def login(send, name):
+    status, body = send("POST", "/auth/login", {"name": name, "password": PASSWORD}, None)
+    if status != 200:
+        sys.exit(f"Login as {name} failed ({status})")
+    return json.loads(body)
+
+
+def refresh_tokens(app, name, count):
+    """Mint single-use refresh tokens (rotation revokes each one on use)."""
+    from flask_jwt_extended import create_refresh_token
+    from backend.models import Player
+    from backend.utils.principals import get_principal, principal_claims
+
+    with app.app_context():
+        player = Player.query.filter_by(name=name).first()
+        claims = principal_claims(get_principal(player.id))
+        return [create_refresh_token(identity=str(player.id), additional_claims=claims)
+                for _ in range(count)]
+
+
+def token_for(tokens, role, i):
+    """Return the token of `role`, one per request for single-use tokens."""
+    token = tokens.get(role)
+    return token[i % len(token)] if isinstance(token, list) else token
+
+
+def run_scenario(send, scenario, ids, tokens, requests, concurrency):
+    def one(i):
+        path, body = scenario.build(i, ids)
+        token = token_for(tokens, scenario.role, i)
+        start = time.perf_counter()
+        status, _ = send(scenario.method, path, body, token)
+        return time.perf_counter() - start, status
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        start = time.perf_counter()
+        results = list(pool.map(one, range(requests)))
+        elapsed = time.perf_counter() - start
+
+    ms = [latency * 1000 for latency, _ in results]
+    return {
+        "requests": requests,
+        "errors": sum(1 for _, status in results if status >= 400),
+        "rps": round(requests / elapsed, 1),
+        "p50": round(statistics.median(ms), 3),
+        "p95": round(percentile(ms, 95), 3),
+        "p99": round(percentile(ms, 99), 3),
+    }
+
+
+def compare(results, baseline, threshold, min_delta):
+    """Return the routes whose p95 regressed beyond the threshold."""
+    regressions = []
+    for route, current in results.items():
+        base = baseline.get(route)
+        if not base:
+            continue
+        delta = current["p95"] - base["p95"]
+        if delta > min_delta and current["p95"] > base["p95"] * (1 + threshold):
+            regressions.append(route)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mode", choices=["client", "server"], default="client")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--quests", type=int, default=2000)
+    parser.add_argument("--skills", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=100,
+                        help="Requests per route")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--routes", default="",
+                        help="Only run routes containing this text")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--baseline", default=None,
+                        help="Baseline file (default: baseline_routes_<mode>.json)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative p95 growth (default 0.25)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0,
+                        help="Ignore p95 growth below this many ms")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve)
+
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    os.environ["PASSWORD_HASH_MAX_PENDING"] = str(args.requests * 4)
+    os.environ.setdefault("METRICS_ENABLED", "False")
+    os.environ.setdefault("RATELIMIT_ENABLED", "False")
+    os.environ.setdefault("SSE_MAX_DURATION", "0.01")
+
+    from backend.app import create_app
+
+    app = create_app()
+    check_coverage(app)
+    ids = seed(app, args)
+
+    server = None
+    if args.mode == "server":
+        port = free_port()
+        server = start_server(port)
+        send = server_transport(port)
+    else:
+        send = client_transport(app)
+
+    try:
+        user = login(send, "bench-user")
+        admin = login(send, "bench-admin")
+        tokens = {"user": user["access_token"], "admin": admin["access_token"]}
+
+        results = {}
+        print(f"{'route':58} {'err':>4} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+        for scenario in SCENARIOS:
+            route = f"{scenario.method} {scenario.rule}"
+            if args.routes not in route:
+                continue
+            if scenario.role == "refresh":
+                tokens["refresh"] = refresh_tokens(app, "bench-user", args.requests)
+            stats = run_scenario(send, scenario, ids, tokens,
+                                 args.requests, args.concurrency)
+            results[route] = stats
+            print(f"{route:58} {stats['errors']:4} {stats['rps']:8.1f} "
+                  f"{stats['p50']:8.2f} {stats['p95']:8.2f} {stats['p99']:8.2f}")
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        os.unlink(db_file)
+
+    meta = {"mode": args.mode, "players": args.players, "quests": args.quests,
+            "skills": args.skills, "requests": args.requests,
+            "concurrency": args.concurrency}
+    path = args.baseline or os.path.join(BENCH_DIR, f"baseline_routes_{args.mode}.json")
+    failed = [route for route, stats in results.items() if stats["errors"]]
+    if failed:
+        print("Requests failed on: " + ", ".join(failed))
+
+    if args.save_baseline:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"meta": meta, "routes": results}, f, indent=2)
+        print(f"Baseline saved to {path}")
+    elif os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline["meta"] != meta:
+            sys.exit(f"Baseline {path} was recorded with {baseline['meta']}; "
+                     "rerun with the same options or --save-baseline")
+        regressions = compare(results, baseline["routes"],
+                              args.threshold, args.min_delta_ms)
+        for route in regressions:
+            print(f"REGRESSION {route}: p95 {baseline['routes'][route]['p95']:.2f}"
+                  f" -> {results[route]['p95']:.2f} ms")
+        failed += regressions
+    else:
+        print(f"No baseline at {path} (use --save-baseline)")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+List serialization: hydrated ORM + jsonify vs. projected rows + orjson.
+
+Builds one page of --rows players both ways and reports the CPU time
+per row and the peak memory allocated while building the response:
+
+    python -m backend.benchmarks.bench_serializer --rows 200
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+
+def measure(fn, repeat):
+    fn()  # warm up statement caches
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    cpu = (time.process_time() - start) / repeat
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    db_file = tempfile.NamedTemporaryFile(suffix=".db", delete=False).name
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+
+    from flask import jsonify
+    from backend.app import create_app
+    from backend.models import db, Player
+    from backend.utils.serialization import json_response, rows_to_dicts
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        db.session.add_all(
+            Player(name=f"Player {i}", class_name="Bench", level=i % 50,
+                   xp=i * 10, password_hash="x") for i in range(args.rows))
+        db.session.commit()
+
+    def orm_jsonify():
+        players = Player.query.order_by(Player.id).limit(args.rows).all()
+        jsonify({"success": True, "next_cursor": None,
+                 "data": [p.to_dict(False) for p in players]}).get_data()
+        db.session.expunge_all()
+
+    def projection():
+        rows = (db.session.query(*Player.list_columns())
+                .order_by(Player.id).limit(args.rows).all())
+        json_response({"success": True, "next_cursor": None,
+                       "data": rows_to_dicts(rows)}).get_data()
+
+    with app.test_request_context():
+        results = {name: measure(fn, args.repeat) for name, fn in
+                   (("orm + jsonify", orm_jsonify), ("projection", projection))}
+
+    os.unlink(db_file)
+    for name, (cpu, peak) in results.items():
+        print(f"{name:14} {cpu / args.rows * 1e6:6.2f} us/row CPU, "
+              f"peak {peak / 1024:7.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
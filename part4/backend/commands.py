@@ -0,0 +1,95 @@
+import sys
+import click
+from flask import current_app
+from backend.models.progress import rebuild_progress
+from backend.utils.export import FORMATS, export_players, encode, parse_since
+
+
+def register_commands(app):
+    """Attach maintenance commands to the `flask` CLI."""
+
+    @app.cli.command("rebuild-progress")
+    def rebuild_progress_command():
+        """Rebuild player progress counters with one GROUP BY."""
+        count = rebuild_progress()
+        click.echo(f"✅ Rebuilt progress counters for {count} players.")
+
+    @app.cli.command("upgrade-schema")
+    def upgrade_schema_command():
+        """Add missing tables/columns/indexes and ON DELETE CASCADE foreign keys."""
+        from backend.utils.schema import SchemaUpgradeError, upgrade_schema
+
+        try:
+            steps = upgrade_schema()
+        except SchemaUpgradeError as e:
+            raise click.ClickException(f"{e} (no changes applied)")
+        for step in steps:
+            click.echo(f"  {step}")
+        click.echo(f"✅ Schema up to date ({len(steps)} changes applied).")
+
+    @app.cli.command("recompute-levels")
+    @click.option("--chunk-size", type=int, default=100000, show_default=True)
+    def recompute_levels_command(chunk_size):
+        """Re-derive every player's level from xp after a curve change."""
+        from backend.utils.levels import recompute_levels
+
+        scanned, changed = recompute_levels(chunk_size=chunk_size)
+        click.echo(f"✅ {changed} of {scanned} players changed level.")
+
+    @app.cli.command("build-assets")
+    @click.option("--frontend", "with_frontend", is_flag=True,
+                  help="Also build frontend/ into frontend/dist.")
+    def build_assets_command(with_frontend):
+        """Fingerprint and precompress static assets (served from /assets/)."""
+        from backend.utils.assets import FRONTEND_DIR, build_assets
+
+        sources = [app.static_folder] + ([FRONTEND_DIR] if with_frontend else [])
+        for source in sources:
+            manifest = build_assets(source)
+            click.echo(f"✅ {len(manifest)} assets from {source} built into {source}/dist.")
+
+    @app.cli.command("export")
+    @click.option("--format", "fmt", type=click.Choice(sorted(FORMATS)),
+                  default="ndjson", show_default=True)
+    @click.option("--since", help="Only players changed since this ISO timestamp.")
+    @click.option("--gzip", "compress", is_flag=True, help="Gzip the output.")
+    @click.option("--output", "-o", type=click.Path(dir_okay=False),
+                  help="Write to a file instead of stdout.")
+    def export_command(fmt, since, compress, output):
+        """Stream every player with quests and skills as NDJSON or CSV."""
+        try:
+            since = parse_since(since) if since else None
+        except ValueError as e:
+            raise click.BadParameter(str(e), param_hint="--since")
+
+        chunks = export_players(
+            fmt, since, current_app.config.get("EXPORT_CHUNK_SIZE", 500))
+        out = open(output, "wb") if output else sys.stdout.buffer
+        try:
+            for data in encode(chunks, compress):
+                out.write(data)
+        finally:
+            if output:
+                out.close()
+
+    @app.cli.command("seed")
+    @click.option("--players", type=int, default=0, show_default=True)
+    @click.option("--quests", type=int, default=0, show_default=True)
+    @click.option("--skills", type=int, default=0, show_default=True)
+    @click.option("--skills-per-player", type=float, default=3.0, show_default=True)
+    @click.option("--skills-per-quest", type=float, default=2.0, show_default=True)
+    @click.option("--owned-ratio", type=float, default=0.5, show_default=True,
+                  help="Share of quests assigned to a player.")
+    @click.option("--seed", "rng_seed", type=int, default=42, show_default=True)
+    @click.option("--batch-size", type=int, default=5000, show_default=True)
+    @click.option("--no-demo", is_flag=True, help="Skip the demo accounts.")
+    def seed_command(players, quests, skills, skills_per_player, skills_per_quest,
+                     owned_ratio, rng_seed, batch_size, no_demo):
+        """Create the demo accounts and optional synthetic data."""
+        from backend.seed import generate, seed_demo
+
+        if not no_demo:
+            seed_demo()
+        if players or quests or skills:
+            generate(players, quests, skills, skills_per_player,
+                     skills_per_quest, owned_ratio, rng_seed, batch_size)
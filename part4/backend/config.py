@@ -8,9 +8,81 @@ class Config:
     """Dynamic configuration loaded from environment variables."""
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Engine tuning (unset values fall back to per-driver defaults,
+    # see backend/utils/engine.py)
+    DB_POOL_SIZE = os.getenv("DB_POOL_SIZE")
+    DB_MAX_OVERFLOW = os.getenv("DB_MAX_OVERFLOW")
+    DB_POOL_TIMEOUT = os.getenv("DB_POOL_TIMEOUT")
+    DB_POOL_RECYCLE = os.getenv("DB_POOL_RECYCLE")
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING")
+    DB_CONNECT_TIMEOUT = os.getenv("DB_CONNECT_TIMEOUT")
+    DB_STATEMENT_TIMEOUT_MS = os.getenv("DB_STATEMENT_TIMEOUT_MS")
+    SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_FOREIGN_KEYS = os.getenv("SQLITE_FOREIGN_KEYS", "ON")
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))
+    # Under backend/asgi.py, reads run on the event loop with an async
+    # driver (aiosqlite, asyncpg, aiomysql) for DATABASE_URL, or for
+    # ASYNC_DATABASE_URL when set
+    ASGI_ASYNC_DB = os.getenv("ASGI_ASYNC_DB", "True").lower() == "true"
+    ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
     SECRET_KEY = os.getenv("SECRET_KEY", "dev_secret")
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY", "jwt_dev_secret")
     DEBUG = os.getenv("FLASK_DEBUG", "False").lower() == "true"
     PORT = int(os.getenv("FLASK_RUN_PORT", 5000))
     HOST = os.getenv("FLASK_RUN_HOST", "127.0.0.1")
     JWT_ACCESS_TOKEN_EXPIRES = 3600
+    # Revoked JTIs are mirrored in a per-process Bloom filter, synced with
+    # the revoked_tokens table every REVOCATION_SYNC_INTERVAL seconds
+    REVOCATION_FILTER_CAPACITY = int(os.getenv("REVOCATION_FILTER_CAPACITY", 100000))
+    REVOCATION_SYNC_INTERVAL = float(os.getenv("REVOCATION_SYNC_INTERVAL", 5))
+    REVOCATION_REBUILD_INTERVAL = float(os.getenv("REVOCATION_REBUILD_INTERVAL", 3600))
+    # Password hashing pool (0 workers = hash on the request thread)
+    PASSWORD_HASH_METHOD = os.getenv("PASSWORD_HASH_METHOD", "scrypt")
+    PASSWORD_HASH_WORKERS = int(os.getenv(
+        "PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_PENDING = int(os.getenv(
+        "PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 4 or 4))
+    PASSWORD_HASH_RETRY_AFTER = int(os.getenv("PASSWORD_HASH_RETRY_AFTER", 1))
+    # Token buckets on /auth/login and /auth/register ("N/second|minute|hour|day");
+    # RATELIMIT_STORAGE is "memory" (per process) or "sqlite:///path" (per host)
+    RATELIMIT_ENABLED = os.getenv("RATELIMIT_ENABLED", "True").lower() == "true"
+    RATELIMIT_STORAGE = os.getenv("RATELIMIT_STORAGE", "memory")
+    RATELIMIT_AUTH_PER_IP = os.getenv("RATELIMIT_AUTH_PER_IP", "30/minute")
+    RATELIMIT_AUTH_PER_ACCOUNT = os.getenv("RATELIMIT_AUTH_PER_ACCOUNT", "10/minute")
+    RATELIMIT_MAX_KEYS = int(os.getenv("RATELIMIT_MAX_KEYS", 100000))
+    BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", 1000))
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 500))
+    # Clock skew tolerated when in-process indexes re-read recent writes
+    INDEX_SYNC_MARGIN = int(os.getenv("INDEX_SYNC_MARGIN", 5))
+    # XP needed for level L: LEVEL_CURVE_BASE * (L - 1) ** LEVEL_CURVE_EXPONENT
+    LEVEL_CURVE_BASE = float(os.getenv("LEVEL_CURVE_BASE", 100))
+    LEVEL_CURVE_EXPONENT = float(os.getenv("LEVEL_CURVE_EXPONENT", 1.5))
+    LEVEL_MAX = int(os.getenv("LEVEL_MAX", 99))
+    PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", 30))
+    PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+    # Dynamic responses above COMPRESS_MIN_SIZE bytes are sent as br or gzip;
+    # fingerprinted /assets/ files are cached for ASSET_MAX_AGE seconds
+    COMPRESS_ENABLED = os.getenv("COMPRESS_ENABLED", "True").lower() == "true"
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", 1024))
+    COMPRESS_LEVEL = int(os.getenv("COMPRESS_LEVEL", 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv("COMPRESS_BROTLI_QUALITY", 4))
+    ASSET_MAX_AGE = int(os.getenv("ASSET_MAX_AGE", 31536000))
+    # Progress events for /api/stream/progress; EVENTS_BACKEND is "local"
+    # (per process) or "sqlite:///path" (shared by the workers of a host).
+    # Streams end after SSE_MAX_DURATION seconds and clients reconnect
+    EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "local")
+    EVENTS_HISTORY = int(os.getenv("EVENTS_HISTORY", 256))
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 64))
+    EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", 10000))
+    SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", 15))
+    SSE_MAX_DURATION = float(os.getenv("SSE_MAX_DURATION", 300))
+    # Lifetime of the ?jwt= token from POST /api/stream/token (checked
+    # when a stream opens, so it only needs to cover the connection)
+    SSE_TOKEN_EXPIRES = int(os.getenv("SSE_TOKEN_EXPIRES", 60))
+    # Per-route metrics at /metrics (admin JWT, or METRICS_TOKEN as a
+    # static Bearer token for scrapers); requests slower than
+    # SLOW_REQUEST_MS are logged with their SQL (0 = off)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")
+    SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", 0))
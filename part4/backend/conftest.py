@@ -1,5 +0,0 @@
-import os
-import sys
-
-# Ensure backend directory is always on the Python path
-sys.path.append(os.path.abspath(os.path.dirname(__file__)))
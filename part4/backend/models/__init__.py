@@ -1,8 +1,25 @@
+from contextvars import ContextVar
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 
-db = SQLAlchemy()
+# Engine of the request being served on the ASGI event loop, if any
+# (see backend/utils/async_db.py)
+async_bind = ContextVar("async_bind", default=None)
+
+
+class RoutingSession(Session):
+    """Session that uses the async-driver engine of event-loop requests."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        return super().get_bind(mapper, clause, bind or async_bind.get(), **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 # Import models here to make them available everywhere
 from .player import Player
 from .quest import Quest
 from .skill import Skill
+from .progress import PlayerProgress
+from .version import ResourceVersion
+from .revoked_token import RevokedToken
@@ -1,5 +1,7 @@
 from backend.models import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import selectinload
+from backend.utils.fieldsets import field_names, resolve_include
+from backend.utils.hashing import hash_password, verify_password, needs_rehash
 
 # Association table between players and skills
 player_skills = db.Table(
@@ -7,7 +9,7 @@ player_skills = db.Table(
     db.Column('player_id', db.Integer, db.ForeignKey(
         'players.id', ondelete="CASCADE"), primary_key=True),
     db.Column('skill_id', db.Integer, db.ForeignKey(
-        'skills.id', ondelete="CASCADE"), primary_key=True)
+        'skills.id', ondelete="CASCADE"), primary_key=True, index=True)
 )
 
 
@@ -16,45 +18,73 @@ class Player(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False, unique=True)
-    class_name = db.Column(db.String(50), nullable=False)
-    level = db.Column(db.Integer, default=1)
-    xp = db.Column(db.Integer, default=0)
+    class_name = db.Column(db.String(50), nullable=False, index=True)
+    level = db.Column(db.Integer, default=1, index=True)
+    xp = db.Column(db.Integer, default=0, index=True)
     is_admin = db.Column(db.Boolean, default=False)
     password_hash = db.Column(db.String(255), nullable=False)
+    # Bumped on role or password change to invalidate issued tokens
+    token_version = db.Column(db.Integer, nullable=False, default=0)
 
-    # Relationships
+    # Relationships (link rows and quests are deleted by ON DELETE CASCADE)
     skills = db.relationship(
-        'Skill', secondary=player_skills, back_populates='players')
+        'Skill', secondary=player_skills, back_populates='players',
+        passive_deletes=True)
     quests = db.relationship(
-        'Quest', back_populates='player', cascade="all, delete")
+        'Quest', back_populates='player', cascade="all, delete",
+        passive_deletes=True)
 
     # ------------------------
     # Password management
     # ------------------------
     def set_password(self, password):
-        """Hash and store the user's password."""
-        self.password_hash = generate_password_hash(password)
+        """Hash and store the user's password, revoking tokens issued with the old one."""
+        if self.password_hash:
+            self.token_version = (self.token_version or 0) + 1
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        """Verify the stored hash."""
-        return check_password_hash(self.password_hash, password)
+        """Verify the stored hash, upgrading it if made with outdated parameters."""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.password_hash = hash_password(password)
+        return True
 
     # ------------------------
     # Serialization
     # ------------------------
-    def to_dict(self, detailed=True):
-        """Return a dict representation of the player."""
-        data = {
-            "id": self.id,
-            "name": self.name,
-            "class_name": self.class_name,
-            "level": self.level,
-            "xp": self.xp,
-            "is_admin": self.is_admin
-        }
-
-        if detailed:
+    # Relations to_dict() can embed (?include=)
+    RELATIONS = ("skills", "quests")
+
+    @classmethod
+    def load_options(cls, detailed=True, include=None):
+        """Eager-loading options for the relations walked by to_dict()."""
+        include = resolve_include(cls, detailed, include)
+        options = []
+        if "skills" in include:
+            options.append(selectinload(cls.skills))
+        if "quests" in include:
+            options.append(selectinload(cls.quests))
+        return options
+
+    @classmethod
+    def list_columns(cls):
+        """Columns of to_dict(False), selected as rows by the list endpoints."""
+        return (cls.id, cls.name, cls.class_name, cls.level, cls.xp,
+                cls.is_admin)
+
+    def to_dict(self, detailed=True, fields=None, include=None):
+        """
+        Return a dict representation of the player, restricted to `fields`
+        and the `include` relations when given (?fields= / ?include=).
+        """
+        data = {name: getattr(self, name) for name in field_names(Player, fields)}
+        include = resolve_include(Player, detailed, include)
+
+        if "skills" in include:
             data["skills"] = [skill.to_dict(False) for skill in self.skills]
+        if "quests" in include:
             data["quests"] = [quest.to_dict(False) for quest in self.quests]
 
         return data
@@ -0,0 +1,160 @@
+from backend.models import db, Player, Quest
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+
+class PlayerProgress(db.Model):
+    """Per-player quest counters, kept in sync with the quests table."""
+    __tablename__ = 'player_progress'
+
+    player_id = db.Column(db.Integer, db.ForeignKey(
+        'players.id', ondelete="CASCADE"), primary_key=True)
+    quest_count = db.Column(db.Integer, nullable=False, default=0)
+    total_xp = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<PlayerProgress {self.player_id} ({self.quest_count} quests)>"
+
+
+# ------------------------
+# Counter maintenance
+# ------------------------
+def _history_value(state, key):
+    """Return the committed (pre-flush) value of an attribute."""
+    history = state.attrs[key].load_history()
+    if history.deleted:
+        return history.deleted[0]
+    if history.unchanged:
+        return history.unchanged[0]
+    return None
+
+
+def _current_owner(quest):
+    """Return the pending owner: a Player object, a player id or None."""
+    history = inspect(quest).attrs.player.history
+    if history.added or history.deleted:
+        return history.added[0] if history.added else None
+    return quest.player_id
+
+
+def _same_owner(new_owner, old_owner_id):
+    """Tell whether the pending owner is `old_owner_id` (an unflushed Player never is)."""
+    if isinstance(new_owner, Player):
+        return new_owner.id is not None and new_owner.id == old_owner_id
+    return new_owner == old_owner_id
+
+
+def _add_delta(session, owner, quests, xp):
+    if owner is not None and (quests or xp):
+        session.info.setdefault("progress_deltas", []).append(
+            (owner, quests, xp))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_progress_deltas(session, flush_context, instances):
+    """Record how each flushed quest changes its owner's counters."""
+    for obj in session.new:
+        if isinstance(obj, Quest):
+            _add_delta(session, _current_owner(obj), 1, obj.xp or 0)
+        elif isinstance(obj, Player):
+            session.info.setdefault("progress_new_players", []).append(obj)
+
+    for obj in session.deleted:
+        if isinstance(obj, Quest):
+            state = inspect(obj)
+            _add_delta(session, _history_value(state, "player_id"),
+                       -1, -(_history_value(state, "xp") or 0))
+
+    for obj in session.dirty:
+        if not isinstance(obj, Quest) or not session.is_modified(obj):
+            continue
+        state = inspect(obj)
+        old_owner = _history_value(state, "player_id")
+        old_xp = _history_value(state, "xp") or 0
+        new_owner = _current_owner(obj)
+        new_xp = obj.xp or 0
+        if _same_owner(new_owner, old_owner):
+            _add_delta(session, old_owner, 0, new_xp - old_xp)
+        else:
+            _add_delta(session, old_owner, -1, -old_xp)
+            _add_delta(session, new_owner, 1, new_xp)
+
+
+def create_progress_rows(connection, player_ids):
+    """Insert empty counter rows for newly created players."""
+    if player_ids:
+        connection.execute(PlayerProgress.__table__.insert(), [
+            {"player_id": pid, "quest_count": 0, "total_xp": 0}
+            for pid in player_ids])
+
+
+def apply_progress_deltas(connection, totals):
+    """Apply {player_id: (quest delta, xp delta)} to the counter rows."""
+    table = PlayerProgress.__table__
+    for player_id, (quests, xp) in totals.items():
+        if player_id is None or not (quests or xp):
+            continue
+        result = connection.execute(
+            table.update()
+            .where(table.c.player_id == player_id)
+            .values(quest_count=table.c.quest_count + quests,
+                    total_xp=table.c.total_xp + xp))
+        if result.rowcount == 0:
+            # Player created before counters existed: seed it from quests
+            connection.execute(table.insert().from_select(
+                ["player_id", "quest_count", "total_xp"],
+                progress_select(player_id)))
+
+
+@event.listens_for(Session, "after_flush")
+def _apply_progress_deltas(session, flush_context):
+    """Apply recorded deltas in the flush transaction."""
+    connection = session.connection()
+    create_progress_rows(connection, [
+        p.id for p in session.info.pop("progress_new_players", [])])
+
+    deleted_players = {obj.id for obj in session.deleted
+                       if isinstance(obj, Player)}
+    totals = {}
+    for owner, quests, xp in session.info.pop("progress_deltas", []):
+        player_id = getattr(owner, "id", owner)
+        if player_id in deleted_players:
+            continue
+        count, total = totals.get(player_id, (0, 0))
+        totals[player_id] = (count + quests, total + xp)
+    apply_progress_deltas(connection, totals)
+
+    if deleted_players:
+        table = PlayerProgress.__table__
+        connection.execute(table.delete().where(
+            table.c.player_id.in_(deleted_players)))
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_progress_deltas(session, previous_transaction):
+    """Drop deltas collected for a flush that was rolled back."""
+    session.info.pop("progress_deltas", None)
+    session.info.pop("progress_new_players", None)
+
+
+def progress_select(player_id=None):
+    """SELECT player_id, quest count and XP sum, grouped per player."""
+    stmt = (
+        db.select(Player.id, func.count(Quest.id),
+                  func.coalesce(func.sum(Quest.xp), 0))
+        .outerjoin(Quest, Quest.player_id == Player.id)
+        .group_by(Player.id)
+    )
+    if player_id is not None:
+        stmt = stmt.where(Player.id == player_id)
+    return stmt
+
+
+def rebuild_progress():
+    """Rebuild every counter row with a single GROUP BY. Returns the row count."""
+    table = PlayerProgress.__table__
+    db.session.execute(table.delete())
+    db.session.execute(table.insert().from_select(
+        ["player_id", "quest_count", "total_xp"], progress_select()))
+    db.session.commit()
+    return db.session.query(PlayerProgress).count()
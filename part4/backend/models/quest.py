@@ -1,12 +1,14 @@
 from backend.models import db
+from sqlalchemy.orm import joinedload, selectinload
+from backend.utils.fieldsets import field_names, resolve_include
 
 # Association table between quests and skills
 quest_skills = db.Table(
     'quest_skills',
     db.Column('quest_id', db.Integer, db.ForeignKey(
-        'quests.id'), primary_key=True),
+        'quests.id', ondelete="CASCADE"), primary_key=True),
     db.Column('skill_id', db.Integer, db.ForeignKey(
-        'skills.id'), primary_key=True)
+        'skills.id', ondelete="CASCADE"), primary_key=True, index=True)
 )
 
 
@@ -15,34 +17,54 @@ class Quest(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(150), nullable=False)
-    xp = db.Column(db.Integer, nullable=False)
+    xp = db.Column(db.Integer, nullable=False, index=True)
     summary = db.Column(db.Text, nullable=True)
 
     # Relationship with player
-    player_id = db.Column(db.Integer, db.ForeignKey('players.id'))
+    player_id = db.Column(db.Integer, db.ForeignKey(
+        'players.id', ondelete="CASCADE"), index=True)
     player = db.relationship('Player', back_populates='quests')
 
     # Relationship with skills
     skills = db.relationship(
-        'Skill', secondary=quest_skills, back_populates='quests')
+        'Skill', secondary=quest_skills, back_populates='quests',
+        passive_deletes=True)
 
     # ------------------------
     # Serialization
     # ------------------------
-    def to_dict(self, detailed=True):
-        """Return a dict representation of the quest."""
-        data = {
-            "id": self.id,
-            "title": self.title,
-            "xp": self.xp,
-            "summary": self.summary,
-        }
-
-        if detailed:
+    # Relations to_dict() can embed (?include=)
+    RELATIONS = ("skills", "player")
+
+    @classmethod
+    def load_options(cls, detailed=True, include=None):
+        """Eager-loading options for the relations walked by to_dict()."""
+        include = resolve_include(cls, detailed, include)
+        options = []
+        if "skills" in include:
+            options.append(selectinload(cls.skills))
+        if "player" in include:
+            options.append(joinedload(cls.player))
+        return options
+
+    @classmethod
+    def list_columns(cls):
+        """Columns of to_dict(False), selected as rows by the list endpoints."""
+        return (cls.id, cls.title, cls.xp, cls.summary)
+
+    def to_dict(self, detailed=True, fields=None, include=None):
+        """
+        Return a dict representation of the quest, restricted to `fields`
+        and the `include` relations when given (?fields= / ?include=).
+        """
+        data = {name: getattr(self, name) for name in field_names(Quest, fields)}
+        include = resolve_include(Quest, detailed, include)
+
+        if "skills" in include:
             data["skills"] = [skill.to_dict(False) for skill in self.skills]
-            if self.player:
-                data["player"] = {"id": self.player.id,
-                                  "name": self.player.name}
+        if "player" in include and self.player:
+            data["player"] = {"id": self.player.id,
+                              "name": self.player.name}
 
         return data
 
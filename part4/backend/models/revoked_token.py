@@ -0,0 +1,16 @@
+from backend.models import db
+
+
+class RevokedToken(db.Model):
+    """
+    JWT id (jti) of a revoked token, kept until the token would have
+    expired anyway. Checked through the in-process RevocationFilter.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    jti = db.Column(db.String(36), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    revoked_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<RevokedToken {self.jti}>"
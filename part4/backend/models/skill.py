@@ -1,32 +1,57 @@
 from backend.models import db
+from sqlalchemy.orm import selectinload
+from backend.utils.fieldsets import field_names, resolve_include
 
 
 class Skill(db.Model):
     __tablename__ = 'skills'
 
     id = db.Column(db.Integer, primary_key=True)
-    name = db.Column(db.String(100), nullable=False)
-    level = db.Column(db.Integer, default=1)
+    name = db.Column(db.String(100), nullable=False, index=True)
+    level = db.Column(db.Integer, default=1, index=True)
 
-    # Relationships
+    # Relationships (link rows are deleted by ON DELETE CASCADE)
     players = db.relationship(
-        'Player', secondary='player_skills', back_populates='skills')
+        'Player', secondary='player_skills', back_populates='skills',
+        passive_deletes=True)
     quests = db.relationship(
-        'Quest', secondary='quest_skills', back_populates='skills')
+        'Quest', secondary='quest_skills', back_populates='skills',
+        passive_deletes=True)
 
     # ------------------------
     # Serialization
     # ------------------------
-    def to_dict(self, detailed=True):
-        """Return a dict representation of the skill."""
-        data = {
-            "id": self.id,
-            "name": self.name,
-            "level": self.level
-        }
-
-        if detailed:
+    # Relations to_dict() can embed (?include=)
+    RELATIONS = ("players", "quests")
+
+    @classmethod
+    def load_options(cls, detailed=True, include=None):
+        """Eager-loading options for the relations walked by to_dict()."""
+        from backend.models import Player, Quest
+        include = resolve_include(cls, detailed, include)
+        options = []
+        if "players" in include:
+            options.append(selectinload(cls.players).load_only(Player.name))
+        if "quests" in include:
+            options.append(selectinload(cls.quests).load_only(Quest.title))
+        return options
+
+    @classmethod
+    def list_columns(cls):
+        """Columns of to_dict(False), selected as rows by the list endpoints."""
+        return (cls.id, cls.name, cls.level)
+
+    def to_dict(self, detailed=True, fields=None, include=None):
+        """
+        Return a dict representation of the skill, restricted to `fields`
+        and the `include` relations when given (?fields= / ?include=).
+        """
+        data = {name: getattr(self, name) for name in field_names(Skill, fields)}
+        include = resolve_include(Skill, detailed, include)
+
+        if "players" in include:
             data["players"] = [p.name for p in self.players]
+        if "quests" in include:
             data["quests"] = [q.title for q in self.quests]
 
         return data
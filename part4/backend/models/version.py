@@ -0,0 +1,132 @@
+from datetime import datetime, timezone
+from backend.models import db, Player, Quest, Skill
+from sqlalchemy import event, inspect
+from sqlalchemy.dialects import mysql
+from sqlalchemy.orm import Session
+
+# Collection name used in version keys for each versioned model
+COLLECTIONS = {Player: "players", Quest: "quests", Skill: "skills"}
+
+
+class ResourceVersion(db.Model):
+    """
+    Write counter for a collection ("quests") or an entity ("quests:3").
+
+    Bumped in the same transaction as the write, so every worker reads
+    the same version and conditional GETs never answer 304 for stale data.
+    """
+    __tablename__ = 'resource_versions'
+
+    key = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    # Microseconds, so writes within one second stay ordered (MySQL
+    # DATETIME drops them unless asked for)
+    updated_at = db.Column(
+        db.DateTime().with_variant(mysql.DATETIME(fsp=6), "mysql", "mariadb"),
+        nullable=False, index=True)
+
+    def __repr__(self):
+        return f"<ResourceVersion {self.key} v{self.version}>"
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def bump_versions(connection, keys):
+    """Increment the counters for `keys`, creating missing rows."""
+    keys = sorted(set(keys))
+    if not keys:
+        return
+
+    table = ResourceVersion.__table__
+    now = _utcnow()
+    dialect = connection.dialect.name
+
+    # executemany with one cached statement, whatever the number of keys
+    rows = [{"key": k, "version": 1, "updated_at": now} for k in keys]
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=[table.c.key],
+            set_={"version": table.c.version + 1,
+                  "updated_at": stmt.excluded.updated_at}), rows)
+    elif dialect in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert
+        stmt = insert(table)
+        connection.execute(stmt.on_duplicate_key_update(
+            version=table.c.version + 1,
+            updated_at=stmt.inserted.updated_at), rows)
+    else:
+        result = connection.execute(
+            table.update().where(table.c.key.in_(keys))
+            .values(version=table.c.version + 1, updated_at=now))
+        if result.rowcount < len(keys):
+            existing = set(connection.execute(
+                db.select(table.c.key).where(table.c.key.in_(keys))).scalars())
+            connection.execute(table.insert(), [
+                {"key": k, "version": 1, "updated_at": now}
+                for k in keys if k not in existing])
+
+
+def get_versions(keys):
+    """Return {key: (version, updated_at)} for the keys that have a row."""
+    table = ResourceVersion.__table__
+    rows = db.session.execute(
+        db.select(table.c.key, table.c.version, table.c.updated_at)
+        .where(table.c.key.in_(keys)))
+    return {row.key: (row.version, row.updated_at) for row in rows}
+
+
+# ------------------------
+# Write tracking
+# ------------------------
+@event.listens_for(Session, "before_flush")
+def _collect_cascaded_quests(session, flush_context, instances):
+    """Quests of deleted players go with ON DELETE CASCADE: note their ids."""
+    player_ids = [obj.id for obj in session.deleted if isinstance(obj, Player)]
+    if player_ids:
+        quest_ids = session.execute(
+            db.select(Quest.id).where(Quest.player_id.in_(player_ids))).scalars()
+        session.info.setdefault("cascaded_versions", set()).update(
+            ["quests"] + [f"quests:{quest_id}" for quest_id in quest_ids])
+
+
+def _quest_owners(quest):
+    """Ids of the players a flushed quest belongs or belonged to."""
+    attrs = inspect(quest).attrs
+    owners = {quest.player_id, *attrs.player_id.history.deleted,
+              *(player.id for player in attrs.player.history.deleted
+                if player is not None)}
+    owners.discard(None)
+    return owners
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_written_versions(session, flush_context):
+    """
+    Bump the collection and entity counters of every flushed row. A quest
+    also bumps its old and new owners, whose export records embed it.
+    """
+    keys = session.info.pop("cascaded_versions", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        collection = COLLECTIONS.get(type(obj))
+        if collection is None:
+            continue
+        if obj in session.dirty and not session.is_modified(obj):
+            continue
+        keys.add(collection)
+        keys.add(f"{collection}:{obj.id}")
+        if isinstance(obj, Quest):
+            keys.update(f"players:{owner}" for owner in _quest_owners(obj))
+
+    bump_versions(session.connection(), keys)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_cascaded_versions(session, previous_transaction):
+    session.info.pop("cascaded_versions", None)
@@ -2,9 +2,15 @@ from flask import Blueprint
 from .auth import auth_bp
 from .api import api_bp
 from .views import views_bp
+from .docs import docs_bp
+from .metrics import metrics_bp
+from .assets import assets_bp
 
 
 def register_blueprints(app):
     app.register_blueprint(auth_bp)
     app.register_blueprint(api_bp, url_prefix="/api")
     app.register_blueprint(views_bp)
+    app.register_blueprint(docs_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(assets_bp)
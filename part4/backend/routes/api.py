@@ -1,7 +1,37 @@
-from flask import Blueprint, jsonify, request
-from backend.models import db, Player, Quest, Skill
-from backend.utils.auth_decorators import admin_required
-from flask_jwt_extended import jwt_required, get_jwt_identity
+import os
+from flask import (
+    Blueprint, Response, current_app, jsonify, request, stream_with_context)
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
+from backend.models import db, Player, Quest, Skill, PlayerProgress
+from backend.models.progress import (
+    progress_select, create_progress_rows, apply_progress_deltas)
+from backend.models.version import bump_versions
+from backend.utils.auth_decorators import (
+    STREAM_SCOPE, admin_required, current_principal)
+from backend.utils.bulk import (
+    BulkRequestError, parse_bulk_request, check_item, check_ids,
+    insert_rows, update_rows, bump_bulk_versions, bulk_results)
+from backend.utils.conditional import conditional_get
+from backend.utils.engine import pool_stats
+from backend.utils.events import (
+    PLAYER_FIELDS, QUEST_FIELDS, SKILL_FIELDS, SKILLS_TOPIC, TooManySubscribers,
+    event_data, get_broker, player_topic, queue_event, stream_events)
+from backend.utils.export import FORMATS, export_players, encode, parse_since
+from backend.utils.fieldsets import (
+    FieldsetError, parse_fieldset, fieldset_columns, field_names)
+from backend.utils.hashing import hash_passwords
+from backend.utils.leaderboard import get_leaderboard
+from backend.utils.levels import get_level_curve
+from backend.utils.recommendations import get_recommender
+from backend.utils.search import get_search_index
+from backend.utils.serialization import json_response, rows_to_dicts
+from backend.utils.pagination import paginate, parse_sort, PaginationError
+from backend.utils.principals import principal_claims
+from datetime import timedelta
+from flask_jwt_extended import (
+    create_access_token, get_jwt, get_jwt_identity, get_jwt_request_location,
+    jwt_required)
 
 api_bp = Blueprint('api', __name__)
 
@@ -10,14 +40,93 @@ api_bp = Blueprint('api', __name__)
 # =====================================================
 
 
-def success_response(data, status_code=200):
+def success_response(data, status_code=200, **meta):
     """Return a consistent success JSON response."""
-    return jsonify({"success": True, "data": data}), status_code
+    return jsonify({"success": True, "data": data, **meta}), status_code
+
+
+def load_entity(model, entity_id, detailed=True, fields=None, include=None):
+    """Load one row together with the relations its to_dict() walks."""
+    options = model.load_options(detailed, include)
+    if fields is not None:
+        options.append(load_only(*fieldset_columns(model, fields)))
+    stmt = db.select(model).options(*options).filter_by(id=entity_id)
+    return db.session.execute(stmt).unique().scalar_one_or_none()
+
+
+def entity_response(model, entity_id):
+    """Return one entity, honouring ?fields= and ?include= (all relations by default)."""
+    try:
+        fields, include = parse_fieldset(request.args, model)
+    except FieldsetError as e:
+        return error_response(str(e), 400)
+    entity = load_entity(model, entity_id, fields=fields, include=include)
+    if not entity:
+        return error_response(f"{model.__name__} not found", 404)
+    return success_response(entity.to_dict(fields=fields, include=include))
+
+
+def paginated_response(model, sort_fields, filters=None):
+    """
+    Return one keyset-paginated page of a list endpoint.
+
+    Only the columns of to_dict(False), or of ?fields=, are selected as
+    plain rows and encoded straight to JSON bytes: no ORM instances are
+    hydrated. ?include= switches to entities with the requested
+    relations eager-loaded.
+    """
+    try:
+        fields, include = parse_fieldset(request.args, model)
+        _, sort_field, _ = parse_sort(request.args, sort_fields)
+        columns = fieldset_columns(model, fields)
+        # The cursor is built from the sort column: select it even if not asked for
+        sort_column = sort_fields[sort_field]
+        if sort_column.key not in {column.key for column in columns}:
+            columns.append(sort_column)
+
+        if include:
+            query = db.session.query(model).options(
+                load_only(*columns), *model.load_options(include=include))
+        else:
+            query = db.session.query(*columns)
+        rows, next_cursor = paginate(
+            query, model, request.args, sort_fields, filters)
+    except (FieldsetError, PaginationError) as e:
+        return error_response(str(e), 400)
+
+    if include:
+        data = [row.to_dict(fields=fields, include=include) for row in rows]
+    else:
+        data = rows_to_dicts(rows)
+        names = field_names(model, fields)
+        if len(names) < len(columns):
+            data = [{name: item[name] for name in names} for item in data]
+    return json_response({"success": True, "data": data,
+                          "next_cursor": next_cursor})
+
+
+def error_response(message, status_code=400, **extra):
+    """Return a consistent error JSON response."""
+    return jsonify({"success": False, "error": message, **extra}), status_code
 
 
-def error_response(message, status_code=400):
-    """Return a consistent error JSON response."""
-    return jsonify({"success": False, "error": message}), status_code
+def list_keys(collection, related):
+    """
+    Version keys of a list page for conditional_get: its collection, plus
+    the `related` collections once ?include= embeds their rows.
+    """
+    def keys():
+        return [collection, *related] if request.args.get("include") else [collection]
+    return keys
+
+
+def check_int_fields(data, fields):
+    """Return an error message when one of `fields` is present but not an integer."""
+    for field in fields:
+        value = data.get(field)
+        if field in data and (not isinstance(value, int) or isinstance(value, bool)):
+            return f"{field} must be an integer"
+    return None
 
 # =====================================================
 # PLAYERS
@@ -26,20 +135,23 @@ def error_response(message, status_code=400):
 
 @api_bp.route('/players', methods=['GET'])
 @jwt_required()
+@conditional_get(list_keys("players", ("skills", "quests")))
 def get_players():
-    """Get all players (authenticated users)."""
-    players = Player.query.all()
-    return success_response([p.to_dict(False) for p in players])
+    """List players, one keyset page at a time (authenticated users)."""
+    return paginated_response(
+        Player,
+        sort_fields={"id": Player.id, "name": Player.name,
+                     "level": Player.level, "xp": Player.xp},
+        filters={"class_name": (Player.class_name, str)})
 
 
 @api_bp.route('/players/<int:player_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda player_id: [
+    f"players:{player_id}", "skills", "quests"])
 def get_player(player_id):
     """Get a player by ID."""
-    player = db.session.get(Player, player_id)
-    if not player:
-        return error_response("Player not found", 404)
-    return success_response(player.to_dict())
+    return entity_response(Player, player_id)
 
 
 @api_bp.route('/players', methods=['POST'])
@@ -51,16 +163,19 @@ def create_player():
     # Validate input
     if not data or "name" not in data or "class_name" not in data or "password" not in data:
         return error_response("Missing required fields: name, class_name, password", 400)
+    message = check_int_fields(data, ("xp",))
+    if message:
+        return error_response(message, 400)
 
     # Prevent duplicates
     if Player.query.filter_by(name=data["name"]).first():
         return error_response("A player with this name already exists", 400)
 
     # Create player and set password hash
+    # Level follows xp (set on flush); a client-supplied level is ignored
     new_player = Player(
         name=data["name"],
         class_name=data["class_name"],
-        level=data.get("level", 1),
         xp=data.get("xp", 0),
         is_admin=data.get("is_admin", False)
     )
@@ -78,7 +193,9 @@ def create_player():
 @jwt_required()
 def update_player(player_id):
     """Update player info (admin or owner only)."""
-    current_user = db.session.get(Player, get_jwt_identity())
+    current_user = current_principal()
+    if not current_user:
+        return error_response("You are not authorized to update this player", 403)
     player = db.session.get(Player, player_id)
 
     if not player:
@@ -89,13 +206,17 @@ def update_player(player_id):
     data = request.get_json()
     if not data:
         return error_response("No data provided", 400)
+    message = check_int_fields(data, ("xp",))
+    if message:
+        return error_response(message, 400)
 
     player.name = data.get("name", player.name)
     player.class_name = data.get("class_name", player.class_name)
-    player.level = data.get("level", player.level)
     player.xp = data.get("xp", player.xp)
     db.session.commit()
 
+    # Reload with the detail graph instead of lazy-loading after commit
+    player = load_entity(Player, player_id)
     return success_response({"message": "Player updated successfully", "player": player.to_dict()})
 
 
@@ -103,7 +224,9 @@ def update_player(player_id):
 @jwt_required()
 def delete_player(player_id):
     """Delete player (admin or owner only)."""
-    current_user = db.session.get(Player, get_jwt_identity())
+    current_user = current_principal()
+    if not current_user:
+        return error_response("You are not authorized to delete this player", 403)
     player = db.session.get(Player, player_id)
 
     if not player:
@@ -115,6 +238,33 @@ def delete_player(player_id):
     db.session.commit()
     return success_response({"message": "Player deleted successfully"})
 
+
+@api_bp.route('/players/<int:player_id>/recommended-quests', methods=['GET'])
+@jwt_required()
+def get_recommended_quests(player_id):
+    """Rank open quests by how well the player's skills cover them."""
+    try:
+        limit = min(int(request.args.get("limit", 10)), 100)
+    except ValueError:
+        return error_response("limit must be an integer", 400)
+    if limit < 1:
+        return error_response("limit must be a positive integer", 400)
+    try:
+        fields, _ = parse_fieldset(request.args, Quest)
+    except FieldsetError as e:
+        return error_response(str(e), 400)
+    if not db.session.get(Player, player_id):
+        return error_response("Player not found", 404)
+
+    ranked = get_recommender().recommend(player_id, limit)
+    quests = {q.id: q for q in Quest.query.options(
+        load_only(*fieldset_columns(Quest, fields))).filter(
+        Quest.id.in_([quest_id for quest_id, _, _ in ranked]))}
+    results = [{**quests[quest_id].to_dict(False, fields), "score": round(score, 4),
+                "matched_skills": matched}
+               for quest_id, score, matched in ranked if quest_id in quests]
+    return success_response(results)
+
 # =====================================================
 # QUESTS
 # =====================================================
@@ -122,20 +272,53 @@ def delete_player(player_id):
 
 @api_bp.route('/quests', methods=['GET'])
 @jwt_required()
+@conditional_get(list_keys("quests", ("skills", "players")))
 def get_quests():
-    """Get all quests (authenticated users)."""
-    quests = Quest.query.all()
-    return success_response([q.to_dict(False) for q in quests])
+    """List quests, one keyset page at a time (authenticated users)."""
+    return paginated_response(
+        Quest,
+        sort_fields={"id": Quest.id, "xp": Quest.xp},
+        filters={"player_id": (Quest.player_id, int)})
+
+
+@api_bp.route('/quests/search', methods=['GET'])
+@jwt_required()
+def search_quests():
+    """Full-text search over quest titles and summaries (authenticated users)."""
+    query = request.args.get("q", "").strip()
+    if not query:
+        return error_response("Missing search query: q", 400)
+    try:
+        limit = min(int(request.args.get("limit", 20)), 100)
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return error_response("limit and offset must be integers", 400)
+    if limit < 1 or offset < 0:
+        return error_response("limit must be positive and offset not negative", 400)
+    try:
+        fields, _ = parse_fieldset(request.args, Quest)
+    except FieldsetError as e:
+        return error_response(str(e), 400)
+
+    hits = get_search_index().search(query)
+    page = hits[offset:offset + limit]
+    quests = {q.id: q for q in Quest.query.options(
+        load_only(*fieldset_columns(Quest, fields))).filter(
+        Quest.id.in_([quest_id for quest_id, _ in page]))}
+
+    results = [{**quests[quest_id].to_dict(False, fields), "score": round(score, 4)}
+               for quest_id, score in page if quest_id in quests]
+    next_offset = offset + limit if offset + limit < len(hits) else None
+    return success_response(results, total=len(hits), next_offset=next_offset)
 
 
 @api_bp.route('/quests/<int:quest_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda quest_id: [
+    f"quests:{quest_id}", "skills", "players"])
 def get_quest(quest_id):
     """Get a quest by ID."""
-    quest = db.session.get(Quest, quest_id)
-    if not quest:
-        return error_response("Quest not found", 404)
-    return success_response(quest.to_dict())
+    return entity_response(Quest, quest_id)
 
 
 @api_bp.route('/quests', methods=['POST'])
@@ -145,6 +328,9 @@ def create_quest():
     data = request.get_json()
     if not data or "title" not in data or "xp" not in data:
         return error_response("Missing required fields: title, xp", 400)
+    message = check_int_fields(data, ("xp",))
+    if message:
+        return error_response(message, 400)
 
     new_quest = Quest(
         title=data["title"],
@@ -167,12 +353,17 @@ def update_quest(quest_id):
     data = request.get_json()
     if not data:
         return error_response("No data provided", 400)
+    message = check_int_fields(data, ("xp",))
+    if message:
+        return error_response(message, 400)
 
     quest.title = data.get("title", quest.title)
     quest.xp = data.get("xp", quest.xp)
     quest.summary = data.get("summary", quest.summary)
     db.session.commit()
 
+    # Reload with the detail graph instead of lazy-loading after commit
+    quest = load_entity(Quest, quest_id)
     return success_response({"message": "Quest updated successfully", "quest": quest.to_dict()})
 
 
@@ -195,20 +386,23 @@ def delete_quest(quest_id):
 
 @api_bp.route('/skills', methods=['GET'])
 @jwt_required()
+@conditional_get(list_keys("skills", ("players", "quests")))
 def get_skills():
-    """Get all skills (authenticated users)."""
-    skills = Skill.query.all()
-    return success_response([s.to_dict(False) for s in skills])
+    """List skills, one keyset page at a time (authenticated users)."""
+    return paginated_response(
+        Skill,
+        sort_fields={"id": Skill.id, "name": Skill.name,
+                     "level": Skill.level},
+        filters={"name": (Skill.name, str)})
 
 
 @api_bp.route('/skills/<int:skill_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda skill_id: [
+    f"skills:{skill_id}", "players", "quests"])
 def get_skill(skill_id):
     """Get a skill by ID."""
-    skill = db.session.get(Skill, skill_id)
-    if not skill:
-        return error_response("Skill not found", 404)
-    return success_response(skill.to_dict())
+    return entity_response(Skill, skill_id)
 
 
 @api_bp.route('/skills', methods=['POST'])
@@ -240,6 +434,8 @@ def update_skill(skill_id):
     skill.name = data.get("name", skill.name)
     skill.level = data.get("level", skill.level)
     db.session.commit()
+    # Reload with the detail graph instead of lazy-loading after commit
+    skill = load_entity(Skill, skill_id)
     return success_response({"message": "Skill updated successfully", "skill": skill.to_dict()})
 
 
@@ -255,6 +451,294 @@ def delete_skill(skill_id):
     db.session.commit()
     return success_response({"message": "Skill deleted successfully"})
 
+# =====================================================
+# BULK OPERATIONS
+# =====================================================
+
+
+def run_bulk(collection, validate, write, ok_status):
+    """
+    Validate every item first, then write the valid ones in a single
+    transaction. In "atomic" mode any invalid item aborts the batch; in
+    "partial" mode valid items are written and the response is a 207
+    with per-item results.
+    """
+    try:
+        items, mode = parse_bulk_request(
+            request.get_json(silent=True),
+            current_app.config.get("BULK_MAX_ITEMS", 1000))
+    except BulkRequestError as e:
+        return error_response(str(e), 400)
+
+    errors = validate(items)
+    if errors and mode == "atomic":
+        return error_response(
+            "Validation failed, nothing was written", 400,
+            results=[{"index": i, "status": 400, "error": message}
+                     for i, message in sorted(errors.items())])
+
+    valid = [item for i, item in enumerate(items) if i not in errors]
+    try:
+        ids = write(valid) if valid else []
+        bump_bulk_versions(collection, ids)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return error_response("Conflicting write, nothing was written", 409)
+
+    data = {"results": bulk_results(errors, ids, len(items), ok_status),
+            "written": len(ids), "failed": len(errors)}
+    return success_response(data, 207 if errors else ok_status)
+
+
+def check_items(items, **rules):
+    """Run check_item() on every item, returning {index: error}."""
+    errors = {}
+    for index, item in enumerate(items):
+        message = check_item(item, **rules)
+        if message:
+            errors[index] = message
+    return errors
+
+
+def check_player_names(items, errors, ids=None):
+    """Reject names taken in the batch or in the table (one IN query)."""
+    names = [item["name"] for i, item in enumerate(items)
+             if i not in errors and "name" in item]
+    taken = dict(db.session.execute(
+        db.select(Player.name, Player.id).where(Player.name.in_(names))).all())
+
+    seen = set()
+    for index, item in enumerate(items):
+        if index in errors or "name" not in item:
+            continue
+        owner = taken.get(item["name"])
+        if item["name"] in seen or (owner is not None and owner != item.get("id")):
+            errors[index] = f"A player with this name already exists: {item['name']}"
+        seen.add(item["name"])
+
+
+@api_bp.route('/players/bulk', methods=['POST'])
+@admin_required
+def bulk_create_players():
+    """Create many players in one transaction (admin only)."""
+    def validate(items):
+        errors = check_items(items, required=("name", "class_name", "password"),
+                             int_fields=("level", "xp"),
+                             str_fields=("name", "class_name", "password"),
+                             allowed=("is_admin",))
+        check_player_names(items, errors)
+        return errors
+
+    def write(items):
+        curve = get_level_curve()
+        hashes = hash_passwords(item["password"] for item in items)
+        ids = insert_rows(Player, [{
+            "name": item["name"],
+            "class_name": item["class_name"],
+            "level": curve.level_for(item.get("xp", 0)),
+            "xp": item.get("xp", 0),
+            "is_admin": bool(item.get("is_admin", False)),
+            "password_hash": pwhash,
+            "token_version": 0,
+        } for item, pwhash in zip(items, hashes)])
+        create_progress_rows(db.session.connection(), ids)
+        return ids
+
+    return run_bulk("players", validate, write, 201)
+
+
+@api_bp.route('/players/bulk', methods=['PUT'])
+@admin_required
+def bulk_update_players():
+    """Update many players in one transaction (admin only)."""
+    existing = {}
+
+    def validate(items):
+        errors = check_items(items, required=("id",), int_fields=("id", "level", "xp"),
+                             str_fields=("name", "class_name"))
+        existing.update(check_ids(items, errors, Player))
+        check_player_names(items, errors)
+        return errors
+
+    def write(items):
+        # Level follows xp; a bare level is ignored like in PUT /players/<id>
+        curve = get_level_curve()
+        rows = []
+        for item in items:
+            row = {k: v for k, v in item.items() if k != "level"}
+            if "xp" in item:
+                row["level"] = curve.level_for(item["xp"])
+            rows.append(row)
+        update_rows(Player, rows)
+        for row in rows:
+            if len(row) > 1:
+                data = {**existing[row["id"]]._mapping, **row}
+                queue_event(db.session, player_topic(row["id"]), "player",
+                            event_data(data, PLAYER_FIELDS))
+        return [item["id"] for item in items]
+
+    return run_bulk("players", validate, write, 200)
+
+
+@api_bp.route('/quests/bulk', methods=['POST'])
+@admin_required
+def bulk_create_quests():
+    """Create many quests in one transaction (admin only)."""
+    def validate(items):
+        return check_items(items, required=("title", "xp"), int_fields=("xp",),
+                           str_fields=("title", "summary"))
+
+    def write(items):
+        return insert_rows(Quest, [{
+            "title": item["title"],
+            "xp": item["xp"],
+            "summary": item.get("summary", ""),
+        } for item in items])
+
+    return run_bulk("quests", validate, write, 201)
+
+
+@api_bp.route('/quests/bulk', methods=['PUT'])
+@admin_required
+def bulk_update_quests():
+    """Update many quests in one transaction (admin only)."""
+    existing = {}
+
+    def validate(items):
+        errors = check_items(items, required=("id",), int_fields=("id", "xp"),
+                             str_fields=("title", "summary"))
+        existing.update(check_ids(items, errors, Quest))
+        return errors
+
+    def write(items):
+        update_rows(Quest, items)
+        # Keep the owners' progress counters in step with XP changes
+        totals = {}
+        for item in items:
+            old = existing[item["id"]]
+            if old.player_id is None or len(item) == 1:
+                continue
+            queue_event(db.session, player_topic(old.player_id), "quest",
+                        event_data({**old._mapping, **item}, QUEST_FIELDS))
+            if "xp" in item:
+                count, xp = totals.get(old.player_id, (0, 0))
+                totals[old.player_id] = (count, xp + item["xp"] - old.xp)
+        apply_progress_deltas(db.session.connection(), totals)
+        # Owners' export records embed their quests, like the ORM writes
+        bump_versions(db.session.connection(), [
+            f"players:{existing[item['id']].player_id}" for item in items
+            if existing[item["id"]].player_id is not None])
+        return [item["id"] for item in items]
+
+    return run_bulk("quests", validate, write, 200)
+
+
+@api_bp.route('/skills/bulk', methods=['POST'])
+@admin_required
+def bulk_create_skills():
+    """Create many skills in one transaction (admin only)."""
+    def validate(items):
+        return check_items(items, required=("name",), int_fields=("level",),
+                           str_fields=("name",))
+
+    def write(items):
+        rows = [{"name": item["name"], "level": item.get("level", 1)} for item in items]
+        ids = insert_rows(Skill, rows)
+        for skill_id, row in zip(ids, rows):
+            queue_event(db.session, SKILLS_TOPIC, "skill",
+                        event_data({"id": skill_id, **row}, SKILL_FIELDS))
+        return ids
+
+    return run_bulk("skills", validate, write, 201)
+
+
+@api_bp.route('/skills/bulk', methods=['PUT'])
+@admin_required
+def bulk_update_skills():
+    """Update many skills in one transaction (admin only)."""
+    existing = {}
+
+    def validate(items):
+        errors = check_items(items, required=("id",), int_fields=("id", "level"),
+                             str_fields=("name",))
+        existing.update(check_ids(items, errors, Skill))
+        return errors
+
+    def write(items):
+        update_rows(Skill, items)
+        for item in items:
+            if len(item) > 1:
+                data = {**existing[item["id"]]._mapping, **item}
+                queue_event(db.session, SKILLS_TOPIC, "skill",
+                            event_data(data, SKILL_FIELDS))
+        return [item["id"] for item in items]
+
+    return run_bulk("skills", validate, write, 200)
+
+# =====================================================
+# LEADERBOARD
+# =====================================================
+
+
+@api_bp.route('/leaderboard', methods=['GET'])
+@jwt_required()
+def get_leaderboard_page():
+    """Get the XP leaderboard, best first (authenticated users)."""
+    try:
+        limit = min(int(request.args.get("limit", 10)), 100)
+        offset = int(request.args.get("offset", 0))
+    except ValueError:
+        return error_response("limit and offset must be integers", 400)
+    if limit < 1 or offset < 0:
+        return error_response("limit must be positive and offset not negative", 400)
+
+    board = get_leaderboard()
+    next_offset = offset + limit if offset + limit < len(board) else None
+    return success_response(board.top(offset, limit),
+                            total=len(board), next_offset=next_offset)
+
+
+@api_bp.route('/leaderboard/me', methods=['GET'])
+@jwt_required()
+def get_my_rank():
+    """Get the current player's leaderboard rank."""
+    entry = get_leaderboard().rank_of(int(get_jwt_identity()))
+    if not entry:
+        return error_response("Player not found", 404)
+    return success_response(entry)
+
+# =====================================================
+# EXPORT
+# =====================================================
+
+
+@api_bp.route('/export', methods=['GET'])
+@admin_required
+def export_dataset():
+    """Stream players with their quests and skills as NDJSON or CSV (admin only)."""
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in FORMATS:
+        return error_response("format must be one of: csv, ndjson", 400)
+
+    since = None
+    if "since" in request.args:
+        try:
+            since = parse_since(request.args["since"])
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+    compress = request.accept_encodings["gzip"] > 0
+    chunks = export_players(
+        fmt, since, current_app.config.get("EXPORT_CHUNK_SIZE", 500))
+    response = Response(stream_with_context(encode(chunks, compress)),
+                        mimetype=FORMATS[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="players.{fmt}"'
+    response.vary.add("Accept-Encoding")
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
 # =====================================================
 # PLAYER PROGRESS
 # =====================================================
@@ -262,19 +746,114 @@ def delete_skill(skill_id):
 
 @api_bp.route('/progress/<int:player_id>', methods=['GET'])
 @jwt_required()
+@conditional_get(lambda player_id: [
+    f"players:{player_id}", "quests"])
 def get_player_progress(player_id):
-    """Get a player's progress summary."""
-    player = db.session.get(Player, player_id)
-    if not player:
+    """Get a player's progress summary from its counters row."""
+    row = db.session.execute(
+        db.select(Player.name, Player.level,
+                  PlayerProgress.quest_count, PlayerProgress.total_xp)
+        .outerjoin(PlayerProgress, PlayerProgress.player_id == Player.id)
+        .where(Player.id == player_id)
+    ).first()
+    if not row:
         return error_response("Player not found", 404)
 
-    total_quests = len(player.quests)
-    total_xp = sum(q.xp for q in player.quests)
+    quest_count, total_xp = row.quest_count, row.total_xp
+    if quest_count is None:
+        # Counters not built yet for this player (run `flask rebuild-progress`)
+        _, quest_count, total_xp = db.session.execute(
+            progress_select(player_id)).one()
 
     data = {
-        "player_name": player.name,
-        "total_quests_completed": total_quests,
+        "player_name": row.name,
+        "total_quests_completed": quest_count,
         "total_xp_gained": total_xp,
-        "level": player.level
+        "level": row.level
     }
     return success_response(data)
+
+# =====================================================
+# STREAMING
+# =====================================================
+
+
+@api_bp.route('/stream/token', methods=['POST'])
+@jwt_required()
+def create_stream_token():
+    """
+    Mint a short-lived token that only opens /api/stream/progress, for
+    clients that must pass it in the URL (authenticated users).
+    """
+    current_user = current_principal()
+    if not current_user:
+        return error_response("You are not authorized to stream this player", 403)
+    expires_in = current_app.config.get("SSE_TOKEN_EXPIRES", 60)
+    token = create_access_token(
+        identity=str(current_user.id),
+        additional_claims={**principal_claims(current_user), "scope": STREAM_SCOPE},
+        expires_delta=timedelta(seconds=expires_in))
+    return success_response({"token": token, "expires_in": expires_in}, 201)
+
+
+@api_bp.route('/stream/progress', methods=['GET'])
+@jwt_required(locations=["headers", "query_string"])
+def stream_progress():
+    """
+    Push a player's progress changes as Server-Sent Events (own stream,
+    any stream for admins): `player` (xp, level...), `quest`, `skills`
+    and `skill` events, a `resync` when events were missed, and a
+    keepalive comment every SSE_HEARTBEAT seconds.
+
+    A browser EventSource cannot set headers, so it passes ?jwt=. URLs
+    end up in access logs and proxies, so only a stream token from
+    POST /api/stream/token (short-lived, valid on this route only) is
+    accepted there, never the general access token.
+    """
+    if (get_jwt_request_location() == "query_string"
+            and get_jwt().get("scope") != STREAM_SCOPE):
+        return error_response("Pass a stream token from /api/stream/token in ?jwt=", 401)
+    current_user = current_principal()
+    if not current_user:
+        return error_response("You are not authorized to stream this player", 403)
+    try:
+        player_id = int(request.args.get("player_id", current_user.id))
+        last_event_id = request.headers.get("Last-Event-ID")
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return error_response("player_id and Last-Event-ID must be integers", 400)
+    if not current_user.is_admin and current_user.id != player_id:
+        return error_response("You are not authorized to stream this player", 403)
+    if player_id != current_user.id and not db.session.get(Player, player_id):
+        return error_response("Player not found", 404)
+
+    try:
+        subscription = get_broker().subscribe(
+            [player_topic(player_id), SKILLS_TOPIC], last_event_id)
+    except TooManySubscribers:
+        response, status = error_response("Too many open streams, retry later", 503)
+        response.headers["Retry-After"] = "5"
+        return response, status
+    # The stream outlives the request: give the connection back now
+    db.session.close()
+
+    config = current_app.config
+    response = Response(stream_events(
+        subscription, config.get("SSE_HEARTBEAT", 15), config.get("SSE_MAX_DURATION", 300),
+        async_wait=bool(request.environ.get("asgi.async_wait"))),
+        mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+# =====================================================
+# DATABASE POOL
+# =====================================================
+
+
+@api_bp.route('/admin/pool-stats', methods=['GET'])
+@admin_required
+def get_pool_stats():
+    """Connection pool counters of this worker process (admin only)."""
+    return success_response(
+        pool_stats(db, current_app.extensions.get("async_engine") or None), pid=os.getpid())
@@ -0,0 +1,36 @@
+import mimetypes
+import os
+from flask import Blueprint, abort, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+from backend.utils.assets import DIST
+from backend.utils.compression import negotiate_encoding
+
+assets_bp = Blueprint("assets", __name__)
+
+SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+@assets_bp.route("/assets/<path:filename>")
+def asset(filename):
+    """
+    Serve a fingerprinted asset built by `flask build-assets`, picking
+    its precompressed .br/.gz sibling when the client accepts it. The
+    name changes with the content, so it is cached for good.
+    """
+    folder = os.path.join(current_app.static_folder, DIST)
+    path = safe_join(folder, filename)
+    if path is None:
+        abort(404)
+    offered = [e for e, suffix in SUFFIXES.items() if os.path.isfile(path + suffix)]
+    encoding = negotiate_encoding(request.accept_encodings, offered) if offered else None
+
+    response = send_from_directory(
+        folder, filename + SUFFIXES.get(encoding, ""),
+        mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        max_age=current_app.config.get("ASSET_MAX_AGE", 31536000))
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
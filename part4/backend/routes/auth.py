@@ -1,12 +1,19 @@
 from flask import Blueprint, request, jsonify
 from backend.models import db, Player
+from backend.utils.auth_decorators import current_principal
+from backend.utils.principals import (
+    Principal, get_principal_cache, principal_claims)
+from backend.utils.ratelimit import rate_limited
+from backend.utils.revocation import revoke_token
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
     jwt_required,
+    get_jwt,
     get_jwt_identity
 )
 from datetime import timedelta
+from sqlalchemy.exc import IntegrityError
 
 auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
@@ -16,6 +23,7 @@ auth_bp = Blueprint('auth', __name__, url_prefix='/auth')
 
 
 @auth_bp.route('/register', methods=['POST'])
+@rate_limited
 def register():
     """Register a new user."""
     data = request.get_json()
@@ -45,6 +53,7 @@ def register():
 # Login user and issue JWT
 # =====================================================
 @auth_bp.route('/login', methods=['POST'])
+@rate_limited
 def login():
     """Authenticate user and issue JWT tokens."""
     data = request.get_json()
@@ -56,10 +65,20 @@ def login():
     if not user or not user.check_password(data["password"]):
         return jsonify({"success": False, "error": "Invalid credentials"}), 401
 
+    # check_password() may have upgraded an outdated hash
+    if db.session.is_modified(user):
+        db.session.commit()
+
+    # Warm the principal cache and embed role/version claims in the tokens
+    principal = Principal(user.id, bool(user.is_admin), user.token_version)
+    get_principal_cache().put(principal)
+    claims = principal_claims(principal)
+
     # Create short-lived access token and longer refresh token
     access_token = create_access_token(identity=str(
-        user.id), expires_delta=timedelta(hours=1))
-    refresh_token = create_refresh_token(identity=str(user.id))
+        user.id), additional_claims=claims, expires_delta=timedelta(hours=1))
+    refresh_token = create_refresh_token(
+        identity=str(user.id), additional_claims=claims)
 
     return jsonify({
         "success": True,
@@ -80,11 +99,41 @@ def login():
 @auth_bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
 def refresh_token():
-    """Refresh access token using refresh token."""
+    """Rotate the refresh token: revoke it and issue a new token pair."""
     user_id = get_jwt_identity()
+    principal = current_principal()
+    if not principal:
+        return jsonify({"success": False, "error": "Token has been revoked"}), 401
+
+    # A refresh token is single-use; a concurrent reuse hits the primary key
+    try:
+        revoke_token(get_jwt())
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"success": False, "error": "Token has been revoked"}), 401
+
+    claims = principal_claims(principal)
     new_access_token = create_access_token(
-        identity=user_id, expires_delta=timedelta(hours=1))
-    return jsonify({"access_token": new_access_token}), 200
+        identity=user_id, additional_claims=claims, expires_delta=timedelta(hours=1))
+    new_refresh_token = create_refresh_token(identity=user_id, additional_claims=claims)
+    return jsonify({"access_token": new_access_token,
+                    "refresh_token": new_refresh_token}), 200
+
+
+# =====================================================
+# Logout (revoke the presented token)
+# =====================================================
+@auth_bp.route('/logout', methods=['POST'])
+@jwt_required(verify_type=False)
+def logout():
+    """Revoke the access or refresh token sent in the Authorization header."""
+    try:
+        revoke_token(get_jwt())
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+    return jsonify({"success": True, "message": "Token revoked"}), 200
 
 
 # =====================================================
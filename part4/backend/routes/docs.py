@@ -0,0 +1,21 @@
+from flask import Blueprint, Response, current_app, request
+from backend.utils.compression import negotiate_encoding
+
+docs_bp = Blueprint("docs", __name__)
+
+
+@docs_bp.route("/apispec_1.json")
+def apispec():
+    """Serve the precompiled OpenAPI spec (ETag = spec hash)."""
+    etag, body, gzipped = current_app.extensions["openapi_spec"].load()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif negotiate_encoding(request.accept_encodings, ["gzip"]):
+        response = Response(gzipped, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(body, mimetype="application/json")
+    response.set_etag(etag)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,28 @@
+import hmac
+from flask import Blueprint, Response, abort, current_app, request
+from backend.utils.auth_decorators import admin_required
+from backend.utils.metrics import get_metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+
+def render_metrics():
+    return Response(get_metrics().render(),
+                    mimetype="text/plain; version=0.0.4")
+
+
+@metrics_bp.route("/metrics")
+def metrics():
+    """
+    Expose per-route request and SQL metrics (Prometheus text format).
+
+    Admin only, like /api/admin/pool-stats. Scrapers, which cannot renew
+    a JWT, may send METRICS_TOKEN as a Bearer token instead.
+    """
+    if not current_app.config.get("METRICS_ENABLED", True):
+        abort(404)
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and hmac.compare_digest(
+            request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return render_metrics()
+    return admin_required(render_metrics)()
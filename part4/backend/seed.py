@@ -1,66 +1,220 @@
-from werkzeug.security import generate_password_hash
-from backend.models import db, Player, Quest, Skill
-from backend.app import app
-import os, sys
+"""
+Seed the database: demo accounts, plus optional synthetic data.
+
+    python -m backend.seed
+    python -m backend.seed --players 1000000 --quests 2000000 --skills 5000 \\
+        --skills-per-player 8 --skills-per-quest 1
+
+(or `flask seed` with the same options). Synthetic rows are generated
+deterministically from --seed and loaded with Core executemany inserts
+(one multi-row INSERT per batch on MySQL), one transaction per
+--batch-size entities. Synthetic players share one precomputed password
+hash (password: "player123").
+"""
+import argparse
+import os
+import random
+import sys
+import time
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
+from sqlalchemy import func  # noqa: E402
+from backend.models import db, Player, Quest, Skill  # noqa: E402
+from backend.models.player import player_skills  # noqa: E402
+from backend.models.progress import rebuild_progress  # noqa: E402
+from backend.models.quest import quest_skills  # noqa: E402
+from backend.models.version import bump_versions  # noqa: E402
+from backend.utils.bulk import insert_rows  # noqa: E402
+from backend.utils.hashing import hash_password  # noqa: E402
+from backend.utils.levels import get_level_curve  # noqa: E402
+
+SYNTHETIC_PASSWORD = "player123"
+CLASSES = ["Warrior", "Mage", "Rogue", "Cleric", "Ranger", "Paladin",
+           "Bard", "Druid", "Backend Wizard", "Frontend Knight"]
+WORDS = ["Ancient", "Function", "Dragon", "Python", "Forest", "Pointer",
+         "Castle", "Recursion", "Goblin", "Database", "Tower", "Kernel",
+         "Crystal", "Socket", "Shadow", "Compiler", "River", "Cache"]
+
+
+# ------------------------
+# Demo accounts
+# ------------------------
+def seed_demo():
+    """Create the two demo accounts on an empty database."""
+    if Player.query.count() > 0:
+        print("✅ Database already seeded, skipping demo accounts.")
+        return
+    print("🧹 Empty database detected — seeding demo accounts.")
+
+    admin = Player(name="Game Master", class_name="Admin Mage",
+                   xp=9999, is_admin=True)
+    admin.set_password("admin123")
+    user = Player(name="Thomas Roncin", class_name="Backend Wizard",
+                  xp=0, is_admin=False)
+    user.set_password("thomas123")
+
+    skill_c = Skill(name="C intermediate", level=2)
+    skill_python = Skill(name="Python intermediate", level=5)
+    skill_git = Skill(name="Git mastering", level=3)
+    user.skills.extend([skill_c, skill_python])
+    admin.skills.append(skill_git)
+
+    quest1 = Quest(
+        title="Forge the Ancient Function", xp=80,
+        summary="Recreate the printf function in C with format handling.")
+    quest1.skills.append(skill_c)
+    user.quests.append(quest1)
+    quest2 = Quest(
+        title="Tame the Python Dragon", xp=120,
+        summary="Develop an efficient Flask REST API.")
+    quest2.skills.append(skill_python)
+    admin.quests.append(quest2)
+
+    db.session.add_all(
+        [admin, user, skill_c, skill_python, skill_git, quest1, quest2])
+    db.session.commit()
+
+    print("✅ Demo accounts created!")
+    print("👑 Admin login: name='Game Master', password='admin123'")
+    print("🧙‍♂️ User login: name='Thomas Roncin', password='thomas123'")
+
+
+# ------------------------
+# Synthetic data
+# ------------------------
+class SyntheticLoader:
+    """
+    Deterministic bulk loader for capacity testing.
+
+    The database assigns the primary keys (executemany with RETURNING, or
+    one multi-row INSERT per batch on MySQL, see insert_rows), so writes
+    running next to the load cannot collide with it; association rows are
+    generated from the returned ids. Names are numbered after the current
+    maximum id. Each batch inserts the entities, their association rows
+    and their version keys in one transaction.
+    """
+
+    def __init__(self, seed=42, batch_size=5000):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.counts = {}
+
+    def _next_number(self, model):
+        return db.session.execute(
+            db.select(func.coalesce(func.max(model.id), 0))).scalar() + 1
+
+    def _pick(self, pool, mean):
+        """Sample about `mean` distinct ids (fractions are randomized)."""
+        k = int(mean) + (self.rng.random() < mean - int(mean))
+        return self.rng.sample(pool, min(k, len(pool)))
+
+    def _load(self, model, collection, count, make_row, associations=None):
+        """Insert `count` rows in batches with their (owner id, skill id) links."""
+        table = model.__table__
+        first = self._next_number(model)
+        loaded = []
+        for start in range(first, first + count, self.batch_size):
+            numbers = range(start, min(start + self.batch_size, first + count))
+            rows = [make_row(n) for n in numbers]
+            with db.engine.begin() as connection:
+                ids = insert_rows(model, rows, connection, self.batch_size)
+                if associations:
+                    assoc_table, make_links = associations
+                    links = [link for i in ids for link in make_links(i)]
+                    if links:
+                        self._insert_raw(connection, assoc_table, links)
+                        self.counts[assoc_table.name] = \
+                            self.counts.get(assoc_table.name, 0) + len(links)
+                bump_versions(connection, [collection] +
+                              [f"{collection}:{i}" for i in ids])
+            self.counts[table.name] = self.counts.get(table.name, 0) + len(rows)
+            loaded += ids
+        return loaded
+
+    @staticmethod
+    def _insert_raw(connection, table, rows):
+        """executemany straight on the DBAPI cursor for (a, b) link tuples."""
+        compiled = table.insert().compile(dialect=connection.dialect)
+        if not compiled.positional:
+            keys = [column.key for column in table.columns]
+            rows = [dict(zip(keys, row)) for row in rows]
+        connection.exec_driver_sql(compiled.string, rows)
+
+    def run(self, players=0, quests=0, skills=0, skills_per_player=3.0,
+            skills_per_quest=2.0, owned_ratio=0.5):
+        rng = self.rng
+        password_hash = hash_password(SYNTHETIC_PASSWORD)
+        curve = get_level_curve()
+
+        self._load(Skill, "skills", skills, lambda n: {
+            "name": f"{rng.choice(WORDS)} skill {n}", "level": rng.randint(1, 10)})
+        skill_ids = list(db.session.execute(db.select(Skill.id)).scalars())
+
+        def make_player(n):
+            xp = rng.randint(0, 100000)
+            return {"name": f"player-{n}", "class_name": rng.choice(CLASSES),
+                    "level": curve.level_for(xp), "xp": xp, "is_admin": False,
+                    "password_hash": password_hash, "token_version": 0}
+
+        self._load(Player, "players", players, make_player, (player_skills, lambda i: [
+            (i, s) for s in self._pick(skill_ids, skills_per_player)]))
+        player_ids = list(db.session.execute(db.select(Player.id)).scalars())
+
+        self._load(Quest, "quests", quests, lambda n: {
+            "title": f"The {rng.choice(WORDS)} {rng.choice(WORDS)} #{n}",
+            "xp": rng.randint(10, 1000),
+            "summary": " ".join(rng.choices(WORDS, k=12)),
+            "player_id": (rng.choice(player_ids)
+                          if player_ids and rng.random() < owned_ratio else None),
+        }, (quest_skills, lambda i: [
+            (i, s) for s in self._pick(skill_ids, skills_per_quest)]))
+
+        # Counter rows for every player, derived from the loaded quests
+        rebuild_progress()
+        return self.counts
+
+
+def generate(players=0, quests=0, skills=0, skills_per_player=3.0,
+             skills_per_quest=2.0, owned_ratio=0.5, seed=42, batch_size=5000):
+    """Load synthetic data and print the row counts and rows per second."""
+    start = time.perf_counter()
+    counts = SyntheticLoader(seed, batch_size).run(
+        players, quests, skills, skills_per_player, skills_per_quest, owned_ratio)
+    elapsed = time.perf_counter() - start
+
+    total = sum(counts.values())
+    for table, rows in counts.items():
+        print(f"  {table:15} {rows:>12,} rows")
+    print(f"🌱 {total:,} rows in {elapsed:.1f}s "
+          f"({total / elapsed if elapsed else 0:,.0f} rows/s)")
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--players", type=int, default=0)
+    parser.add_argument("--quests", type=int, default=0)
+    parser.add_argument("--skills", type=int, default=0)
+    parser.add_argument("--skills-per-player", type=float, default=3.0)
+    parser.add_argument("--skills-per-quest", type=float, default=2.0)
+    parser.add_argument("--owned-ratio", type=float, default=0.5,
+                        help="Share of quests assigned to a player")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--no-demo", action="store_true")
+    args = parser.parse_args(argv)
+
+    from backend.app import create_app
+
+    with create_app().app_context():
+        if not args.no_demo:
+            seed_demo()
+        if args.players or args.quests or args.skills:
+            generate(args.players, args.quests, args.skills,
+                     args.skills_per_player, args.skills_per_quest,
+                     args.owned_ratio, args.seed, args.batch_size)
+
 
-with app.app_context():
-    print("🌱 Checking database content...")
-
-    existing_players = Player.query.count()
-
-    if existing_players > 0:
-        print("✅ Database already seeded, skipping.")
-    else:
-        print("🧹 Empty database detected — seeding now.")
-
-        admin = Player(
-            name="Game Master",
-            class_name="Admin Mage",
-            level=99,
-            xp=9999,
-            is_admin=True,
-            password_hash=generate_password_hash("admin123")
-        )
-
-        user = Player(
-            name="Thomas Roncin",
-            class_name="Backend Wizard",
-            level=1,
-            xp=0,
-            is_admin=False,
-            password_hash=generate_password_hash("thomas123")
-        )
-
-        skill_c = Skill(name="C intermediate", level=2)
-        skill_python = Skill(name="Python intermediate", level=5)
-        skill_git = Skill(name="Git mastering", level=3)
-
-        user.skills.extend([skill_c, skill_python])
-        admin.skills.append(skill_git)
-
-        quest1 = Quest(
-            title="Forge the Ancient Function",
-            xp=80,
-            summary="Recreate the printf function in C with format handling."
-        )
-        quest1.skills.append(skill_c)
-        user.quests.append(quest1)
-
-        quest2 = Quest(
-            title="Tame the Python Dragon",
-            xp=120,
-            summary="Develop an efficient Flask REST API."
-        )
-        quest2.skills.append(skill_python)
-        admin.quests.append(quest2)
-
-        db.session.add_all(
-            [admin, user, skill_c, skill_python, skill_git, quest1, quest2])
-        db.session.commit()
-
-        print("✅ Database seeded successfully!")
-        print("👑 Admin login: name='Game Master', password='admin123'")
-        print("🧙‍♂️ User login: name='Thomas Roncin', password='thomas123'")
+if __name__ == "__main__":
+    main()
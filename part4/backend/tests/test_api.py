@@ -1,7 +1,34 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import threading
+import time
 import pytest
-from app import create_app
-from models import db, Player, Quest, Skill
+import yaml
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from backend.app import create_app
+from backend.asgi import create_asgi_app
+from backend.models import db, Player, Quest, Skill, PlayerProgress
+from backend.models.player import player_skills
+from backend.models.progress import rebuild_progress
+from backend.models.version import ResourceVersion
+from backend.models.quest import quest_skills
+from backend.seed import SYNTHETIC_PASSWORD, generate
+from backend.utils.assets import build_assets
+from backend.utils.engine import engine_options
+from backend.utils.events import make_broker
+from backend.utils.levels import LevelCurve, recompute_levels
+from backend.utils.openapi import SPEC_PATH, CompiledSpec
+from backend.utils.pagination import encode_cursor
+from backend.utils.schema import upgrade_schema
 from flask_jwt_extended import create_access_token
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
 
 
 @pytest.fixture()
@@ -54,6 +81,77 @@ def test_get_all_players(test_client):
     assert len(json_data["data"]) == 2
 
 
+def test_get_players_keyset_pagination(test_client):
+    """GET /api/players pages through players with an opaque cursor."""
+    app = test_client.application
+    token = get_token(app, "User")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = test_client.get("/api/players?limit=1", headers=headers)
+    first_page = res.get_json()
+    assert res.status_code == 200
+    assert len(first_page["data"]) == 1
+    assert first_page["next_cursor"]
+
+    res = test_client.get(
+        f"/api/players?limit=1&cursor={first_page['next_cursor']}",
+        headers=headers)
+    second_page = res.get_json()
+    assert second_page["data"][0]["id"] != first_page["data"][0]["id"]
+    assert second_page["next_cursor"] is None
+
+
+def test_keyset_pagination_pages_through_nulls(test_client):
+    """Rows with a NULL sort value are paged, and tampered cursors are a 400."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'User')}"}
+    with app.app_context():
+        db.session.add_all([Skill(name="A", level=2), Skill(name="B", level=None),
+                            Skill(name="C", level=None), Skill(name="D", level=1)])
+        db.session.commit()
+        expected = {skill.id for skill in Skill.query}
+
+    for sort in ("level", "-level"):
+        seen, cursor = [], ""
+        while True:
+            res = test_client.get(f"/api/skills?sort={sort}&limit=1{cursor}",
+                                  headers=headers)
+            page = res.get_json()
+            seen += [skill["id"] for skill in page["data"]]
+            if not page["next_cursor"]:
+                break
+            cursor = f"&cursor={page['next_cursor']}"
+        assert sorted(seen) == sorted(expected)
+
+    for value in ([1], {"a": 1}, "2", True):
+        cursor = encode_cursor("level", value, 1)
+        res = test_client.get(f"/api/skills?sort=level&cursor={cursor}", headers=headers)
+        assert res.status_code == 400
+    cursor = encode_cursor("name", None, 1)
+    res = test_client.get(f"/api/skills?sort=name&cursor={cursor}", headers=headers)
+    assert res.status_code == 400
+
+
+def test_get_players_sort_and_filter(test_client):
+    """GET /api/players supports indexed sort and filter parameters."""
+    app = test_client.application
+    token = get_token(app, "User")
+    headers = {"Authorization": f"Bearer {token}"}
+
+    res = test_client.get("/api/players?sort=-name", headers=headers)
+    names = [p["name"] for p in res.get_json()["data"]]
+    assert names == ["User", "Admin"]
+
+    res = test_client.get("/api/players?class_name=Master", headers=headers)
+    assert [p["name"] for p in res.get_json()["data"]] == ["Admin"]
+
+    res = test_client.get("/api/players?sort=password_hash", headers=headers)
+    assert res.status_code == 400
+
+    res = test_client.get("/api/players?cursor=garbage", headers=headers)
+    assert res.status_code == 400
+
+
 def test_update_player_self(test_client):
     """User should be able to update their own data."""
     app = test_client.application
@@ -109,6 +207,26 @@ def test_create_quest_admin_only(test_client):
     assert res_admin.get_json()["success"] is True
 
 
+def test_quest_writes_reject_non_integer_xp(test_client):
+    """A non-integer xp is a 400 and leaves the counters untouched."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+    with app.app_context():
+        db.session.add(Quest(title="Quest A", xp=50, player_id=2))
+        db.session.commit()
+
+    res = test_client.post("/api/quests", headers=headers,
+                           json={"title": "Bad", "xp": "abc"})
+    assert res.status_code == 400
+    for xp in ("abc", None, True):
+        res = test_client.put("/api/quests/1", headers=headers, json={"xp": xp})
+        assert res.status_code == 400
+        assert res.get_json()["error"] == "xp must be an integer"
+
+    with app.app_context():
+        assert db.session.get(PlayerProgress, 2).total_xp == 50
+
+
 def test_get_quests(test_client):
     """GET /api/quests should return all quests."""
     app = test_client.application
@@ -195,3 +313,842 @@ def test_get_player_progress(test_client):
     assert json_data["success"] is True
     assert json_data["data"]["total_quests_completed"] == 1
     assert json_data["data"]["total_xp_gained"] == 80
+
+
+def test_progress_counters_follow_quest_changes(test_client):
+    """Counters are updated when quests are assigned, edited or deleted."""
+    app = test_client.application
+    admin_token = get_token(app, "Admin")
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    with app.app_context():
+        player = Player.query.filter_by(name="User").first()
+        player.quests.extend([Quest(title="A", xp=10), Quest(title="B", xp=20)])
+        db.session.commit()
+        quest_id = player.quests[0].id
+
+    res = test_client.put(f"/api/quests/{quest_id}", headers=headers,
+                          json={"xp": 50})
+    assert res.status_code == 200
+    res = test_client.get("/api/progress/2", headers=headers)
+    assert res.get_json()["data"]["total_quests_completed"] == 2
+    assert res.get_json()["data"]["total_xp_gained"] == 70
+
+    res = test_client.delete(f"/api/quests/{quest_id}", headers=headers)
+    assert res.status_code == 200
+    res = test_client.get("/api/progress/2", headers=headers)
+    assert res.get_json()["data"]["total_quests_completed"] == 1
+    assert res.get_json()["data"]["total_xp_gained"] == 20
+
+    with app.app_context():
+        quest = Quest(title="Open", xp=30)
+        db.session.add(quest)
+        db.session.commit()
+        newcomer = Player(name="Newcomer", class_name="Bard", password_hash="x")
+        quest.player = newcomer
+        db.session.commit()
+        progress = db.session.get(PlayerProgress, newcomer.id)
+        assert (progress.quest_count, progress.total_xp) == (1, 30)
+
+
+def test_rebuild_progress(test_client):
+    """rebuild_progress() recomputes every counter row from the quests table."""
+    app = test_client.application
+
+    with app.app_context():
+        player = Player.query.filter_by(name="User").first()
+        player.quests.append(Quest(title="Repair", xp=40))
+        db.session.commit()
+        db.session.execute(db.delete(PlayerProgress))
+        db.session.commit()
+
+        assert rebuild_progress() == 2
+        progress = db.session.get(PlayerProgress, player.id)
+        assert (progress.quest_count, progress.total_xp) == (1, 40)
+
+
+def test_conditional_get_follows_writes(test_client):
+    """ETags stay stable across reads and change once a write commits."""
+    app = test_client.application
+    admin_token = get_token(app, "Admin")
+    headers = {"Authorization": f"Bearer {admin_token}"}
+
+    res = test_client.get("/api/skills", headers=headers)
+    etag = res.headers["ETag"]
+
+    res = test_client.get("/api/skills", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+    assert res.data == b""
+
+    test_client.post("/api/skills", headers=headers, json={"name": "Stealth"})
+
+    res = test_client.get("/api/skills", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200
+    assert res.headers["ETag"] != etag
+
+
+def test_last_modified_is_never_stale(test_client):
+    """Last-Modified is only sent once no write can share its second."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+    test_client.post("/api/skills", headers=headers, json={"name": "Stealth"})
+
+    with app.app_context():
+        version = db.session.get(ResourceVersion, "skills")
+        stamp = version.updated_at - timedelta(seconds=2)
+        version.updated_at = stamp
+        db.session.commit()
+
+    res = test_client.get("/api/skills", headers=headers)
+    since = res.headers["Last-Modified"]
+    assert parsedate_to_datetime(since).replace(tzinfo=None) >= stamp
+    res = test_client.get("/api/skills", headers={**headers, "If-Modified-Since": since})
+    assert res.status_code == 304
+
+    test_client.post("/api/skills", headers=headers, json={"name": "Haste"})
+    res = test_client.get("/api/skills", headers={**headers, "If-Modified-Since": since})
+    assert res.status_code == 200
+    with app.app_context():
+        stamp = db.session.get(ResourceVersion, "skills").updated_at
+    if "Last-Modified" in res.headers:
+        assert parsedate_to_datetime(res.headers["Last-Modified"]).replace(tzinfo=None) >= stamp
+
+
+# =====================================================
+# BULK
+# =====================================================
+
+def test_bulk_create_players_atomic(test_client):
+    """An invalid item aborts an atomic batch; nothing is written."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+
+    items = [{"name": "Bulk 1", "class_name": "Rogue", "password": "pw"},
+             {"name": "User", "class_name": "Rogue", "password": "pw"},
+             {"name": "Bulk 2", "class_name": "Rogue"}]
+    res = test_client.post("/api/players/bulk", headers=headers,
+                           json={"items": items})
+    assert res.status_code == 400
+    assert [r["index"] for r in res.get_json()["results"]] == [1, 2]
+
+    with app.app_context():
+        assert Player.query.count() == 2
+
+
+def test_bulk_create_players_partial(test_client):
+    """Partial mode writes the valid items and reports each result."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+
+    items = [{"name": "Bulk 1", "class_name": "Rogue", "password": "pw"},
+             {"name": "Bulk 1", "class_name": "Rogue", "password": "pw"},
+             {"name": "Bulk 2", "class_name": "Rogue", "password": "pw", "xp": 5}]
+    res = test_client.post("/api/players/bulk", headers=headers,
+                           json={"items": items, "mode": "partial"})
+    data = res.get_json()["data"]
+    assert res.status_code == 207
+    assert [r["status"] for r in data["results"]] == [201, 400, 201]
+
+    res = test_client.post("/auth/login", json={"name": "Bulk 2", "password": "pw"})
+    assert res.status_code == 200
+    res = test_client.get(f"/api/progress/{data['results'][2]['id']}", headers=headers)
+    assert res.get_json()["data"]["total_quests_completed"] == 0
+
+
+def test_bulk_rejects_mistyped_fields(test_client):
+    """Wrong types and nulls are per-item 400s, not 500s or 409s."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+
+    items = [{"name": "Typed", "class_name": "Rogue", "password": 123},
+             {"name": ["List"], "class_name": "Rogue", "password": "pw"},
+             {"name": None, "class_name": "Rogue", "password": "pw"},
+             {"name": "Fine", "class_name": "Rogue", "password": "pw"}]
+    res = test_client.post("/api/players/bulk", headers=headers,
+                           json={"items": items, "mode": "partial"})
+    assert res.status_code == 207
+    assert [r["status"] for r in res.get_json()["data"]["results"]] == [400, 400, 400, 201]
+
+    res = test_client.put("/api/players/bulk", headers=headers, json={
+        "items": [{"id": 2, "name": None}, {"id": 2, "class_name": "Monk"}],
+        "mode": "partial"})
+    assert res.status_code == 207
+    assert [r["status"] for r in res.get_json()["data"]["results"]] == [400, 200]
+
+
+def test_bulk_create_and_update_quests(test_client):
+    """Bulk quest updates keep the owners' progress counters in step."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+
+    res = test_client.post("/api/quests/bulk", headers=headers, json={
+        "items": [{"title": f"Quest {i}", "xp": 10} for i in range(3)]})
+    ids = [r["id"] for r in res.get_json()["data"]["results"]]
+    assert res.status_code == 201
+
+    with app.app_context():
+        db.session.get(Quest, ids[0]).player_id = 2
+        db.session.commit()
+
+    res = test_client.put("/api/quests/bulk", headers=headers, json={
+        "items": [{"id": ids[0], "xp": 100}, {"id": 999, "xp": 1}],
+        "mode": "partial"})
+    assert res.status_code == 207
+
+    res = test_client.get("/api/progress/2", headers=headers)
+    assert res.get_json()["data"]["total_xp_gained"] == 100
+
+
+# =====================================================
+# EXPORT
+# =====================================================
+
+def test_export_ndjson_and_csv(test_client):
+    """The admin export streams one record per player."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+
+    with app.app_context():
+        app.config["EXPORT_CHUNK_SIZE"] = 1
+        player = Player.query.filter_by(name="User").first()
+        player.quests.append(Quest(title="Exported", xp=5))
+        db.session.commit()
+
+    res = test_client.get("/api/export", headers=headers)
+    lines = [json.loads(line) for line in res.data.decode().splitlines()]
+    assert res.mimetype == "application/x-ndjson"
+    assert [p["name"] for p in lines] == ["Admin", "User"]
+    assert lines[1]["quests"][0]["title"] == "Exported"
+
+    res = test_client.get("/api/export?format=csv", headers=headers)
+    rows = list(csv.reader(io.StringIO(res.data.decode())))
+    assert rows[0][:2] == ["id", "name"]
+    assert len(rows) == 3
+
+    res = test_client.get("/api/export?since=2000-01-01T00:00:00Z",
+                          headers={**headers, "Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert len(gzip.decompress(res.data).splitlines()) == 2
+
+    res = test_client.get("/api/export?since=2999-01-01", headers=headers)
+    assert res.data == b""
+
+    user_headers = {"Authorization": f"Bearer {get_token(app, 'User')}"}
+    assert test_client.get("/api/export", headers=user_headers).status_code == 403
+
+
+def test_export_since_follows_quest_and_skill_writes(test_client):
+    """An incremental export picks up players whose quests or skills changed."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+
+    def exported_since(since):
+        res = test_client.get(f"/api/export?since={since}", headers=headers)
+        return [json.loads(line)["name"] for line in res.data.decode().splitlines()]
+
+    def now():
+        time.sleep(0.01)
+        stamp = datetime.now(timezone.utc).replace(tzinfo=None)
+        time.sleep(0.01)
+        return stamp.isoformat()
+
+    since = now()
+    with app.app_context():
+        db.session.add(Quest(title="Hunt", xp=50, player_id=2))
+        db.session.commit()
+    assert exported_since(since) == ["User"]
+
+    since = now()
+    test_client.put("/api/quests/1", headers=headers, json={"title": "Hunt II"})
+    assert exported_since(since) == ["User"]
+
+    since = now()
+    test_client.put("/api/quests/bulk", headers=headers,
+                    json={"items": [{"id": 1, "xp": 60}]})
+    assert exported_since(since) == ["User"]
+
+    with app.app_context():
+        admin = db.session.get(Player, 1)
+        admin.skills.append(Skill(name="Archery", level=1))
+        db.session.commit()
+    since = now()
+    test_client.put("/api/skills/1", headers=headers, json={"level": 2})
+    assert exported_since(since) == ["Admin"]
+
+    since = now()
+    test_client.delete("/api/quests/1", headers=headers)
+    assert exported_since(since) == ["User"]
+
+
+# =====================================================
+# LEADERBOARD
+# =====================================================
+
+def test_leaderboard_follows_xp_updates(test_client):
+    """The leaderboard ranks by XP and picks up later XP changes."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'User')}"}
+    admin_headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+
+    test_client.post("/api/players/bulk", headers=admin_headers, json={"items": [
+        {"name": f"Bulk {i}", "class_name": "Rogue", "password": "pw", "xp": 10 * i}
+        for i in range(1, 4)]})
+
+    res = test_client.get("/api/leaderboard?limit=2", headers=headers)
+    body = res.get_json()
+    assert [e["name"] for e in body["data"]] == ["Bulk 3", "Bulk 2"]
+    assert body["total"] == 5
+    assert body["next_offset"] == 2
+
+    res = test_client.put("/api/players/2", headers=headers, json={"xp": 25})
+    assert res.status_code == 200
+
+    res = test_client.get("/api/leaderboard/me", headers=headers)
+    me = res.get_json()["data"]
+    assert (me["rank"], me["xp"], me["total_players"]) == (2, 25, 5)
+
+    test_client.delete("/api/players/2", headers=headers)
+    res = test_client.get("/api/leaderboard", headers=admin_headers)
+    assert "User" not in [e["name"] for e in res.get_json()["data"]]
+
+
+# =====================================================
+# SEARCH
+# =====================================================
+
+def test_search_quests(test_client):
+    """Quest search ranks title matches first and follows writes."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+
+    for quest in ({"title": "Tame the Python Dragon", "xp": 120,
+                   "summary": "Develop an efficient Flask REST API."},
+                  {"title": "Forge the Ancient Function", "xp": 80,
+                   "summary": "Recreate printf in C, no Python allowed."},
+                  {"title": "Écrire un shell", "xp": 90}):
+        test_client.post("/api/quests", headers=headers, json=quest)
+
+    res = test_client.get("/api/quests/search?q=python", headers=headers)
+    titles = [q["title"] for q in res.get_json()["data"]]
+    assert titles == ["Tame the Python Dragon", "Forge the Ancient Function"]
+
+    res = test_client.get("/api/quests/search?q=ecri", headers=headers)
+    assert [q["title"] for q in res.get_json()["data"]] == ["Écrire un shell"]
+
+    res = test_client.get("/api/quests/search?q=fla&limit=1", headers=headers)
+    body = res.get_json()
+    assert body["data"][0]["xp"] == 120
+    assert body["next_offset"] is None
+
+    test_client.put("/api/quests/1", headers=headers, json={"title": "Tame the Snake"})
+    res = test_client.get("/api/quests/search?q=dragon", headers=headers)
+    assert res.get_json()["data"] == []
+
+    assert test_client.get("/api/quests/search", headers=headers).status_code == 400
+
+
+# =====================================================
+# RECOMMENDATIONS
+# =====================================================
+
+def test_recommended_quests(test_client):
+    """Open quests are ranked by the share of required skills the player has."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'User')}"}
+
+    with app.app_context():
+        c, python, git = Skill(name="C"), Skill(name="Python"), Skill(name="Git")
+        player = Player.query.filter_by(name="User").first()
+        player.skills.extend([c, python])
+        full = Quest(title="Full match", xp=10, skills=[c, python])
+        half = Quest(title="Half match", xp=10, skills=[python, git])
+        none = Quest(title="No match", xp=10, skills=[git])
+        taken = Quest(title="Taken", xp=10, skills=[c], player=player)
+        db.session.add_all([full, half, none, taken])
+        db.session.commit()
+
+    res = test_client.get("/api/players/2/recommended-quests", headers=headers)
+    data = res.get_json()["data"]
+    assert [(q["title"], q["score"]) for q in data] == [
+        ("Full match", 1.0), ("Half match", 0.5)]
+
+    # Learning a skill is picked up incrementally
+    with app.app_context():
+        player = db.session.get(Player, 2)
+        player.skills.append(Skill.query.filter_by(name="Git").first())
+        db.session.commit()
+
+    res = test_client.get("/api/players/2/recommended-quests", headers=headers)
+    titles = [q["title"] for q in res.get_json()["data"]]
+    assert titles == ["Full match", "Half match", "No match"]
+
+
+def test_openapi_spec_is_precompiled(test_client):
+    """The spec is served from the compiled cache with an ETag and gzip."""
+    with open(SPEC_PATH, encoding="utf-8") as f:
+        expected = yaml.safe_load(f)
+
+    res = test_client.get("/apispec_1.json")
+    assert res.status_code == 200
+    assert json.loads(res.data) == expected
+    etag = res.headers["ETag"]
+
+    res = test_client.get("/apispec_1.json", headers={"If-None-Match": etag})
+    assert res.status_code == 304
+
+    res = test_client.get("/apispec_1.json", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert json.loads(gzip.decompress(res.data)) == expected
+    res = test_client.get("/apispec_1.json", headers={"Accept-Encoding": "gzip;q=0"})
+    assert "Content-Encoding" not in res.headers
+
+    res = test_client.get("/apidocs/")
+    assert res.status_code == 200
+    assert b"/apispec_1.json" in res.data
+
+
+def test_openapi_cache_keeps_one_revision(tmp_path):
+    """Compiling a new spec revision removes the JSON of earlier ones."""
+    spec_path = tmp_path / "spec.yaml"
+    cache_dir = tmp_path / "openapi"
+    for title in ("v1", "v2"):
+        spec_path.write_text(f"info: {{title: {title}}}\n")
+        digest, body, _ = CompiledSpec(str(spec_path), str(cache_dir)).load()
+        assert json.loads(body) == {"info": {"title": title}}
+    assert os.listdir(cache_dir) == [f"openapi-{digest}.json"]
+
+
+def test_list_projection_matches_to_dict(test_client):
+    """Projected list rows serialize exactly like to_dict(False)."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'User')}"}
+
+    with app.app_context():
+        db.session.add(Quest(title="Été", xp=5, summary=None))
+        db.session.commit()
+
+    for path, model in (("/api/players", Player), ("/api/quests", Quest),
+                        ("/api/skills", Skill)):
+        body = test_client.get(path, headers=headers).get_json()
+        with app.app_context():
+            expected = [item.to_dict(False) for item in
+                        db.session.scalars(db.select(model).order_by(model.id))]
+        assert body == {"success": True, "data": expected, "next_cursor": None}
+
+
+def test_sparse_fieldsets_and_includes(test_client):
+    """?fields= and ?include= shape both list and detail payloads."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+    with app.app_context():
+        skill = Skill(name="Archery", level=3)
+        player = db.session.get(Player, 2)
+        player.skills.append(skill)
+        db.session.add(Quest(title="Hunt", xp=50, player_id=2, skills=[skill]))
+        db.session.commit()
+
+    res = test_client.get("/api/players?fields=name&sort=-xp&limit=1", headers=headers)
+    assert res.get_json()["data"] == [{"id": 2, "name": "User"}]
+    assert res.get_json()["next_cursor"]
+
+    res = test_client.get("/api/players?fields=name&include=skills", headers=headers)
+    assert res.get_json()["data"][1] == {
+        "id": 2, "name": "User", "skills": [{"id": 1, "name": "Archery", "level": 3}]}
+
+    res = test_client.get("/api/skills/1?include=", headers=headers)
+    assert res.get_json()["data"] == {"id": 1, "name": "Archery", "level": 3}
+    res = test_client.get("/api/skills/1", headers=headers)
+    assert res.get_json()["data"]["players"] == ["User"]
+
+    res = test_client.get("/api/quests/1?fields=title&include=player", headers=headers)
+    assert res.get_json()["data"] == {"id": 1, "title": "Hunt",
+                                      "player": {"id": 2, "name": "User"}}
+
+    res = test_client.get("/api/quests/search?q=hunt&fields=xp", headers=headers)
+    assert [set(hit) for hit in res.get_json()["data"]] == [{"id", "xp", "score"}]
+
+    for url in ("/api/players?fields=password_hash", "/api/quests/1?include=players"):
+        res = test_client.get(url, headers=headers)
+        assert res.status_code == 400
+
+
+def test_list_etag_follows_included_rows(test_client):
+    """A list page embedding related rows is revalidated when those change."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+    with app.app_context():
+        skill = Skill(name="Archery", level=3)
+        player = db.session.get(Player, 2)
+        player.skills.append(skill)
+        db.session.add(Quest(title="Hunt", xp=50, player_id=2, skills=[skill]))
+        db.session.commit()
+
+    for url in ("/api/players?fields=name&include=skills",
+                "/api/quests?include=skills"):
+        etag = test_client.get(url, headers=headers).headers["ETag"]
+        res = test_client.get(url, headers={**headers, "If-None-Match": etag})
+        assert res.status_code == 304
+
+        test_client.put("/api/skills/1", headers=headers, json={"name": f"Fencing {url}"})
+        res = test_client.get(url, headers={**headers, "If-None-Match": etag})
+        assert res.status_code == 200
+        assert f"Fencing {url}" in res.get_data(as_text=True)
+
+
+def test_engine_options_and_pool_stats(test_client):
+    """Engine options follow the driver; pool counters are admin-only."""
+    mysql = engine_options({"SQLALCHEMY_DATABASE_URI": "mysql://u:p@db/rpg",
+                            "DB_POOL_SIZE": "3", "DB_STATEMENT_TIMEOUT_MS": "500"})
+    assert mysql["pool_size"] == 3 and mysql["max_overflow"] == 20
+    assert mysql["pool_pre_ping"] is True and mysql["pool_recycle"] == 1800
+    assert mysql["connect_args"]["init_command"] == \
+        "SET SESSION max_execution_time=500"
+    assert engine_options({"SQLALCHEMY_DATABASE_URI": "sqlite://"}) == {}
+
+    app = test_client.application
+    res = test_client.get("/api/admin/pool-stats", headers={
+        "Authorization": f"Bearer {get_token(app, 'User')}"})
+    assert res.status_code == 403
+
+    res = test_client.get("/api/admin/pool-stats", headers={
+        "Authorization": f"Bearer {get_token(app, 'Admin')}"})
+    # The pool serving the request (the async one for ASGI reads)
+    stats = max(res.get_json()["data"], key=lambda entry: entry["checked_out"])
+    assert stats["driver"] == "sqlite"
+    assert stats["pool"] in ("TimedQueuePool", "TimedAsyncQueuePool")
+    assert stats["checked_out"] >= 1 and stats["waits"] >= 1
+
+
+def test_asgi_reads_await_the_async_driver(test_client):
+    """Under ASGI, GETs query on the event loop; writes stay on the pool."""
+    pytest.importorskip("aiosqlite")
+    app = test_client.application
+    adapter = create_asgi_app(app, max_threads=1)
+    assert adapter.async_engine is not None
+    token = get_token(app, "Admin")
+    threads = []
+
+    def record(conn, cursor, statement, *args):
+        threads.append((conn.engine is adapter.async_engine.sync_engine,
+                        threading.current_thread().name))
+
+    def call(method, path, receive=None):
+        messages = []
+        scope = {"type": "http", "method": method, "path": path,
+                 "query_string": b"", "headers": [
+                     (b"authorization", f"Bearer {token}".encode()),
+                     (b"content-type", b"application/json")]}
+
+        async def default_receive():
+            return {"type": "http.request", "body": b'{"name": "Lore"}'}
+
+        async def send(message):
+            messages.append(message)
+
+        asyncio.run(adapter(scope, receive or default_receive, send))
+        return messages
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        assert call("GET", "/api/skills")[0]["status"] == 200
+        assert threads and all(on_async and name == "MainThread"
+                               for on_async, name in threads)
+        threads.clear()
+        assert call("POST", "/api/skills")[0]["status"] == 201
+        assert threads and not any(on_async for on_async, _ in threads)
+
+        async def disconnected():
+            return {"type": "http.disconnect"}
+
+        threads.clear()
+        assert call("GET", "/api/skills", disconnected) == [] and threads == []
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+        asyncio.run(adapter.aclose())
+
+
+def test_metrics_endpoint(test_client, caplog):
+    """Per-route latency, status and SQL counts are exposed at /metrics."""
+    app = test_client.application
+    app.config["SLOW_REQUEST_MS"] = 0.001
+    headers = {"Authorization": f"Bearer {get_token(app, 'User')}"}
+
+    test_client.get("/api/players", headers=headers)
+    test_client.get("/api/players/999", headers=headers)
+    assert "Slow request GET /api/players" in caplog.text
+    assert "SELECT" in caplog.text
+    test_client.get("/api/players/999?jwt=secret-token&fields=name")
+    assert "GET /api/players/999?jwt=redacted&fields=name" in caplog.text
+    assert "secret-token" not in caplog.text
+
+    assert test_client.get("/metrics").status_code == 401
+    assert test_client.get("/metrics", headers=headers).status_code == 403
+    app.config["METRICS_TOKEN"] = "scrape-secret"
+    assert test_client.get("/metrics", headers={
+        "Authorization": "Bearer scrape-secret"}).status_code == 200
+
+    admin = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+    body = test_client.get("/metrics", headers=admin).get_data(as_text=True)
+    route = 'method="GET",route="/api/players"'
+    assert f'http_requests_total{{{route},status="200"}} 1' in body
+    assert ('http_requests_total{method="GET",'
+            'route="/api/players/<int:player_id>",status="404"} 1') in body
+    assert f'http_request_duration_seconds_count{{{route}}} 1' in body
+    assert f'http_request_duration_seconds_bucket{{{route},le="+Inf"}} 1' in body
+    statements = re.search(rf'db_statements_total{{{route}}} (\d+)', body)
+    assert int(statements.group(1)) >= 1
+    assert f'http_response_size_bytes_count{{{route}}} 1' in body
+
+
+def test_synthetic_generator(test_client):
+    """Generated rows come with progress counters, versions and a usable login."""
+    app = test_client.application
+    with app.app_context():
+        counts = generate(players=30, quests=60, skills=10, skills_per_player=2.5,
+                          skills_per_quest=2, seed=7, batch_size=16)
+        assert counts["players"] == 30 and counts["quests"] == 60
+        assert counts["quest_skills"] == 120
+        assert 60 <= counts["player_skills"] <= 90
+        assert PlayerProgress.query.count() == Player.query.count() == 32
+        owned = db.session.query(func.sum(PlayerProgress.quest_count)).scalar()
+        assert owned == Quest.query.filter(Quest.player_id.isnot(None)).count()
+        linked = {row.player_id for row in db.session.query(player_skills)}
+        assert linked <= {player.id for player in Player.query}
+
+        # A second load appends to the ids the database hands out
+        assert generate(players=5, seed=8)["players"] == 5
+        assert Player.query.count() == 37
+
+    res = test_client.post("/auth/login", json={
+        "name": "player-3", "password": SYNTHETIC_PASSWORD})
+    assert res.status_code == 200
+    res = test_client.get("/api/leaderboard?limit=100", headers={
+        "Authorization": f"Bearer {res.get_json()['access_token']}"})
+    assert len(res.get_json()["data"]) == 37
+
+
+def test_deletes_cascade_in_the_database(test_client):
+    """Deleting a player or skill removes dependent rows without loading them."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+
+    with app.app_context():
+        skill = Skill(name="Doomed skill")
+        player = Player.query.filter_by(name="User").first()
+        player.skills.append(skill)
+        db.session.add_all([Quest(title=f"Q{i}", xp=10, player=player,
+                                  skills=[skill]) for i in range(3)])
+        db.session.commit()
+        skill_id = skill.id
+
+    etag = test_client.get("/api/quests", headers=headers).headers["ETag"]
+    with app.app_context():
+        db.session.expunge_all()
+        statements = []
+        listener = lambda *args: statements.append(args[2])  # noqa: E731
+        event.listen(db.engine, "before_cursor_execute", listener)
+        try:
+            res = test_client.delete("/api/players/2", headers=headers)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", listener)
+        assert res.status_code == 200
+        assert not any(s.startswith("SELECT quests.id AS") for s in statements)
+
+        assert Quest.query.count() == 0
+        assert db.session.get(PlayerProgress, 2) is None
+        assert db.session.query(player_skills).count() == 0
+
+    res = test_client.get("/api/quests", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 200 and res.get_json()["data"] == []
+
+    with app.app_context():
+        db.session.add(Quest(title="Linked", xp=5, skills=[db.session.get(Skill, skill_id)]))
+        db.session.commit()
+    assert test_client.delete(f"/api/skills/{skill_id}", headers=headers).status_code == 200
+    with app.app_context():
+        assert db.session.query(quest_skills).count() == 0
+
+
+def test_upgrade_schema_is_idempotent(test_client):
+    """A database created from the models needs no schema upgrade."""
+    with test_client.application.app_context():
+        assert upgrade_schema() == []
+
+
+def test_upgrade_schema_adds_missing_columns(test_client):
+    """Columns added to the models are added to existing tables with their default."""
+    with test_client.application.app_context():
+        with db.engine.begin() as connection:
+            connection.exec_driver_sql("ALTER TABLE players DROP COLUMN token_version")
+        assert upgrade_schema() == ["add column players.token_version"]
+        assert upgrade_schema() == []
+        assert {p.token_version for p in Player.query} == {0}
+
+
+def test_level_follows_xp_and_curve(test_client):
+    """Level is derived from xp on writes and recomputed after a curve change."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+    curve = LevelCurve(100, 1.5, 99)
+    assert [curve.level_for(xp) for xp in (0, 99, 100, 282, 283)] == [1, 1, 2, 2, 3]
+    assert list(curve.levels_for([0, 100, 10 ** 9])) == [1, 2, 99]
+    assert [curve.level_for(xp) for xp in (None, "450", "abc", [1])] == [1, 3, 1, 1]
+
+    for bad in ("450", True, None):
+        res = test_client.put("/api/players/2", headers=headers, json={"xp": bad})
+        assert res.status_code == 400
+    res = test_client.put("/api/players/2", headers=headers,
+                          json={"xp": 450, "level": 50})
+    assert res.get_json()["data"]["player"]["level"] == 3
+    # level is ignored, so it is not validated either
+    res = test_client.put("/api/players/2", headers=headers,
+                          json={"xp": 450, "level": "x"})
+    assert res.status_code == 200
+    res = test_client.put("/api/players/bulk", headers=headers,
+                          json={"items": [{"id": 1, "xp": 10000}]})
+    assert res.status_code == 200
+
+    with app.app_context():
+        assert db.session.get(Player, 1).level == curve.level_for(10000)
+        assert recompute_levels(curve, chunk_size=1) == (2, 0)
+        assert recompute_levels(LevelCurve(10, 1.0, 99), chunk_size=1) == (2, 2)
+        db.session.expire_all()
+        assert [p.level for p in Player.query.order_by(Player.id)] == [99, 46]
+
+
+def test_compression_and_fingerprinted_assets(test_client, tmp_path):
+    """JSON is gzipped above the threshold; built assets are immutable."""
+    app = test_client.application
+    headers = {"Authorization": f"Bearer {get_token(app, 'Admin')}",
+               "Accept-Encoding": "gzip"}
+
+    app.config["COMPRESS_MIN_SIZE"] = 10
+    res = test_client.get("/api/players", headers=headers)
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in res.headers["Vary"]
+    assert len(json.loads(gzip.decompress(res.data))["data"]) == 2
+    etag = res.headers["ETag"]
+    assert etag.startswith('W/"')
+    res = test_client.get("/api/players", headers={**headers, "If-None-Match": etag})
+    assert res.status_code == 304
+
+    app.config["COMPRESS_MIN_SIZE"] = 10 ** 6
+    assert "Content-Encoding" not in test_client.get("/api/players", headers=headers).headers
+
+    css = b"body { color: #b8860b; }\n" * 50
+    (tmp_path / "css").mkdir()
+    (tmp_path / "css" / "style.css").write_bytes(css)
+    (tmp_path / "page.html").write_text('<link rel="stylesheet" href="css/style.css">')
+    manifest = build_assets(str(tmp_path))
+    assert re.fullmatch(r"css/style\.[0-9a-f]{12}\.css", manifest["css/style.css"])
+    page = (tmp_path / "dist" / "page.html").read_text()
+    assert f'href="{manifest["css/style.css"]}"' in page
+
+    app.static_folder = str(tmp_path)
+    html = test_client.get("/").get_data(as_text=True)
+    url = f"/assets/{manifest['css/style.css']}"
+    assert f'href="{url}"' in html
+
+    res = test_client.get(url, headers={"Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert res.mimetype == "text/css"
+    assert gzip.decompress(res.data) == css
+    assert "immutable" in res.headers["Cache-Control"]
+    assert "max-age=31536000" in res.headers["Cache-Control"]
+    assert test_client.get(url).data == css
+
+
+def sse_events(res):
+    """Parse a text/event-stream body into (event, data) pairs."""
+    events = []
+    for frame in res.get_data(as_text=True).split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in frame.splitlines()
+                      if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_progress_stream(test_client, tmp_path):
+    """Writes reach the player's stream; Last-Event-ID replays them."""
+    app = test_client.application
+    app.config.update(SSE_MAX_DURATION=0.5, SSE_HEARTBEAT=0.1)
+    admin = {"Authorization": f"Bearer {get_token(app, 'Admin')}"}
+    user = {"Authorization": f"Bearer {get_token(app, 'User')}"}
+
+    assert test_client.get("/api/stream/progress?player_id=1", headers=user).status_code == 403
+    assert test_client.get("/api/stream/progress?player_id=9", headers=admin).status_code == 404
+
+    test_client.put("/api/players/2", headers=user, json={"xp": 450})
+    test_client.put("/api/players/bulk", headers=admin,
+                    json={"items": [{"id": 2, "class_name": "Rogue"}]})
+    test_client.put("/api/players/bulk", headers=admin,
+                    json={"items": [{"id": 2, "level": 9}]})
+    test_client.put("/api/players/1", headers=admin, json={"xp": 10})
+    skill_id = test_client.post("/api/skills", headers=admin,
+                                json={"name": "Stealth"}).get_json()["data"]["id"]
+    test_client.put("/api/skills/1", headers=admin, json={"level": 2})
+    with app.app_context():
+        recompute_levels(LevelCurve(10, 1.0, 99))
+
+    res = test_client.get("/api/stream/progress",
+                          headers={**user, "Last-Event-ID": "0"})
+    assert res.mimetype == "text/event-stream"
+    assert res.headers["Cache-Control"] == "no-cache"
+    assert res.get_data(as_text=True).startswith("retry: 100\n")
+    assert ": keepalive" in res.get_data(as_text=True)
+    events = sse_events(res)
+    assert [kind for kind, _ in events] == ["player", "player", "skill", "skill", "player"]
+    assert events[0][1]["level"] == 3
+    assert events[1][1] == {"id": 2, "name": "User", "class_name": "Rogue",
+                            "level": 3, "xp": 450}
+    assert events[2][1] == {"id": skill_id, "name": "Stealth", "level": 1}
+    assert events[3][1]["id"] == 1 and events[3][1]["level"] == 2
+    assert events[4][1] == {**events[1][1], "level": 46}
+
+    res = test_client.get("/api/stream/progress",
+                          headers={**user, "Last-Event-ID": "999"})
+    assert sse_events(res) == [("resync", {})]
+
+    # Another worker publishing through the shared SQLite file
+    url = f"sqlite:///{tmp_path / 'events.db'}"
+    broker = app.extensions["event_broker"] = make_broker(url, poll_interval=0.02)
+
+    def publish_from_other_worker():
+        while not broker.subscriber_count():
+            time.sleep(0.01)
+        make_broker(url).publish("player:2", "player", {"id": 2, "xp": 500})
+
+    app.config["SSE_MAX_DURATION"] = 1
+    threading.Thread(target=publish_from_other_worker).start()
+    res = test_client.get("/api/stream/progress", headers=user)
+    assert sse_events(res) == [("player", {"id": 2, "xp": 500})]
+    assert broker.subscriber_count() == 0
+
+
+def test_progress_stream_accepts_stream_token(test_client):
+    """EventSource cannot send headers: a short-lived stream token goes in ?jwt=."""
+    app = test_client.application
+    app.config.update(SSE_MAX_DURATION=0.2, SSE_HEARTBEAT=0.1)
+    access = get_token(app, "User")
+    headers = {"Authorization": f"Bearer {access}"}
+
+    res = test_client.post("/api/stream/token", headers=headers)
+    assert res.status_code == 201
+    assert res.get_json()["data"]["expires_in"] == 60
+    token = res.get_json()["data"]["token"]
+
+    res = test_client.get(f"/api/stream/progress?jwt={token}",
+                          headers={"Last-Event-ID": "0"})
+    assert res.status_code == 200
+    assert res.mimetype == "text/event-stream"
+    assert test_client.get("/api/stream/progress").status_code == 401
+    assert test_client.get(
+        f"/api/stream/progress?jwt={token}&player_id=1").status_code == 403
+    # The general access token stays out of URLs
+    assert test_client.get(f"/api/stream/progress?jwt={access}").status_code == 401
+    # The stream token opens nothing else, even as a header
+    stream_headers = {"Authorization": f"Bearer {token}"}
+    assert test_client.get("/api/players", headers=stream_headers).status_code == 401
+    assert test_client.post("/api/stream/token", headers=stream_headers).status_code == 401
+    assert test_client.get(f"/api/players?jwt={access}").status_code == 401
@@ -1,7 +1,13 @@
 import pytest
-from app import create_app
-from models import db, Player
-from flask_jwt_extended import create_access_token
+from datetime import datetime
+from backend.app import create_app
+from backend.models import db, Player, RevokedToken
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
+from werkzeug.security import generate_password_hash
+from backend.utils.hashing import HashingBusyError, get_hashing_pool, hash_passwords
+from backend.utils.ratelimit import SQLiteBucketStore, parse_limit
+from backend.utils.revocation import BloomFilter, RevocationFilter, get_revocation_filter
 
 
 @pytest.fixture()
@@ -52,3 +58,201 @@ def test_me_endpoint(test_client):
     assert res.status_code == 200
     assert json_data["success"] is True
     assert json_data["user"]["name"] == "UserX"
+
+
+def test_login_tokens_carry_role_claims(test_client):
+    """Login embeds role and version claims and warms the principal cache."""
+    app = test_client.application
+    with app.app_context():
+        admin = Player(name="Boss", class_name="Mage", is_admin=True)
+        admin.set_password("boss")
+        db.session.add(admin)
+        db.session.commit()
+
+    res = test_client.post("/auth/login", json={"name": "Boss", "password": "boss"})
+    tokens = res.get_json()
+    with app.app_context():
+        claims = decode_token(tokens["access_token"])
+    assert claims["is_admin"] is True
+    assert claims["ver"] == 0
+
+    # The admin check is served from the principal cache
+    with app.app_context():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        res = test_client.post(
+            "/api/skills", json={"name": "Blink"},
+            headers={"Authorization": f"Bearer {tokens['access_token']}"})
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert res.status_code == 201
+    assert not any("FROM players" in s for s in statements)
+
+
+def test_password_change_revokes_tokens(test_client):
+    """Changing a password bumps token_version and rejects older tokens."""
+    app = test_client.application
+    test_client.post("/auth/register", json={"name": "Victim", "password": "old"})
+    res = test_client.post("/auth/login", json={"name": "Victim", "password": "old"})
+    refresh_token = res.get_json()["refresh_token"]
+
+    with app.app_context():
+        user = Player.query.filter_by(name="Victim").first()
+        user.set_password("new")
+        db.session.commit()
+        assert user.token_version == 1
+
+    res = test_client.post(
+        "/auth/refresh", headers={"Authorization": f"Bearer {refresh_token}"})
+    assert res.status_code == 401
+
+
+def test_login_rehashes_outdated_password(test_client):
+    """A hash made with outdated parameters is upgraded on successful login."""
+    app = test_client.application
+    with app.app_context():
+        user = Player(name="Legacy", class_name="Monk",
+                      password_hash=generate_password_hash("pw", "pbkdf2:sha256:1000"))
+        db.session.add(user)
+        db.session.commit()
+
+    res = test_client.post("/auth/login", json={"name": "Legacy", "password": "pw"})
+    assert res.status_code == 200
+
+    with app.app_context():
+        user = Player.query.filter_by(name="Legacy").first()
+        assert user.password_hash.startswith("scrypt:")
+        assert user.token_version == 0
+
+
+def test_hashing_pool_saturated_returns_503(test_client):
+    """Logins beyond the hashing concurrency cap fail fast with Retry-After."""
+    app = test_client.application
+    app.config.update({"PASSWORD_HASH_WORKERS": 0,
+                       "PASSWORD_HASH_MAX_PENDING": 1})
+    with app.app_context():
+        user = Player(name="Busy", class_name="Monk")
+        user.set_password("pw")
+        db.session.add(user)
+        db.session.commit()
+
+        pool = get_hashing_pool()
+        pool._slots.acquire()
+        try:
+            res = test_client.post(
+                "/auth/login", json={"name": "Busy", "password": "pw"})
+        finally:
+            pool._slots.release()
+
+    assert res.status_code == 503
+    assert res.headers["Retry-After"] == "1"
+
+
+def test_hashing_pool_map_takes_a_slot_per_password(test_client):
+    """Bulk hashing counts every password against the cap, chunk by chunk."""
+    app = test_client.application
+    app.config.update({"PASSWORD_HASH_WORKERS": 0,
+                       "PASSWORD_HASH_MAX_PENDING": 2})
+    with app.app_context():
+        pool = get_hashing_pool()
+        assert len(hash_passwords(["a", "b", "c"])) == 3
+
+        pool._slots.acquire()
+        try:
+            with pytest.raises(HashingBusyError):
+                hash_passwords(["a", "b"])
+            assert pool._slots.acquire(blocking=False)
+            pool._slots.release()
+        finally:
+            pool._slots.release()
+
+
+def test_login_rate_limited_before_db(test_client):
+    """Attempts past the per-account budget get a 429 without any SQL."""
+    app = test_client.application
+    app.config.update({"RATELIMIT_AUTH_PER_ACCOUNT": "2/minute"})
+    for _ in range(2):
+        res = test_client.post("/auth/login", json={"name": "Target", "password": "x"})
+        assert res.status_code == 401
+
+    with app.app_context():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        res = test_client.post("/auth/login", json={"name": " target ", "password": "x"})
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert res.status_code == 429
+    assert int(res.headers["Retry-After"]) >= 1
+    assert statements == []
+
+    # Other accounts keep their own budget
+    res = test_client.post("/auth/register", json={"name": "Other", "password": "pw"})
+    assert res.status_code == 201
+
+
+def test_sqlite_bucket_store_is_shared(tmp_path):
+    """Two stores on the same file (two workers) draw from the same bucket."""
+    limit = parse_limit("3/hour")
+    first = SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    second = SQLiteBucketStore(str(tmp_path / "buckets.db"))
+    assert [first.take("k", limit), second.take("k", limit), first.take("k", limit)] == [0, 0, 0]
+    assert second.take("k", limit) > 0
+    assert first.take("other", limit) == 0
+
+
+def test_refresh_rotates_and_rejects_reuse(test_client):
+    """Each refresh token works once; logout revokes the session."""
+    app = test_client.application
+    test_client.post("/auth/register", json={"name": "Rotor", "password": "pw"})
+    first = test_client.post(
+        "/auth/login", json={"name": "Rotor", "password": "pw"}).get_json()["refresh_token"]
+
+    res = test_client.post("/auth/refresh", headers={"Authorization": f"Bearer {first}"})
+    assert res.status_code == 200
+    second = res.get_json()["refresh_token"]
+    assert second != first
+
+    res = test_client.post("/auth/refresh", headers={"Authorization": f"Bearer {first}"})
+    assert res.status_code == 401
+
+    # Unrevoked tokens are answered by the in-process filter, without SQL
+    with app.app_context():
+        statements = []
+        listener = lambda *args: statements.append(args[2])
+        event.listen(db.engine, "before_cursor_execute", listener)
+        assert get_revocation_filter().is_revoked("not-a-revoked-jti") is False
+        event.remove(db.engine, "before_cursor_execute", listener)
+    assert statements == []
+
+    headers = {"Authorization": f"Bearer {second}"}
+    assert test_client.post("/auth/logout", headers=headers).status_code == 200
+    assert test_client.post("/auth/refresh", headers=headers).status_code == 401
+
+
+def test_revocations_from_other_workers_are_synced(test_client):
+    """A JTI revoked by another worker is picked up on the next sync."""
+    with test_client.application.app_context():
+        worker_a = RevocationFilter(sync_interval=0)
+        worker_b = RevocationFilter(sync_interval=0)
+        assert worker_a.is_revoked("jti-1") is False
+
+        worker_b.revoke("jti-1", datetime(2999, 1, 1))
+        worker_b.revoke("jti-old", datetime(2000, 1, 1))
+        db.session.commit()
+        assert worker_a.is_revoked("jti-1") is True
+
+        # Expired rows are pruned by the next revocation
+        worker_b._next_prune = 0
+        worker_b.revoke("jti-2", datetime(2999, 1, 1))
+        db.session.commit()
+        assert db.session.get(RevokedToken, "jti-old") is None
+        assert db.session.get(RevokedToken, "jti-1") is not None
+
+
+def test_bloom_filter():
+    """No false negatives, and false positives near the configured rate."""
+    bloom = BloomFilter(1000, 0.01)
+    for i in range(1000):
+        bloom.add(f"in-{i}")
+    assert all(f"in-{i}" in bloom for i in range(1000))
+    assert sum(f"out-{i}" in bloom for i in range(10000)) < 300
@@ -0,0 +1,123 @@
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from backend.app import create_app
+from backend.models import db, Player, Quest, Skill
+from backend.utils.revocation import get_revocation_filter
+from flask_jwt_extended import create_access_token
+
+
+@pytest.fixture()
+def test_client():
+    """Set up a Flask test client with a player owning many quests and skills."""
+    app = create_app()
+    app.config.update({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:",
+        "JWT_SECRET_KEY": "test_secret",
+    })
+
+    with app.app_context():
+        db.create_all()
+
+        player = Player(name="Hero", class_name="Paladin", is_admin=True)
+        player.set_password("heropass")
+        others = [Player(name=f"Sidekick {i}", class_name="Bard",
+                         password_hash="x") for i in range(5)]
+        skills = [Skill(name=f"Skill {i}", level=i) for i in range(10)]
+        quests = [Quest(title=f"Quest {i}", xp=10 * i) for i in range(10)]
+
+        for quest in quests:
+            quest.skills.extend(skills)
+        player.skills.extend(skills)
+        player.quests.extend(quests)
+        for other in others:
+            other.skills.extend(skills)
+
+        db.session.add_all([player, *others, *skills, *quests])
+        db.session.commit()
+        # Counts are for a warm worker: the JWT revocation filter is loaded
+        get_revocation_filter(app).sync()
+
+        yield app.test_client()
+
+        db.session.remove()
+        db.drop_all()
+
+
+@contextmanager
+def count_queries():
+    """Count SQL statements sent to the database inside the block."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    # Start from an empty identity map so nothing is served from memory
+    db.session.expunge_all()
+    # Every engine: ASGI reads go through the async-driver one
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(Engine, "before_cursor_execute", before_cursor_execute)
+
+
+def auth_headers(app):
+    with app.app_context():
+        player = Player.query.filter_by(name="Hero").first()
+        token = create_access_token(identity=str(player.id))
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("/api/players/1", 4),   # versions + player + skills + quests
+    ("/api/quests/1", 3),    # versions + quest joined with player + skills
+    ("/api/skills/1", 4),    # versions + skill + players + quests
+    ("/api/players", 2),     # versions + page
+    ("/api/quests", 2),
+    ("/api/skills", 2),
+    # ?include= and ?fields= only load what is asked for
+    ("/api/skills/1?include=", 2),
+    ("/api/players/1?include=skills&fields=name", 3),
+    ("/api/quests/1?include=player", 2),
+    ("/api/players?include=skills", 3),
+    ("/api/quests?fields=title", 2),
+])
+def test_read_endpoints_query_count(test_client, url, expected):
+    """Read endpoints issue a fixed number of statements, whatever the data size."""
+    headers = auth_headers(test_client.application)
+
+    with count_queries() as statements:
+        res = test_client.get(url, headers=headers)
+
+    assert res.status_code == 200
+    assert len(statements) == expected, statements
+
+
+def test_update_skill_query_count(test_client):
+    """Updating a skill reloads its detail graph without lazy loads."""
+    headers = auth_headers(test_client.application)
+
+    with count_queries() as statements:
+        res = test_client.put("/api/skills/1", headers=headers,
+                              json={"level": 7})
+
+    assert res.status_code == 200
+    assert len(res.get_json()["data"]["skill"]["players"]) == 6
+    # admin check + load + update + version bump + reload (skill, players, quests)
+    assert len(statements) == 7, statements
+
+
+def test_not_modified_skips_serialization(test_client):
+    """A matching If-None-Match is answered with a single version read."""
+    headers = auth_headers(test_client.application)
+    etag = test_client.get("/api/players/1", headers=headers).headers["ETag"]
+
+    with count_queries() as statements:
+        res = test_client.get(
+            "/api/players/1", headers={**headers, "If-None-Match": etag})
+
+    assert res.status_code == 304
+    assert len(statements) == 1
@@ -0,0 +1,117 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+from flask import current_app, url_for
+from backend.utils.compression import brotli
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static")
+FRONTEND_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "frontend")
+DIST = "dist"
+MANIFEST = "manifest.json"
+FINGERPRINTED = (".css", ".js", ".svg", ".png", ".jpg", ".gif", ".webp",
+                 ".ico", ".woff", ".woff2")
+PRECOMPRESSED = (".css", ".js", ".svg", ".html", ".json", ".txt")
+# href="css/style.css" / src="js/main.js" references in HTML pages
+REFERENCE = re.compile(r'''((?:href|src)=["'])([^"'?#:]+)(["'])''')
+
+
+def _fingerprint(path, body):
+    root, ext = os.path.splitext(path)
+    return f"{root}.{hashlib.sha256(body).hexdigest()[:12]}{ext}"
+
+
+def _write(path, body):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(body)
+
+
+def _precompress(path, body):
+    """Write .gz (and .br with the brotli package) next to an asset."""
+    _write(path + ".gz", gzip.compress(body, compresslevel=9, mtime=0))
+    if brotli:
+        _write(path + ".br", brotli.compress(body, quality=11))
+
+
+def build_assets(source, output=None):
+    """
+    Copy the assets of `source` to `output` (source/dist by default)
+    under content-hash names, with .gz/.br siblings, and write a
+    manifest mapping each original path to its fingerprinted one.
+
+    HTML pages keep their names and get their href/src references
+    rewritten to the fingerprinted files. Returns the manifest.
+    """
+    output = output or os.path.join(source, DIST)
+    if os.path.isdir(output):
+        shutil.rmtree(output)
+
+    files, pages = {}, []
+    for folder, dirs, names in os.walk(source):
+        dirs[:] = [d for d in dirs if os.path.join(folder, d) != output]
+        for name in sorted(names):
+            path = os.path.relpath(os.path.join(folder, name), source).replace(os.sep, "/")
+            if name.endswith(".html"):
+                pages.append(path)
+            elif name.endswith(FINGERPRINTED):
+                with open(os.path.join(source, path), "rb") as f:
+                    files[path] = f.read()
+
+    manifest = {}
+    for path, body in sorted(files.items()):
+        target = _fingerprint(path, body)
+        _write(os.path.join(output, target), body)
+        if path.endswith(PRECOMPRESSED):
+            _precompress(os.path.join(output, target), body)
+        manifest[path] = target
+
+    for path in pages:
+        with open(os.path.join(source, path), encoding="utf-8") as f:
+            html = f.read()
+        base = os.path.dirname(path)
+
+        def rewrite(match):
+            ref = os.path.normpath(os.path.join(base, match.group(2))).replace(os.sep, "/")
+            if ref not in manifest:
+                return match.group(0)
+            target = os.path.relpath(manifest[ref], base or ".").replace(os.sep, "/")
+            return f"{match.group(1)}{target}{match.group(3)}"
+
+        body = REFERENCE.sub(rewrite, html).encode()
+        _write(os.path.join(output, path), body)
+        _precompress(os.path.join(output, path), body)
+
+    _write(os.path.join(output, MANIFEST),
+           json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def get_asset_manifest(app=None):
+    """Return the manifest of the built static assets ({} when not built)."""
+    app = app or current_app
+    manifest = app.extensions.get("asset_manifest")
+    if manifest is None:
+        try:
+            with open(os.path.join(app.static_folder, DIST, MANIFEST), encoding="utf-8") as f:
+                manifest = json.load(f)
+        except OSError:
+            manifest = {}
+        if not app.debug:
+            app.extensions["asset_manifest"] = manifest
+    return manifest
+
+
+def asset_url(path):
+    """URL of a static asset: fingerprinted once built, plain /static otherwise."""
+    target = get_asset_manifest().get(path)
+    if target is None:
+        return url_for("static", filename=path)
+    return url_for("assets.asset", filename=target)
+
+
+def init_assets(app):
+    app.jinja_env.globals["asset_url"] = asset_url
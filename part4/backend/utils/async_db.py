@@ -0,0 +1,146 @@
+"""
+Async database driver for requests served on the ASGI event loop.
+
+backend/asgi.py runs read requests (GET/HEAD) inside SQLAlchemy's
+greenlet bridge, the mechanism AsyncSession itself is built on: the
+routes keep using the regular db.session, but the session is bound to
+an engine with an async driver (aiosqlite, asyncpg, aiomysql), so every
+query awaits on the event loop instead of blocking a thread.
+"""
+import asyncio
+import threading
+from sqlalchemy.engine import make_url
+from sqlalchemy.util.concurrency import await_only, greenlet_spawn, in_greenlet
+from backend.models import async_bind, db
+from backend.utils.engine import TimedAsyncQueuePool, _is_memory_sqlite, register_engine
+
+try:
+    from greenlet import getcurrent
+except ImportError:  # optional, see requirements.txt
+    getcurrent = threading.current_thread
+
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+
+def async_database_url(url):
+    """
+    The async-driver flavour of a database URL, or None when there is
+    none (in-memory SQLite is a different database in every engine).
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        return None
+    if backend == "sqlite" and _is_memory_sqlite(url):
+        return None
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def _async_options(backend, options):
+    """Translate the sync engine options (see engine_options) for the async driver."""
+    options = {key: value for key, value in options.items() if key != "poolclass"}
+    if "pool_size" in options:
+        options["poolclass"] = TimedAsyncQueuePool
+    connect_args = options.pop("connect_args", {})
+    if backend == "postgresql":
+        # asyncpg takes a timeout and server settings, not libpq options
+        translated = {}
+        if "connect_timeout" in connect_args:
+            translated["timeout"] = connect_args["connect_timeout"]
+        if "options" in connect_args:
+            translated["server_settings"] = {
+                "statement_timeout": connect_args["options"].split("=", 1)[1]}
+        connect_args = translated
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def get_async_engine(app):
+    """
+    Return the app's async-driver engine, or None when ASGI_ASYNC_DB is
+    off, the database has no async flavour or its driver is not installed.
+    """
+    engine = app.extensions.get("async_engine")
+    if engine is None:
+        engine = False
+        url = app.config.get("ASYNC_DATABASE_URL")
+        if not url:
+            with app.app_context():
+                url = db.engine.url
+        url = async_database_url(url)
+        if app.config.get("ASGI_ASYNC_DB", True) and url is not None:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            try:
+                engine = create_async_engine(url, **_async_options(
+                    url.get_backend_name(), app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {})))
+            except ImportError:
+                app.logger.warning("No async driver for %s, ASGI reads use threads",
+                                   url.get_backend_name())
+            else:
+                register_engine(app, engine.sync_engine)
+        app.extensions["async_engine"] = engine
+    return engine or None
+
+
+def _bound(engine, fn, *args):
+    async_bind.set(engine.sync_engine)
+    return fn(*args)
+
+
+def run_bound(engine, fn, *args):
+    """
+    Coroutine running the sync `fn` on the event loop with db.session
+    bound to the async `engine`; its queries await instead of blocking.
+    """
+    return greenlet_spawn(_bound, engine, fn, *args)
+
+
+def wait_for(awaitable):
+    """Await from sync code running under run_bound()."""
+    return await_only(awaitable)
+
+
+class IOLock:
+    """
+    Re-entrant lock that may be held across queries.
+
+    Requests running under run_bound() share the event loop thread, so
+    they cannot block on a thread lock: they poll for it and yield to
+    the loop in between. Thread callers block as with an RLock.
+    """
+
+    def __init__(self, poll_interval=0.001):
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._owner = None
+        self._depth = 0
+
+    def acquire(self):
+        me = getcurrent()
+        if self._owner is me:
+            self._depth += 1
+            return True
+        if in_greenlet():
+            while not self._lock.acquire(blocking=False):
+                await_only(asyncio.sleep(self.poll_interval))
+        else:
+            self._lock.acquire()
+        self._owner, self._depth = me, 1
+        return True
+
+    def release(self):
+        self._depth -= 1
+        if not self._depth:
+            self._owner = None
+            self._lock.release()
+
+    def __enter__(self):
+        return self.acquire()
+
+    def __exit__(self, *exc_info):
+        self.release()
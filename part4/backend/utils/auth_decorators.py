@@ -1,15 +1,51 @@
 from functools import wraps
-from flask import jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from backend.models import db, Player
+from flask import jsonify, request
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
+from backend.utils.principals import get_principal
+
+# Scoped tokens and the only endpoint each one is accepted on
+STREAM_SCOPE = "stream"
+SCOPED_ENDPOINTS = {STREAM_SCOPE: "api.stream_progress"}
+
+
+def current_principal():
+    """
+    Return the Principal behind the verified JWT, or None when the
+    player no longer exists or the token predates a role or password
+    change (its `ver` claim no longer matches).
+    """
+    principal = get_principal(get_jwt_identity())
+    if principal is None:
+        return None
+    version = get_jwt().get("ver")
+    if version is not None and version != principal.token_version:
+        return None
+    return principal
 
 
 def admin_required(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
         verify_jwt_in_request()
-        user = db.session.get(Player, get_jwt_identity())
-        if not user or not user.is_admin:
+        # A token issued to a non-admin is rejected without any lookup
+        if get_jwt().get("is_admin") is False:
+            return jsonify({"success": False, "error": "Admin privileges required"}), 403
+        principal = current_principal()
+        if not principal or not principal.is_admin:
             return jsonify({"success": False, "error": "Admin privileges required"}), 403
         return fn(*args, **kwargs)
     return wrapper
+
+
+def init_token_scopes(jwt):
+    """Reject a scoped token (see SCOPED_ENDPOINTS) outside its endpoint."""
+
+    @jwt.token_verification_loader
+    def token_in_scope(jwt_header, jwt_payload):
+        scope = jwt_payload.get("scope")
+        return scope is None or request.endpoint == SCOPED_ENDPOINTS.get(scope)
+
+    @jwt.token_verification_failed_loader
+    def token_out_of_scope(jwt_header, jwt_payload):
+        return jsonify({"success": False,
+                        "error": "Token not valid for this endpoint"}), 401
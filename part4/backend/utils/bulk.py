@@ -0,0 +1,152 @@
+from backend.models import db
+from backend.models.version import bump_versions
+
+MODES = ("atomic", "partial")
+
+
+class BulkRequestError(ValueError):
+    """Raised when a bulk request envelope is invalid."""
+
+
+def parse_bulk_request(data, max_items):
+    """Return (items, mode) from a {"items": [...], "mode": ...} body."""
+    if not isinstance(data, dict) or not isinstance(data.get("items"), list):
+        raise BulkRequestError("Body must be an object with an 'items' array")
+
+    items = data["items"]
+    if not items:
+        raise BulkRequestError("No items provided")
+    if len(items) > max_items:
+        raise BulkRequestError(f"Too many items (max {max_items})")
+
+    mode = data.get("mode", "atomic")
+    if mode not in MODES:
+        raise BulkRequestError("mode must be 'atomic' or 'partial'")
+    return items, mode
+
+
+def check_item(item, required=(), int_fields=(), str_fields=(), allowed=()):
+    """Return an error message for an invalid item, or None."""
+    if not isinstance(item, dict):
+        return "Item must be an object"
+
+    missing = [field for field in required if item.get(field) is None]
+    if missing:
+        return f"Missing required fields: {', '.join(missing)}"
+
+    unknown = (set(item) - set(required) - set(int_fields)
+               - set(str_fields) - set(allowed))
+    if unknown:
+        return f"Unknown fields: {', '.join(sorted(unknown))}"
+
+    for field in int_fields:
+        value = item.get(field)
+        if field in item and (not isinstance(value, int) or isinstance(value, bool)):
+            return f"{field} must be an integer"
+    for field in str_fields:
+        if field in item and not isinstance(item[field], str):
+            return f"{field} must be a string"
+    return None
+
+
+def insert_rows(model, rows, connection=None, chunk_size=1000):
+    """
+    Insert rows with one executemany and return their ids in order.
+
+    MySQL has no executemany RETURNING: rows go out as multi-row INSERTs
+    of up to `chunk_size` rows, see insert_blocks(). Other backends
+    without it fall back to one INSERT per row. Everything runs in the
+    caller's transaction (the session's unless a `connection` is given).
+    """
+    table = model.__table__
+    connection = connection or db.session.connection()
+    if connection.dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = connection.execute(
+            table.insert().returning(table.c.id, sort_by_parameter_order=True),
+            rows)
+        return list(result.scalars())
+    if connection.dialect.name == "mysql":
+        return insert_blocks(connection, table, rows, chunk_size)
+    return [connection.execute(table.insert(), row).inserted_primary_key[0]
+            for row in rows]
+
+
+def insert_blocks(connection, table, rows, chunk_size):
+    """
+    One multi-row INSERT per chunk, ids rebuilt from LAST_INSERT_ID().
+
+    InnoDB gives a single multi-row INSERT (a "simple insert", row count
+    known up front) a consecutive run of auto-increment values in every
+    innodb_autoinc_lock_mode, even with concurrent writers. LAST_INSERT_ID()
+    is the first of them and @@auto_increment_increment the step.
+    """
+    step = connection.exec_driver_sql(
+        "SELECT @@auto_increment_increment").scalar()
+    ids = []
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        first = connection.execute(table.insert().values(chunk)).lastrowid
+        ids.extend(range(first, first + step * len(chunk), step))
+    return ids
+
+
+def update_rows(model, rows):
+    """Apply partial updates keyed by id, one executemany per column set."""
+    table = model.__table__
+    connection = db.session.connection()
+
+    groups = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    for columns, group in groups.items():
+        values = {c: db.bindparam(f"new_{c}") for c in columns if c != "id"}
+        if not values:
+            continue
+        stmt = (table.update()
+                .where(table.c.id == db.bindparam("row_id"))
+                .values(values))
+        connection.execute(stmt, [
+            {"row_id": row["id"], **{f"new_{c}": row[c] for c in values}}
+            for row in group])
+
+
+def check_ids(items, errors, model):
+    """
+    Validate the `id` of update items against the table with one IN query.
+    Returns {id: row} for the rows found.
+    """
+    ids = [item["id"] for i, item in enumerate(items) if i not in errors]
+    rows = {row.id: row for row in db.session.execute(
+        db.select(model.__table__).where(model.__table__.c.id.in_(ids)))}
+
+    seen = set()
+    for index, item in enumerate(items):
+        if index in errors:
+            continue
+        if item["id"] not in rows:
+            errors[index] = f"{model.__name__} {item['id']} not found"
+        elif item["id"] in seen:
+            errors[index] = f"Duplicate id in batch: {item['id']}"
+        seen.add(item["id"])
+    return rows
+
+
+def bump_bulk_versions(collection, ids):
+    """Bump the collection and entity versions touched by a bulk write."""
+    bump_versions(db.session.connection(),
+                  [collection] + [f"{collection}:{i}" for i in ids])
+
+
+def bulk_results(errors, ids, size, ok_status):
+    """Per-item results: the created/updated id or the validation error."""
+    results = []
+    written = iter(ids)
+    for index in range(size):
+        if index in errors:
+            results.append({"index": index, "status": 400,
+                            "error": errors[index]})
+        else:
+            results.append({"index": index, "status": ok_status,
+                            "id": next(written)})
+    return results
@@ -0,0 +1,68 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional, see requirements.txt
+    brotli = None
+
+COMPRESSIBLE = {"application/json", "application/javascript", "application/xml",
+                "image/svg+xml", "text/css", "text/csv", "text/html",
+                "text/javascript", "text/plain", "text/xml"}
+
+
+def available_encodings():
+    """Content codings this process can produce, preferred first."""
+    return ["br", "gzip"] if brotli else ["gzip"]
+
+
+def negotiate_encoding(accept_encodings, offered=None):
+    """Pick the best coding of `offered` for an Accept-Encoding header, or None."""
+    offered = offered or available_encodings()
+    best = accept_encodings.best_match(offered)
+    return best if best in offered else None
+
+
+def compress(body, encoding, level=6, brotli_quality=4):
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def init_compression(app):
+    """
+    Compress buffered dynamic responses above COMPRESS_MIN_SIZE with br
+    (when the brotli package is installed) or gzip, as negotiated.
+
+    Streamed responses and files are left alone: exports compress
+    themselves and static assets are precompressed (see assets.py). The
+    ETag becomes weak, as the representation differs from the identity one.
+    """
+    config = app.config
+
+    @app.after_request
+    def compress_response(response):
+        if not config.get("COMPRESS_ENABLED", True):
+            return response
+        if response.direct_passthrough or response.is_streamed or \
+                response.status_code < 200 or response.status_code in (204, 304) or \
+                "Content-Encoding" in response.headers or \
+                response.mimetype not in COMPRESSIBLE:
+            return response
+        response.vary.add("Accept-Encoding")
+
+        min_size = config.get("COMPRESS_MIN_SIZE", 1024)
+        encoding = negotiate_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+        body = response.get_data()
+        if len(body) < min_size:
+            return response
+
+        response.set_data(compress(body, encoding, config.get("COMPRESS_LEVEL", 6),
+                                   config.get("COMPRESS_BROTLI_QUALITY", 4)))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,65 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from functools import wraps
+from flask import request, make_response
+from backend.models.version import get_versions
+
+
+def conditional_get(keys):
+    """
+    Answer If-None-Match / If-Modified-Since from version counters.
+
+    `keys` lists the version keys the response depends on; it may be a
+    callable receiving the view arguments. The ETag hashes those
+    versions with the request path and query string, so a 304 is sent
+    without running the view or serializing anything.
+
+    Version stamps keep microseconds but HTTP dates have whole seconds,
+    so Last-Modified is the stamp rounded up, and it is left out while
+    that second is still running: a later write in the same second
+    would carry the same date. Clients then revalidate with the ETag.
+    """
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            resolved = keys(**kwargs) if callable(keys) else keys
+            versions = get_versions(resolved)
+
+            fingerprint = "|".join(
+                [request.full_path] +
+                [f"{k}={versions.get(k, (0,))[0]}" for k in sorted(resolved)])
+            etag = hashlib.sha1(fingerprint.encode()).hexdigest()
+            stamps = [updated_at for _, updated_at in versions.values()]
+            last_modified = max(stamps) if stamps else None
+
+            if request.if_none_match:
+                # Weak comparison: compressed responses carry W/"etag"
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = bool(
+                    since and last_modified
+                    and last_modified <= since.replace(tzinfo=None))
+
+            if not_modified:
+                response = make_response("", 304)
+            else:
+                response = make_response(fn(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified:
+                header = _round_up(last_modified)
+                if header <= datetime.now(timezone.utc).replace(tzinfo=None):
+                    response.last_modified = header
+            return response
+        return wrapper
+    return decorator
+
+
+def _round_up(stamp):
+    """Round a timestamp up to the next whole second."""
+    if stamp.microsecond:
+        stamp = stamp.replace(microsecond=0) + timedelta(seconds=1)
+    return stamp
@@ -0,0 +1,189 @@
+import os
+import threading
+import time
+import weakref
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Used when the matching DB_* setting is not set in the environment
+DRIVER_DEFAULTS = {
+    "mysql": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 10,
+              "pool_recycle": 1800, "pool_pre_ping": True,
+              "connect_timeout": 5, "statement_timeout_ms": 30000},
+    "postgresql": {"pool_size": 10, "max_overflow": 20, "pool_timeout": 10,
+                   "pool_recycle": 3600, "pool_pre_ping": True,
+                   "connect_timeout": 5, "statement_timeout_ms": 30000},
+    "sqlite": {"pool_size": 5, "max_overflow": 10, "pool_timeout": 30,
+               "pool_recycle": -1, "pool_pre_ping": False},
+}
+
+# Engines disposed in forked children (pre-fork servers)
+_engines = weakref.WeakSet()
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.waits = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._stats_lock:
+                self.waits += 1
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+
+
+class TimedAsyncQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """TimedQueuePool for async drivers (see backend/utils/async_db.py)."""
+
+
+def _setting(config, key, cast, defaults, default_key):
+    raw = config.get(key)
+    if raw is None or raw == "":
+        return defaults.get(default_key)
+    if cast is bool:
+        return str(raw).lower() in ("1", "true", "yes", "on")
+    return cast(raw)
+
+
+def _is_memory_sqlite(url):
+    return url.database in (None, "", ":memory:") or \
+        url.query.get("mode") == "memory"
+
+
+def engine_options(config):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS from the DB_* settings.
+
+    Each driver family (mysql, postgresql, sqlite) has its own defaults;
+    in-memory SQLite keeps Flask-SQLAlchemy's single-connection pool.
+    """
+    uri = config.get("SQLALCHEMY_DATABASE_URI")
+    if not uri:
+        return {}
+    url = make_url(uri)
+    backend = url.get_backend_name()
+    defaults = DRIVER_DEFAULTS.get(backend, {})
+
+    if backend == "sqlite" and _is_memory_sqlite(url):
+        return {}
+
+    options = {"poolclass": TimedQueuePool}
+    for key, cast in (("pool_size", int), ("max_overflow", int),
+                      ("pool_timeout", float), ("pool_recycle", int),
+                      ("pool_pre_ping", bool)):
+        value = _setting(config, f"DB_{key.upper()}", cast, defaults, key)
+        if value is not None:
+            options[key] = value
+
+    connect_args = {}
+    connect_timeout = _setting(
+        config, "DB_CONNECT_TIMEOUT", int, defaults, "connect_timeout")
+    statement_timeout = _setting(
+        config, "DB_STATEMENT_TIMEOUT_MS", int, defaults, "statement_timeout_ms")
+
+    if backend == "mysql":
+        if connect_timeout:
+            connect_args["connect_timeout"] = connect_timeout
+        if statement_timeout:
+            connect_args["init_command"] = \
+                f"SET SESSION max_execution_time={statement_timeout}"
+    elif backend == "postgresql":
+        if connect_timeout:
+            connect_args["connect_timeout"] = connect_timeout
+        if statement_timeout:
+            connect_args["options"] = f"-c statement_timeout={statement_timeout}"
+    elif backend == "sqlite":
+        connect_args["timeout"] = config.get("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000
+
+    if connect_args:
+        options["connect_args"] = connect_args
+    return options
+
+
+def _sqlite_pragmas(config):
+    # ON DELETE CASCADE (passive deletes) needs foreign keys enforced
+    pragmas = [f"PRAGMA foreign_keys={config.get('SQLITE_FOREIGN_KEYS', 'ON')}"]
+    if config.get("SQLITE_JOURNAL_MODE"):
+        pragmas.append(f"PRAGMA journal_mode={config['SQLITE_JOURNAL_MODE']}")
+    if config.get("SQLITE_SYNCHRONOUS"):
+        pragmas.append(f"PRAGMA synchronous={config['SQLITE_SYNCHRONOUS']}")
+    return pragmas
+
+
+def _dispose_in_child():
+    """Drop connections inherited from the parent without closing them."""
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_in_child)
+
+
+def register_engine(app, engine):
+    """Apply SQLite pragmas to an engine of the app and make it fork-safe."""
+    _engines.add(engine)
+    pragmas = _sqlite_pragmas(app.config)
+    if engine.dialect.name == "sqlite" and pragmas:
+        @event.listens_for(engine, "connect")
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+
+def init_engines(app, db):
+    """Register the app's Flask-SQLAlchemy engines (see register_engine)."""
+    with app.app_context():
+        for engine in db.engines.values():
+            register_engine(app, engine)
+
+
+def pool_stats(db, async_engine=None):
+    """Return the pool counters of each engine (current app)."""
+    stats = []
+    engines = [(bind or "default", engine) for bind, engine in db.engines.items()]
+    if async_engine is not None:
+        engines.append(("async", async_engine.sync_engine))
+    for bind, engine in engines:
+        pool = engine.pool
+        entry = {"bind": bind, "driver": engine.dialect.name,
+                 "pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+            })
+        if isinstance(pool, TimedQueuePool):
+            with pool._stats_lock:
+                entry.update({
+                    "waits": pool.waits,
+                    "wait_avg_ms": round(
+                        pool.wait_total / pool.waits * 1000, 3) if pool.waits else 0.0,
+                    "wait_max_ms": round(pool.wait_max * 1000, 3),
+                    "timeouts": pool.timeouts,
+                })
+        stats.append(entry)
+    return stats
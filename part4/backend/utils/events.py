@@ -0,0 +1,386 @@
+import asyncio
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+from collections.abc import Mapping
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from backend.models import Player, Quest, Skill
+
+Event = namedtuple("Event", ["id", "topic", "kind", "data"])
+
+# Attributes carried by "player", "quest" and "skill" events, next to the id
+PLAYER_FIELDS = ("name", "class_name", "level", "xp")
+QUEST_FIELDS = ("player_id", "title", "xp")
+SKILL_FIELDS = ("name", "level")
+
+
+class TooManySubscribers(Exception):
+    """Raised when a worker already holds EVENTS_MAX_SUBSCRIBERS streams."""
+
+
+class Subscription:
+    """
+    Bounded mailbox of one event stream.
+
+    Publishers never block on a slow client: past `maxsize` pending
+    events the backlog is dropped and the stream is told to resync.
+    """
+
+    def __init__(self, broker, topics, maxsize=64):
+        self.broker = broker
+        self.topics = topics
+        self.maxsize = maxsize
+        self.overflowed = False
+        self.closed = False
+        self.on_ready = None   # called from the publisher thread (async waits)
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    def push(self, event):
+        with self._lock:
+            if len(self._events) >= self.maxsize:
+                self._events.clear()
+                self.overflowed = True
+            self._events.append(event)
+            self._ready.set()
+            on_ready = self.on_ready
+        if on_ready:
+            on_ready()
+
+    def drain(self):
+        """Return (pending events, whether some were dropped) and reset."""
+        with self._lock:
+            events, self._events = list(self._events), deque()
+            overflowed, self.overflowed = self.overflowed, False
+            self._ready.clear()
+        return events, overflowed
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def wait(self, timeout):
+        """Block the calling thread until an event arrives or `timeout` passes."""
+        return self._ready.wait(timeout)
+
+    def async_wait(self, timeout):
+        """Same wait, as an object the ASGI adapter awaits without a thread."""
+        return AsyncWait(self, timeout)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class AsyncWait:
+    """Awaitable wait on a Subscription (see backend.asgi.ASYNC_WAIT)."""
+
+    def __init__(self, subscription, timeout):
+        self.subscription = subscription
+        self.timeout = timeout
+
+    async def wait(self):
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        self.subscription.on_ready = lambda: loop.call_soon_threadsafe(ready.set)
+        try:
+            if not self.subscription.ready:
+                await asyncio.wait_for(ready.wait(), self.timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self.subscription.on_ready = None
+
+
+class LocalBroker:
+    """
+    In-process pub/sub: topic -> subscriptions, plus the last `history`
+    events so a reconnecting client can resume from Last-Event-ID.
+    """
+
+    def __init__(self, history=256, queue_size=64, max_subscribers=10000):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._topics = {}
+        self._count = 0
+        self._history = deque(maxlen=history)
+        self._ids = itertools.count(1)
+        self._last_id = 0
+        self._lock = threading.Lock()
+
+    def publish(self, topic, kind, data=None):
+        self._deliver(Event(next(self._ids), topic, kind, data))
+
+    def _deliver(self, event):
+        with self._lock:
+            self._history.append(event)
+            self._last_id = event.id
+            subscriptions = list(self._topics.get(event.topic, ()))
+        for subscription in subscriptions:
+            subscription.push(event)
+
+    def subscribe(self, topics, last_event_id=None):
+        """
+        Open a subscription. With `last_event_id`, the events published
+        since are queued first; an id older than the kept history (or
+        unknown, e.g. from before a restart) gets a resync instead.
+        """
+        subscription = Subscription(self, tuple(topics), self.queue_size)
+        with self._lock:
+            if self._count >= self.max_subscribers:
+                raise TooManySubscribers()
+            for topic in subscription.topics:
+                self._topics.setdefault(topic, set()).add(subscription)
+            self._count += 1
+            history, last_id = list(self._history), self._last_id
+
+        if last_event_id is not None:
+            if last_event_id > last_id or (history and last_event_id < history[0].id - 1):
+                subscription.overflowed = True
+            for past in history:
+                if past.id > last_event_id and past.topic in subscription.topics:
+                    subscription.push(past)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            if subscription.closed:
+                return
+            subscription.closed = True
+            self._count -= 1
+            for topic in subscription.topics:
+                subscribers = self._topics.get(topic)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._topics[topic]
+
+    def subscriber_count(self):
+        with self._lock:
+            return self._count
+
+
+class SQLiteBroker(LocalBroker):
+    """
+    Broker shared by the workers of a host through a small SQLite file.
+
+    Publishing appends a row; each worker polls for new rows every
+    `poll_interval` seconds and fans them out to its own subscribers.
+    Row ids are the event ids, so Last-Event-ID works across workers.
+    """
+
+    def __init__(self, path, poll_interval=0.5, retention=300, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._local = threading.local()
+        self._poller = None
+        self._next_prune = 0.0
+        connection = self._connect()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS events (id INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "topic TEXT NOT NULL, kind TEXT NOT NULL, data TEXT, created REAL NOT NULL)")
+        # Start a history's worth behind, so the first poll fills the history
+        self._cursor = max(0, connection.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+            - self._history.maxlen)
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def publish(self, topic, kind, data=None):
+        self._connect().execute(
+            "INSERT INTO events (topic, kind, data, created) VALUES (?, ?, ?, ?)",
+            (topic, kind, json.dumps(data), time.time()))
+        self.poll()
+
+    def subscribe(self, topics, last_event_id=None):
+        self._start_poller()
+        self.poll()
+        return super().subscribe(topics, last_event_id)
+
+    def _start_poller(self):
+        with self._lock:
+            if self._poller is None or not self._poller.is_alive():
+                self._poller = threading.Thread(
+                    target=self._poll_forever, name="events-poller", daemon=True)
+                self._poller.start()
+
+    def _poll_forever(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.poll()
+            except sqlite3.Error:
+                continue
+
+    def poll(self):
+        """Deliver the rows written since the last poll (any worker)."""
+        connection = self._connect()
+        with self._lock:
+            rows = connection.execute(
+                "SELECT id, topic, kind, data FROM events WHERE id > ? ORDER BY id",
+                (self._cursor,)).fetchall()
+            if rows:
+                self._cursor = rows[-1][0]
+        for row_id, topic, kind, data in rows:
+            self._deliver(Event(row_id, topic, kind, json.loads(data)))
+        if time.monotonic() >= self._next_prune:
+            connection.execute("DELETE FROM events WHERE created < ?",
+                               (time.time() - self.retention,))
+            self._next_prune = time.monotonic() + self.retention
+
+
+def make_broker(url, **kwargs):
+    """Build a broker from EVENTS_BACKEND ("local" or "sqlite:///path")."""
+    if not url or url == "local":
+        return LocalBroker(**kwargs)
+    if url.startswith("sqlite:///"):
+        return SQLiteBroker(url[len("sqlite:///"):], **kwargs)
+    raise ValueError(f"Unsupported EVENTS_BACKEND: {url!r}")
+
+
+def get_broker(app=None):
+    """Return the event broker attached to the app, creating it if needed."""
+    app = app or current_app
+    broker = app.extensions.get("event_broker")
+    if broker is None:
+        broker = app.extensions["event_broker"] = make_broker(
+            app.config.get("EVENTS_BACKEND", "local"),
+            history=app.config.get("EVENTS_HISTORY", 256),
+            queue_size=app.config.get("EVENTS_QUEUE_SIZE", 64),
+            max_subscribers=app.config.get("EVENTS_MAX_SUBSCRIBERS", 10000))
+    return broker
+
+
+def format_event(event):
+    """Encode an Event in the text/event-stream format."""
+    return (f"id: {event.id}\nevent: {event.kind}\n"
+            f"data: {json.dumps(event.data, separators=(',', ':'))}\n\n")
+
+
+def stream_events(subscription, heartbeat=15, max_duration=None, async_wait=False):
+    """
+    Yield a subscription as Server-Sent Events, with a comment line every
+    `heartbeat` seconds of silence. The stream ends after `max_duration`
+    seconds (clients reconnect with Last-Event-ID).
+
+    With `async_wait`, idle periods are yielded as AsyncWait objects for
+    the ASGI adapter to await on its event loop, so an idle stream does
+    not hold a worker thread.
+    """
+    deadline = time.monotonic() + max_duration if max_duration else None
+    try:
+        yield f"retry: {int(heartbeat * 1000)}\n\n"
+        while True:
+            events, overflowed = subscription.drain()
+            if overflowed:
+                yield "event: resync\ndata: {}\n\n"
+            for item in events:
+                yield format_event(item)
+
+            timeout = heartbeat
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    return
+            if async_wait:
+                yield subscription.async_wait(timeout)
+                ready = subscription.ready
+            else:
+                ready = subscription.wait(timeout)
+            if not ready and (deadline is None or time.monotonic() < deadline):
+                yield ": keepalive\n\n"
+    finally:
+        subscription.close()
+
+
+# ------------------------
+# Write tracking
+# ------------------------
+def player_topic(player_id):
+    return f"player:{player_id}"
+
+
+# Catalogue changes (skill renames...) go to every progress stream
+SKILLS_TOPIC = "skills"
+
+
+def queue_event(session, topic, kind, data):
+    """
+    Publish an event once the session commits (dropped on rollback).
+    Events for the same topic, kind and entity id collapse into the last.
+    """
+    session.info.setdefault("pending_events", {})[(topic, kind, data["id"])] = data
+
+
+def event_data(row, fields):
+    """Event payload: the id and `fields` of an ORM object or a row mapping."""
+    if isinstance(row, Mapping):
+        return {key: row[key] for key in ("id", *fields)}
+    return {key: getattr(row, key) for key in ("id", *fields)}
+
+
+def _old_value(obj, key):
+    history = inspect(obj).attrs[key].history
+    return history.deleted[0] if history.deleted else getattr(obj, key)
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session, flush_context):
+    """Turn flushed player, quest and skill changes into stream events."""
+    for obj in session.dirty:
+        if not session.is_modified(obj):
+            continue
+        if isinstance(obj, Player):
+            attrs = inspect(obj).attrs
+            if any(attrs[key].history.has_changes() for key in PLAYER_FIELDS):
+                queue_event(session, player_topic(obj.id), "player",
+                            event_data(obj, PLAYER_FIELDS))
+            if attrs.skills.history.has_changes():
+                queue_event(session, player_topic(obj.id), "skills",
+                            {"id": obj.id, "skills": sorted(s.id for s in obj.skills)})
+
+    for obj in (*session.new, *session.dirty):
+        if not session.is_modified(obj):
+            continue
+        if isinstance(obj, Quest):
+            data = event_data(obj, QUEST_FIELDS)
+            for owner in {obj.player_id, _old_value(obj, "player_id")} - {None}:
+                queue_event(session, player_topic(owner), "quest", data)
+        elif isinstance(obj, Skill):
+            queue_event(session, SKILLS_TOPIC, "skill", event_data(obj, SKILL_FIELDS))
+
+    for obj in session.deleted:
+        if isinstance(obj, Player):
+            queue_event(session, player_topic(obj.id), "deleted", {"id": obj.id})
+        elif isinstance(obj, Quest) and obj.player_id is not None:
+            queue_event(session, player_topic(obj.player_id), "quest",
+                        {"id": obj.id, "deleted": True})
+        elif isinstance(obj, Skill):
+            queue_event(session, SKILLS_TOPIC, "skill", {"id": obj.id, "deleted": True})
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session):
+    pending = session.info.pop("pending_events", None)
+    if pending and has_app_context():
+        broker = get_broker()
+        for (topic, kind, _), data in pending.items():
+            broker.publish(topic, kind, data)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_events(session, previous_transaction):
+    session.info.pop("pending_events", None)
@@ -0,0 +1,107 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from sqlalchemy import String, cast
+from backend.models import db, Player
+from backend.models.player import player_skills
+from backend.models.version import ResourceVersion
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+CSV_COLUMNS = ["id", "name", "class_name", "level", "xp", "is_admin",
+               "skills", "quests"]
+
+
+def parse_since(value):
+    """Parse the ISO 8601 `since` filter (naive UTC)."""
+    try:
+        since = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        raise ValueError("since must be an ISO 8601 timestamp")
+    return since.replace(tzinfo=None)
+
+
+def _changed_since(collection, id_column, since):
+    """SELECT the version rows of `collection`:<id_column> written after `since`."""
+    return db.select(ResourceVersion.key).where(
+        ResourceVersion.key == f"{collection}:" + cast(id_column, String),
+        ResourceVersion.updated_at >= since)
+
+
+def iter_players(since=None, chunk_size=500):
+    """
+    Yield players with their skills and quests loaded, reading the table
+    in keyset chunks so memory does not grow with the table size.
+    """
+    query = db.select(Player).options(*Player.load_options())
+    if since is not None:
+        # Only players whose row or relations were written after `since`;
+        # quest writes bump their owners' keys, skill edits only their own
+        query = query.where(db.or_(
+            _changed_since("players", Player.id, since).exists(),
+            _changed_since("skills", player_skills.c.skill_id, since)
+            .where(player_skills.c.player_id == Player.id).exists()))
+
+    last_id = 0
+    while True:
+        chunk = db.session.execute(
+            query.where(Player.id > last_id)
+            .order_by(Player.id).limit(chunk_size)
+        ).scalars().all()
+        if not chunk:
+            return
+        yield from chunk
+        last_id = chunk[-1].id
+        # Drop the chunk from the identity map before reading the next one
+        db.session.expunge_all()
+
+
+def to_ndjson(players):
+    for player in players:
+        yield json.dumps(player.to_dict(), ensure_ascii=False) + "\n"
+
+
+def to_csv(players):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for player in players:
+        writer.writerow([
+            player.id, player.name, player.class_name, player.level,
+            player.xp, player.is_admin,
+            ";".join(skill.name for skill in player.skills),
+            ";".join(quest.title for quest in player.quests),
+        ])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_players(fmt, since=None, chunk_size=500):
+    """Stream the dataset as NDJSON or CSV text chunks."""
+    players = iter_players(since, chunk_size)
+    return to_csv(players) if fmt == "csv" else to_ndjson(players)
+
+
+def encode(chunks, compress=False, flush_every=64 * 1024):
+    """Encode text chunks to bytes, gzip-compressing them on the fly."""
+    if not compress:
+        for chunk in chunks:
+            yield chunk.encode()
+        return
+
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31 = gzip container
+    pending = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        pending += len(chunk)
+        if pending >= flush_every:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if data:
+            yield data
+    yield compressor.flush()
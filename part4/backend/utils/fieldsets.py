@@ -0,0 +1,48 @@
+class FieldsetError(ValueError):
+    """Raised when ?fields= or ?include= names an unknown attribute."""
+
+
+def _split(raw):
+    return [name.strip() for name in raw.split(",") if name.strip()]
+
+
+def parse_fieldset(args, model):
+    """
+    Read ?fields=a,b and ?include=rel against the model's columns and
+    RELATIONS. Returns (fields, include), each None when the parameter
+    is absent; ?include= with no value asks for no relations at all.
+    """
+    fields = include = None
+    if "fields" in args:
+        allowed = [column.key for column in model.list_columns()]
+        fields = tuple(_split(args["fields"]))
+        unknown = [name for name in fields if name not in allowed]
+        if unknown:
+            raise FieldsetError(
+                f"Unknown fields: {', '.join(unknown)} "
+                f"(allowed: {', '.join(allowed)})")
+    if "include" in args:
+        include = tuple(_split(args["include"]))
+        unknown = [name for name in include if name not in model.RELATIONS]
+        if unknown:
+            raise FieldsetError(
+                f"Unknown include: {', '.join(unknown)} "
+                f"(allowed: {', '.join(model.RELATIONS) or 'none'})")
+    return fields, include
+
+
+def fieldset_columns(model, fields=None):
+    """Columns of the requested fields, in list_columns() order (id always)."""
+    return [column for column in model.list_columns()
+            if fields is None or column.key == "id" or column.key in fields]
+
+
+def field_names(model, fields=None):
+    return [column.key for column in fieldset_columns(model, fields)]
+
+
+def resolve_include(model, detailed=True, include=None):
+    """Relations to load and serialize: all of them by default when detailed."""
+    if include is None:
+        return model.RELATIONS if detailed else ()
+    return include
@@ -0,0 +1,153 @@
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from flask import current_app, has_app_context
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_METHOD = "scrypt"
+
+
+class HashingBusyError(Exception):
+    """Raised when the password hashing pool is at its concurrency cap."""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Password hashing capacity exceeded")
+        self.retry_after = retry_after
+
+
+# ------------------------
+# Worker functions (must be picklable)
+# ------------------------
+def _hash(password, method):
+    return generate_password_hash(password, method=method)
+
+
+def _verify(pwhash, password):
+    return check_password_hash(pwhash, password)
+
+
+# ------------------------
+# Bounded pool
+# ------------------------
+class HashingPool:
+    """
+    Runs the password KDF off the request thread on a process pool.
+
+    At most `max_pending` hashes may be running or queued; further calls
+    fail fast with HashingBusyError instead of piling up. With
+    `workers=0` the KDF runs inline, still under the same cap.
+
+    The pool is created lazily from a request thread, so workers are
+    spawned rather than forked: a fork would copy locks (engine pool,
+    logging) held by other threads and could deadlock the child.
+    """
+
+    def __init__(self, workers, max_pending, retry_after=1):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ProcessPoolExecutor(
+            workers, mp_context=multiprocessing.get_context("spawn")) if workers else None
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingBusyError(self.retry_after)
+        try:
+            if self._executor is None:
+                return fn(*args)
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def map(self, fn, *iterables):
+        """
+        Run a batch of hashes, one concurrency slot per hash.
+
+        Batches larger than the cap run in chunks of at most `max_pending`
+        hashes; a chunk that cannot get all its slots fails the batch.
+        """
+        calls = list(zip(*iterables))
+        results = []
+        for start in range(0, len(calls), self.max_pending):
+            chunk = calls[start:start + self.max_pending]
+            taken = self._acquire(len(chunk))
+            try:
+                if self._executor is None:
+                    results.extend(fn(*args) for args in chunk)
+                else:
+                    results.extend(self._executor.map(fn, *zip(*chunk), chunksize=8))
+            finally:
+                for _ in range(taken):
+                    self._slots.release()
+        return results
+
+    def _acquire(self, count):
+        """Take `count` slots at once, or none and raise HashingBusyError."""
+        for taken in range(count):
+            if not self._slots.acquire(blocking=False):
+                for _ in range(taken):
+                    self._slots.release()
+                raise HashingBusyError(self.retry_after)
+        return count
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """Return the process-wide pool matching the current app configuration."""
+    config = current_app.config if has_app_context() else {}
+    workers = config.get("PASSWORD_HASH_WORKERS", 0)
+    max_pending = config.get("PASSWORD_HASH_MAX_PENDING", max(workers, 1) * 4)
+    retry_after = config.get("PASSWORD_HASH_RETRY_AFTER", 1)
+    key = (workers, max_pending, retry_after)
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = HashingPool(workers, max_pending, retry_after)
+        return pool
+
+
+def _method():
+    if has_app_context():
+        return current_app.config.get("PASSWORD_HASH_METHOD", DEFAULT_METHOD)
+    return DEFAULT_METHOD
+
+
+@lru_cache(maxsize=8)
+def _parameters(method):
+    """Parameter prefix (e.g. 'scrypt:32768:8:1') werkzeug writes for a method."""
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+# ------------------------
+# Public helpers
+# ------------------------
+def hash_password(password):
+    """Hash a password on the bounded pool."""
+    return get_hashing_pool().run(_hash, password, _method())
+
+
+def hash_passwords(passwords):
+    """Hash many passwords in parallel on the pool (bulk imports)."""
+    passwords = list(passwords)
+    return get_hashing_pool().map(
+        _hash, passwords, [_method()] * len(passwords))
+
+
+def verify_password(pwhash, password):
+    """Check a password on the bounded pool."""
+    return get_hashing_pool().run(_verify, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """Tell whether a hash was made with other parameters than the current ones."""
+    return pwhash.split("$", 1)[0] != _parameters(_method())
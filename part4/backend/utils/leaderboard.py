@@ -0,0 +1,86 @@
+from bisect import bisect_left, insort
+from flask import current_app
+from backend.models import db, Player
+from backend.utils.synced_index import SyncedIndex, get_synced_index
+
+
+class Leaderboard(SyncedIndex):
+    """
+    In-process XP ranking kept as a sorted array of (-xp, id) keys.
+
+    Rank lookups are a bisect (O(log n)); an update moves one key. The
+    board follows the "players" version counter (see SyncedIndex).
+    """
+
+    collections = ("players",)
+
+    def __init__(self, sync_margin=5):
+        super().__init__(sync_margin)
+        self._keys = []
+        self._players = {}   # id -> (xp, name, level)
+
+    # ------------------------
+    # Incremental maintenance
+    # ------------------------
+    def _remove(self, player_id):
+        entry = self._players.pop(player_id, None)
+        if entry is not None:
+            index = bisect_left(self._keys, (-entry[0], player_id))
+            del self._keys[index]
+
+    def _put(self, player_id, xp, name, level):
+        self._remove(player_id)
+        xp = xp or 0
+        self._players[player_id] = (xp, name, level)
+        insort(self._keys, (-xp, player_id))
+
+    def _rebuild(self):
+        rows = db.session.execute(
+            db.select(Player.id, Player.xp, Player.name, Player.level))
+        players = {row.id: (row.xp or 0, row.name, row.level) for row in rows}
+        self._players = players
+        self._keys = sorted((-xp, pid) for pid, (xp, _, _) in players.items())
+
+    def _refresh(self, collection, ids):
+        rows = db.session.execute(
+            db.select(Player.id, Player.xp, Player.name, Player.level)
+            .where(Player.id.in_(ids))).all()
+        for row in rows:
+            self._put(row.id, row.xp, row.name, row.level)
+        for player_id in ids - {row.id for row in rows}:
+            self._remove(player_id)
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def __len__(self):
+        return len(self._keys)
+
+    def top(self, offset=0, limit=10):
+        """Return a page of entries, best first."""
+        with self._lock:
+            entries = []
+            for neg_xp, player_id in self._keys[offset:offset + limit]:
+                xp, name, level = self._players[player_id]
+                entries.append({"rank": self._rank(xp), "id": player_id,
+                                "name": name, "level": level, "xp": xp})
+            return entries
+
+    def _rank(self, xp):
+        # Competition ranking: ties share the best rank
+        return bisect_left(self._keys, (-xp,)) + 1
+
+    def rank_of(self, player_id):
+        """Return the entry of one player, or None."""
+        with self._lock:
+            entry = self._players.get(player_id)
+            if entry is None:
+                return None
+            xp, name, level = entry
+            return {"rank": self._rank(xp), "id": player_id, "name": name,
+                    "level": level, "xp": xp, "total_players": len(self._keys)}
+
+
+def get_leaderboard(app=None):
+    """Return the synced leaderboard attached to the app."""
+    return get_synced_index(app or current_app, "leaderboard", Leaderboard)
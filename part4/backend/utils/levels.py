@@ -0,0 +1,136 @@
+from bisect import bisect_right
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from backend.models import db, Player
+from backend.models.version import bump_versions
+from backend.utils.events import PLAYER_FIELDS, event_data, player_topic, queue_event
+
+try:
+    import numpy as np
+except ImportError:  # optional, see requirements.txt
+    np = None
+
+
+class LevelCurve:
+    """
+    Level derived from total XP.
+
+    Reaching level L takes base * (L - 1) ** exponent XP, up to
+    max_level. The thresholds are precomputed once, so a single lookup
+    is a bisect and a batch is one searchsorted over a NumPy array.
+    """
+
+    def __init__(self, base=100, exponent=1.5, max_level=99):
+        self.base = base
+        self.exponent = exponent
+        self.max_level = max_level
+        self.thresholds = [round(base * (level - 1) ** exponent)
+                           for level in range(1, max_level + 1)]
+        self._array = np.asarray(self.thresholds, dtype=np.int64) if np else None
+
+    def xp_for(self, level):
+        """XP needed to reach `level`."""
+        return self.thresholds[min(max(level, 1), self.max_level) - 1]
+
+    def level_for(self, xp):
+        """
+        Level for one XP total (fast path for single writes). XP that is
+        missing or not a number counts as 0 rather than failing the write.
+        """
+        try:
+            xp = int(xp or 0)
+        except (TypeError, ValueError, OverflowError):
+            xp = 0
+        return max(bisect_right(self.thresholds, xp), 1)
+
+    def levels_for(self, xps):
+        """Levels for a sequence of XP totals (vectorized with NumPy)."""
+        if self._array is not None:
+            xps = np.asarray(xps, dtype=np.int64)
+            return np.maximum(np.searchsorted(self._array, xps, side="right"), 1)
+        thresholds = self.thresholds
+        return [max(bisect_right(thresholds, xp or 0), 1) for xp in xps]
+
+
+def get_level_curve(app=None):
+    """Return the level curve configured for the app (LEVEL_CURVE_*)."""
+    if app is None:
+        if not has_app_context():
+            return LevelCurve()
+        app = current_app
+    params = (app.config.get("LEVEL_CURVE_BASE", 100),
+              app.config.get("LEVEL_CURVE_EXPONENT", 1.5),
+              app.config.get("LEVEL_MAX", 99))
+    curve = app.extensions.get("level_curve")
+    if curve is None or (curve.base, curve.exponent, curve.max_level) != params:
+        curve = app.extensions["level_curve"] = LevelCurve(*params)
+    return curve
+
+
+def recompute_levels(curve=None, chunk_size=100000):
+    """
+    Recompute every player's level after a curve change.
+
+    Players are read in keyset chunks of (id, name, class_name, level,
+    xp); levels are computed for the whole chunk at once and only the
+    rows whose level changed are written, with their version keys and
+    "player" events, one transaction per chunk. Returns (players scanned, players updated).
+    """
+    curve = curve or get_level_curve()
+    table = Player.__table__
+    update = (table.update()
+              .where(table.c.id == db.bindparam("row_id"))
+              .values(level=db.bindparam("new_level")))
+
+    last_id, scanned, changed = 0, 0, 0
+    while True:
+        rows = db.session.execute(
+            db.select(table.c.id, *[table.c[key] for key in PLAYER_FIELDS])
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(chunk_size)).all()
+        if not rows:
+            break
+        ids = [row.id for row in rows]
+        xps = [row.xp or 0 for row in rows]
+        levels = [row.level or 0 for row in rows]
+
+        new_levels = curve.levels_for(xps)
+        if np is not None:
+            diff = np.flatnonzero(new_levels != np.asarray(levels))
+        else:
+            diff = [i for i, (new, old) in enumerate(zip(new_levels, levels)) if new != old]
+        updates = [{"row_id": ids[i], "new_level": int(new_levels[i])} for i in diff]
+
+        if updates:
+            connection = db.session.connection()
+            connection.execute(update, updates)
+            bump_versions(connection, ["players"] +
+                          [f"players:{row['row_id']}" for row in updates])
+            for i, row in zip(diff, updates):
+                data = {**rows[i]._mapping, "level": row["new_level"]}
+                queue_event(db.session, player_topic(row["row_id"]), "player",
+                            event_data(data, PLAYER_FIELDS))
+        db.session.commit()
+
+        scanned += len(rows)
+        changed += len(updates)
+        last_id = ids[-1]
+    return scanned, changed
+
+
+@event.listens_for(Session, "before_flush")
+def _derive_levels(session, flush_context, instances):
+    """Keep Player.level in line with Player.xp for ORM writes."""
+    curve = None
+    for obj in (*session.new, *session.dirty):
+        if not isinstance(obj, Player):
+            continue
+        if obj not in session.new:
+            attrs = inspect(obj).attrs
+            if not (attrs.xp.history.has_changes()
+                    or attrs.level.history.has_changes()):
+                continue
+        curve = curve or get_level_curve()
+        obj.level = curve.level_for(obj.xp)
@@ -0,0 +1,190 @@
+import bisect
+import threading
+import time
+from urllib.parse import urlencode
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Latency buckets in seconds (Prometheus client defaults)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Statements kept per request for the slow-request log
+SLOW_LOG_STATEMENTS = 50
+# Query parameters that carry credentials, masked in the slow-request log
+SECRET_PARAMS = frozenset({"jwt", "token", "access_token", "refresh_token",
+                           "password"})
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus layout."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def samples(self):
+        """Yield (le, cumulative count), ending with +Inf."""
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield ("+Inf" if bound == float("inf") else repr(bound)), total
+
+
+class RequestMetrics:
+    """
+    Per-route request counters for one worker process.
+
+    Routes are labelled by their URL rule (e.g. /api/players/<int:player_id>)
+    so the label set stays bounded; unmatched paths share one label.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}      # (method, route, status) -> count
+        self.latency = {}       # (method, route) -> Histogram
+        self.sizes = {}         # (method, route) -> [bytes, responses]
+        self.statements = {}    # (method, route) -> count
+        self.db_time = {}       # (method, route) -> seconds
+
+    def record(self, method, route, status, duration, size, statements, db_time):
+        key = (method, route)
+        with self._lock:
+            status_key = (method, route, status)
+            self.requests[status_key] = self.requests.get(status_key, 0) + 1
+            self.latency.setdefault(key, Histogram()).observe(duration)
+            if size is not None:
+                totals = self.sizes.setdefault(key, [0, 0])
+                totals[0] += size
+                totals[1] += 1
+            self.statements[key] = self.statements.get(key, 0) + statements
+            self.db_time[key] = self.db_time.get(key, 0.0) + db_time
+
+    def render(self):
+        """Return the metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            family("http_requests_total", "counter", "Requests by route and status.")
+            for (method, route, status), count in sorted(self.requests.items()):
+                lines.append(f"http_requests_total{{{_labels(method, route)},"
+                             f"status=\"{status}\"}} {count}")
+
+            family("http_request_duration_seconds", "histogram",
+                   "Request latency by route.")
+            for (method, route), hist in sorted(self.latency.items()):
+                labels = _labels(method, route)
+                for le, count in hist.samples():
+                    lines.append(f"http_request_duration_seconds_bucket"
+                                 f"{{{labels},le=\"{le}\"}} {count}")
+                lines.append(f"http_request_duration_seconds_sum{{{labels}}} {hist.sum}")
+                lines.append(f"http_request_duration_seconds_count{{{labels}}} "
+                             f"{sum(hist.counts)}")
+
+            family("http_response_size_bytes", "summary",
+                   "Response body size by route (non-streamed responses).")
+            for (method, route), (size, count) in sorted(self.sizes.items()):
+                labels = _labels(method, route)
+                lines.append(f"http_response_size_bytes_sum{{{labels}}} {size}")
+                lines.append(f"http_response_size_bytes_count{{{labels}}} {count}")
+
+            family("db_statements_total", "counter", "SQL statements by route.")
+            for (method, route), count in sorted(self.statements.items()):
+                lines.append(f"db_statements_total{{{_labels(method, route)}}} {count}")
+
+            family("db_time_seconds_total", "counter",
+                   "Time spent executing SQL by route.")
+            for (method, route), seconds in sorted(self.db_time.items()):
+                lines.append(f"db_time_seconds_total{{{_labels(method, route)}}} "
+                             f"{seconds}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(method, route):
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'method="{method}",route="{route}"'
+
+
+# ------------------------
+# SQL accounting
+# ------------------------
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and "sql_count" in g:
+        conn.info.setdefault("metrics_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("metrics_start")
+    if not starts or not has_request_context() or "sql_count" not in g:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    g.sql_count += 1
+    g.sql_time += elapsed
+    if g.sql_log is not None and len(g.sql_log) < SLOW_LOG_STATEMENTS:
+        g.sql_log.append((elapsed, statement))
+
+
+# ------------------------
+# Request hooks
+# ------------------------
+def get_metrics(app=None):
+    """Return the request metrics attached to the app."""
+    app = app or current_app
+    return app.extensions.setdefault("request_metrics", RequestMetrics())
+
+
+def _start_timer():
+    g.request_start = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+    g.sql_log = [] if current_app.config.get("SLOW_REQUEST_MS") else None
+
+
+def _logged_path():
+    """Request path and query string with credential parameters masked."""
+    secret = SECRET_PARAMS | {current_app.config.get("JWT_QUERY_STRING_NAME", "jwt")}
+    args = [(key, "redacted" if key.lower() in secret else value)
+            for key, value in request.args.items(multi=True)]
+    return f"{request.path}?{urlencode(args)}" if args else request.path
+
+
+def _record(response):
+    if "request_start" not in g:
+        return response
+    duration = time.perf_counter() - g.request_start
+    route = request.url_rule.rule if request.url_rule else "<unmatched>"
+    size = None if response.is_streamed else response.calculate_content_length()
+
+    get_metrics().record(request.method, route, response.status_code,
+                         duration, size, g.sql_count, g.sql_time)
+
+    threshold = current_app.config.get("SLOW_REQUEST_MS")
+    if threshold and duration * 1000 >= threshold:
+        statements = "".join(
+            f"\n  {elapsed * 1000:8.2f} ms  {' '.join(statement.split())}"
+            for elapsed, statement in g.sql_log)
+        current_app.logger.warning(
+            "Slow request %s %s: %.1f ms, %d SQL statements (%.1f ms)%s",
+            request.method, _logged_path(), duration * 1000,
+            g.sql_count, g.sql_time * 1000, statements)
+    return response
+
+
+def init_metrics(app):
+    """Record latency, status, size and SQL usage of every request."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    get_metrics(app)
+    app.before_request(_start_timer)
+    app.after_request(_record)
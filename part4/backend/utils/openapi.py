@@ -0,0 +1,164 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from flask import Flask
+
+SPEC_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)),
+                         "swagger_spec.yaml")
+DOCS_PREFIXES = ("/apidocs", "/flasgger_static")
+
+
+class CompiledSpec:
+    """
+    swagger_spec.yaml compiled to JSON bytes, cached on disk by content hash.
+
+    A warm start only hashes the YAML and reads the cached JSON; the YAML
+    parser runs once per spec revision.
+    """
+
+    def __init__(self, spec_path, cache_dir):
+        self.spec_path = spec_path
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._loaded = None   # (etag, json bytes, gzip bytes)
+
+    def load(self):
+        with self._lock:
+            if self._loaded is None:
+                self._loaded = self._compile()
+            return self._loaded
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded = None
+
+    def _compile(self):
+        with open(self.spec_path, "rb") as f:
+            source = f.read()
+        digest = hashlib.sha256(source).hexdigest()[:16]
+        cached = os.path.join(self.cache_dir, f"openapi-{digest}.json")
+
+        try:
+            with open(cached, "rb") as f:
+                body = f.read()
+        except OSError:
+            import yaml
+            body = json.dumps(yaml.safe_load(source), separators=(",", ":"),
+                              ensure_ascii=False).encode()
+            if self._write(cached, body):
+                self._prune(cached)
+
+        return digest, body, gzip.compress(body, mtime=0)
+
+    @staticmethod
+    def _write(path, body):
+        """Write atomically so concurrent workers never read a partial file."""
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(body)
+            os.replace(tmp, path)
+        except OSError:
+            return False  # read-only deployments simply recompile on start
+        return True
+
+    @staticmethod
+    def _prune(keep):
+        """Remove the JSON compiled from earlier spec revisions."""
+        directory = os.path.dirname(keep)
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith("openapi-") and name.endswith(".json") and path != keep:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass  # already removed by another worker
+
+
+class LazySwaggerUI:
+    """
+    WSGI middleware serving /apidocs and /flasgger_static from a Flasgger
+    app that is only imported and built on the first docs request.
+    """
+
+    def __init__(self, wsgi_app, spec):
+        self.wsgi_app = wsgi_app
+        self.spec = spec
+        self._docs_app = None
+        self._lock = threading.Lock()
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO", "").startswith(DOCS_PREFIXES):
+            return self._get_docs_app()(environ, start_response)
+        return self.wsgi_app(environ, start_response)
+
+    def _get_docs_app(self):
+        with self._lock:
+            if self._docs_app is None:
+                self._docs_app = self._build_docs_app()
+            return self._docs_app
+
+    def _build_docs_app(self):
+        from flasgger import Swagger
+
+        docs_app = Flask("backend.docs")
+        docs_app.config["SWAGGER"] = {
+            "title": "Holberton RPG Portfolio API",
+            "uiversion": 3,
+            "specs_route": "/apidocs/",
+            # Désactive le modèle Swagger 2.0 interne
+            "openapi": "3.0.2"
+        }
+        # The UI fetches /apispec_1.json, which the main app serves
+        _, body, _ = self.spec.load()
+        Swagger(docs_app, template=json.loads(body), merge=False, config={
+            "headers": [],
+            "specs": [
+                {
+                    "endpoint": 'apispec_1',
+                    "route": '/apispec_1.json',
+                    "rule_filter": lambda rule: True,
+                    "model_filter": lambda tag: True,
+                }
+            ],
+            "static_url_path": "/flasgger_static",
+            "swagger_ui": True,
+            "specs_route": "/apidocs/"
+        })
+        return docs_app
+
+
+def start_spec_watcher(spec):
+    """Recompile the spec when swagger_spec.yaml changes (debug only)."""
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+
+    class SwaggerFileWatcher(FileSystemEventHandler):
+        """Watch swagger_spec.yaml for changes and reload live."""
+
+        def on_modified(self, event):
+            if event.src_path.endswith("swagger_spec.yaml"):
+                print("🔁 Swagger spec updated — reloading...")
+                spec.invalidate()
+
+    observer = Observer()
+    observer.daemon = True
+    observer.schedule(SwaggerFileWatcher(), os.path.dirname(spec.spec_path),
+                      recursive=False)
+    observer.start()
+    return observer
+
+
+def init_docs(app):
+    """Attach the compiled spec and the lazy Swagger UI to the app."""
+    spec = CompiledSpec(
+        SPEC_PATH,
+        app.config.get("OPENAPI_CACHE_DIR") or os.path.join(app.instance_path, "openapi"))
+    app.extensions["openapi_spec"] = spec
+    app.wsgi_app = LazySwaggerUI(app.wsgi_app, spec)
+
+    if app.config.get("DEBUG", False):
+        start_spec_watcher(spec)
@@ -0,0 +1,151 @@
+import base64
+import json
+from sqlalchemy import and_, or_
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class PaginationError(ValueError):
+    """Raised when pagination query parameters are invalid."""
+
+
+# ------------------------
+# Cursor encoding
+# ------------------------
+def encode_cursor(sort, value, last_id):
+    """Build an opaque cursor from the last row of a page."""
+    raw = json.dumps([sort, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort, column=None):
+    """
+    Decode a cursor and check it was issued for the same sort order,
+    with a value of the sort column's type (or NULL if it is nullable).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, last_id = json.loads(
+            base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PaginationError("Invalid cursor")
+
+    if cursor_sort != sort or not _is_int(last_id):
+        raise PaginationError("Invalid cursor")
+    if column is not None and not _matches(column, value):
+        raise PaginationError("Invalid cursor")
+    return value, last_id
+
+
+def _is_int(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def _matches(column, value):
+    """Tell whether a decoded cursor value fits the column."""
+    if value is None:
+        return column.nullable
+    python_type = column.type.python_type
+    if python_type is int:
+        return _is_int(value)
+    return isinstance(value, python_type)
+
+
+# ------------------------
+# Query parameters
+# ------------------------
+def parse_limit(args):
+    """Read ?limit= and clamp it to MAX_LIMIT."""
+    raw = args.get("limit", DEFAULT_LIMIT)
+    try:
+        limit = int(raw)
+    except (TypeError, ValueError):
+        raise PaginationError("limit must be an integer")
+    if limit < 1:
+        raise PaginationError("limit must be a positive integer")
+    return min(limit, MAX_LIMIT)
+
+
+def parse_sort(args, sort_fields):
+    """Read ?sort=field or ?sort=-field against a whitelist of columns."""
+    sort = args.get("sort", "id")
+    field = sort.lstrip("-")
+    if field not in sort_fields:
+        allowed = ", ".join(sorted(sort_fields))
+        raise PaginationError(f"sort must be one of: {allowed}")
+    return sort, field, sort.startswith("-")
+
+
+# ------------------------
+# Keyset pagination
+# ------------------------
+def _after(column, pk, value, last_id, descending):
+    """
+    Keyset predicate for the rows after (value, last_id). NULLs sort
+    below every value: first in ascending order, last in descending.
+    """
+    if descending:
+        if value is None:
+            return and_(column.is_(None), pk < last_id)
+        return or_(column < value, and_(column == value, pk < last_id),
+                   column.is_(None))
+    if value is None:
+        return or_(column.is_not(None), and_(column.is_(None), pk > last_id))
+    return or_(column > value, and_(column == value, pk > last_id))
+
+
+def _order(query, column, pk, descending):
+    """ORDER BY matching _after(); SQLite and MySQL already put NULLs low."""
+    explicit = query.session.get_bind().dialect.name not in ("sqlite", "mysql", "mariadb")
+    if descending:
+        order = column.desc()
+        return query.order_by(order.nulls_last() if explicit else order, pk.desc())
+    order = column.asc()
+    return query.order_by(order.nulls_first() if explicit else order, pk.asc())
+
+
+def paginate(query, model, args, sort_fields, filters=None):
+    """
+    Apply keyset pagination on (sort column, id) to a query.
+
+    `sort_fields` maps the public sort names to indexed columns and
+    `filters` maps query parameters to (column, type) pairs used for
+    equality filters. Rows with a NULL sort value are paged too, as
+    if NULL were the lowest value. Returns the page items and the next
+    cursor, which is None on the last page.
+    """
+    limit = parse_limit(args)
+    sort, field, descending = parse_sort(args, sort_fields)
+    column = sort_fields[field]
+    pk = model.id
+
+    for param, (filter_column, cast) in (filters or {}).items():
+        if param in args:
+            try:
+                value = cast(args[param])
+            except ValueError:
+                raise PaginationError(f"Invalid value for filter: {param}")
+            query = query.filter(filter_column == value)
+
+    cursor = args.get("cursor")
+    if cursor:
+        if column is pk:
+            _, last_id = decode_cursor(cursor, sort)
+            query = query.filter(pk < last_id if descending else pk > last_id)
+        else:
+            value, last_id = decode_cursor(cursor, sort, column)
+            query = query.filter(_after(column, pk, value, last_id, descending))
+
+    query = _order(query, column, pk, descending)
+
+    # Fetch one extra row to know whether another page exists
+    items = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            sort, getattr(last, column.key), last.id)
+
+    return items, next_cursor
@@ -0,0 +1,122 @@
+import time
+import threading
+from collections import OrderedDict, namedtuple
+from flask import current_app, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from backend.models import db, Player
+
+# What authorization needs to know about a player
+Principal = namedtuple("Principal", ["id", "is_admin", "token_version"])
+
+
+class PrincipalCache:
+    """Small process-local TTL cache of principals, keyed by player id."""
+
+    def __init__(self, ttl=30, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, player_id):
+        with self._lock:
+            entry = self._entries.get(player_id)
+            if entry is None:
+                return None
+            principal, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[player_id]
+                return None
+            return principal
+
+    def put(self, principal):
+        with self._lock:
+            self._entries[principal.id] = (
+                principal, time.monotonic() + self.ttl)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, player_id):
+        with self._lock:
+            self._entries.pop(player_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def get_principal_cache(app=None):
+    """Return the principal cache attached to the app, creating it if needed."""
+    app = app or current_app
+    cache = app.extensions.get("principal_cache")
+    if cache is None:
+        cache = PrincipalCache(
+            ttl=app.config.get("PRINCIPAL_CACHE_TTL", 30),
+            max_size=app.config.get("PRINCIPAL_CACHE_SIZE", 10000))
+        app.extensions["principal_cache"] = cache
+    return cache
+
+
+def get_principal(player_id):
+    """Return the Principal for a player id, hitting the database on a miss."""
+    try:
+        player_id = int(player_id)
+    except (TypeError, ValueError):
+        return None
+
+    cache = get_principal_cache()
+    principal = cache.get(player_id)
+    if principal is None:
+        row = db.session.execute(
+            db.select(Player.id, Player.is_admin, Player.token_version)
+            .where(Player.id == player_id)
+        ).first()
+        if row is None:
+            return None
+        principal = Principal(row.id, bool(row.is_admin),
+                              row.token_version or 0)
+        cache.put(principal)
+    return principal
+
+
+def principal_claims(principal):
+    """Extra JWT claims carrying the role and the token version."""
+    return {"is_admin": principal.is_admin, "ver": principal.token_version}
+
+
+# ------------------------
+# Invalidation
+# ------------------------
+@event.listens_for(Session, "before_flush")
+def _bump_token_versions(session, flush_context, instances):
+    """Bump token_version when a player's role changes and evict it on commit."""
+    for obj in session.dirty:
+        if not isinstance(obj, Player):
+            continue
+        state = inspect(obj)
+        version_changed = state.attrs.token_version.history.has_changes()
+        if state.attrs.is_admin.history.has_changes() and not version_changed:
+            obj.token_version = (obj.token_version or 0) + 1
+            version_changed = True
+        if version_changed:
+            session.info.setdefault("stale_principals", set()).add(obj.id)
+
+    for obj in session.deleted:
+        if isinstance(obj, Player):
+            session.info.setdefault("stale_principals", set()).add(obj.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_principals(session):
+    stale = session.info.pop("stale_principals", None)
+    if stale and has_app_context():
+        cache = get_principal_cache()
+        for player_id in stale:
+            cache.invalidate(player_id)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_stale_principals(session, previous_transaction):
+    session.info.pop("stale_principals", None)
@@ -0,0 +1,190 @@
+import math
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from functools import wraps
+from flask import current_app, request
+
+# Bucket size and refill rate (tokens per second)
+Limit = namedtuple("Limit", ["capacity", "rate"])
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+class RateLimitedError(Exception):
+    """Raised when a client or account has no tokens left."""
+
+    def __init__(self, retry_after=1):
+        super().__init__("Too many requests")
+        self.retry_after = retry_after
+
+
+def parse_limit(value):
+    """Parse "30/minute" (or "30/60" seconds) into a Limit."""
+    count, _, period = str(value).partition("/")
+    seconds = PERIODS.get(period.strip().lower())
+    if seconds is None:
+        seconds = float(period)
+    count = int(count)
+    if count <= 0 or seconds <= 0:
+        raise ValueError(f"Invalid rate limit: {value!r}")
+    return Limit(count, count / seconds)
+
+
+def _refill(tokens, stamp, limit, now):
+    return min(limit.capacity, tokens + (now - stamp) * limit.rate)
+
+
+def _take(tokens, limit):
+    """Return (tokens left, seconds to wait) after asking for one token."""
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / limit.rate
+
+
+class MemoryBucketStore:
+    """
+    Process-local token buckets: one (tokens, stamp) tuple per key.
+
+    Each check is a dict lookup; the least recently used keys are evicted
+    past max_keys (an evicted bucket simply starts full again).
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, limit):
+        """Take one token from `key`; return the seconds to wait (0 = allowed)."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.get(key, (limit.capacity, now))
+            tokens, wait = _take(_refill(tokens, stamp, limit, now), limit)
+            self._buckets[key] = (tokens, now)
+            self._buckets.move_to_end(key)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+class SQLiteBucketStore:
+    """
+    Token buckets in a small SQLite file shared by every worker on a host.
+
+    Kept apart from the application database so a rejected request never
+    touches it. Each check is one primary-key read and write inside
+    BEGIN IMMEDIATE; buckets idle long enough to be full are pruned.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._calls = 0
+        self._full_after = 0.0
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_buckets ("
+                "key TEXT PRIMARY KEY, tokens REAL NOT NULL, stamp REAL NOT NULL"
+                ") WITHOUT ROWID")
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=OFF")
+            self._local.connection = connection
+        return connection
+
+    def take(self, key, limit):
+        """Take one token from `key`; return the seconds to wait (0 = allowed)."""
+        connection = self._connect()
+        now = time.time()  # wall clock: shared between processes
+        self._full_after = max(self._full_after, limit.capacity / limit.rate)
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT tokens, stamp FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, stamp = row if row else (limit.capacity, now)
+            tokens, wait = _take(_refill(tokens, stamp, limit, now), limit)
+            connection.execute(
+                "INSERT OR REPLACE INTO rate_buckets (key, tokens, stamp) VALUES (?, ?, ?)",
+                (key, tokens, now))
+            self._calls += 1
+            if self._calls % self.PRUNE_EVERY == 0:
+                connection.execute("DELETE FROM rate_buckets WHERE stamp < ?",
+                                   (now - self._full_after,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return wait
+
+
+class RateLimiter:
+    """Per client IP and per account name buckets for the auth endpoints."""
+
+    def __init__(self, store, per_ip, per_account):
+        self.store = store
+        self.per_ip = per_ip
+        self.per_account = per_account
+
+    def check(self, scope, ip, account=None):
+        """Charge the IP bucket, then the account bucket; raise if either is empty."""
+        buckets = [(f"{scope}:ip:{ip}", self.per_ip)]
+        if account:
+            buckets.append((f"{scope}:account:{account}", self.per_account))
+        for key, limit in buckets:
+            if limit is None:
+                continue
+            wait = self.store.take(key, limit)
+            if wait:
+                raise RateLimitedError(max(1, math.ceil(wait)))
+
+
+def make_store(url, max_keys=100000):
+    """Build a bucket store from RATELIMIT_STORAGE ("memory" or "sqlite:///path")."""
+    if not url or url == "memory":
+        return MemoryBucketStore(max_keys)
+    if url.startswith("sqlite:///"):
+        return SQLiteBucketStore(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE: {url!r}")
+
+
+def get_rate_limiter(app=None):
+    """Return the app's rate limiter, or None when RATELIMIT_ENABLED is off."""
+    app = app or current_app
+    if not app.config.get("RATELIMIT_ENABLED", True):
+        return None
+    limiter = app.extensions.get("rate_limiter")
+    if limiter is None:
+        per_ip = app.config.get("RATELIMIT_AUTH_PER_IP")
+        per_account = app.config.get("RATELIMIT_AUTH_PER_ACCOUNT")
+        limiter = RateLimiter(
+            make_store(app.config.get("RATELIMIT_STORAGE", "memory"),
+                       app.config.get("RATELIMIT_MAX_KEYS", 100000)),
+            parse_limit(per_ip) if per_ip else None,
+            parse_limit(per_account) if per_account else None)
+        app.extensions["rate_limiter"] = limiter
+    return limiter
+
+
+def rate_limited(view):
+    """
+    Throttle a credentials endpoint by client IP and by the posted `name`,
+    before the view touches the database or the password hasher.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        limiter = get_rate_limiter()
+        if limiter is not None:
+            data = request.get_json(silent=True)
+            name = data.get("name") if isinstance(data, dict) else None
+            account = str(name).strip().lower()[:128] if name else None
+            limiter.check("auth", request.remote_addr or "-", account)
+        return view(*args, **kwargs)
+    return wrapper
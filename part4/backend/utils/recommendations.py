@@ -0,0 +1,110 @@
+import heapq
+from collections import Counter
+from flask import current_app
+from backend.models import db, Quest
+from backend.models.player import player_skills
+from backend.models.quest import quest_skills
+from backend.utils.synced_index import SyncedIndex, get_synced_index
+
+
+class QuestRecommender(SyncedIndex):
+    """
+    Sparse player x skill and quest x skill matrices for recommendations.
+
+    Each open quest (no owner yet) keeps its required skill set, and
+    each skill keeps the set of open quests requiring it. Scoring a
+    player only visits quests sharing at least one skill with them:
+    score = shared skills / required skills. Follows the "players" and
+    "quests" version counters and rebuilds when skills change. See
+    backend/benchmarks/bench_recommendations.py for its latency.
+    """
+
+    collections = ("players", "quests")
+    rebuild_on = ("skills",)
+
+    def __init__(self, sync_margin=5):
+        super().__init__(sync_margin)
+        self._player_skills = {}   # player_id -> frozenset of skill ids
+        self._quest_skills = {}    # open quest_id -> frozenset of skill ids
+        self._skill_quests = {}    # skill_id -> set of open quest ids
+
+    # ------------------------
+    # Incremental maintenance
+    # ------------------------
+    def _remove_quest(self, quest_id):
+        for skill_id in self._quest_skills.pop(quest_id, ()):
+            quests = self._skill_quests[skill_id]
+            quests.discard(quest_id)
+            if not quests:
+                del self._skill_quests[skill_id]
+
+    def _put_quest(self, quest_id, skill_ids):
+        self._remove_quest(quest_id)
+        self._quest_skills[quest_id] = frozenset(skill_ids)
+        for skill_id in skill_ids:
+            self._skill_quests.setdefault(skill_id, set()).add(quest_id)
+
+    @staticmethod
+    def _group(rows):
+        grouped = {}
+        for owner_id, skill_id in rows:
+            grouped.setdefault(owner_id, set()).add(skill_id)
+        return grouped
+
+    def _load_players(self, ids=None):
+        stmt = db.select(player_skills.c.player_id, player_skills.c.skill_id)
+        if ids is not None:
+            stmt = stmt.where(player_skills.c.player_id.in_(ids))
+        return self._group(db.session.execute(stmt))
+
+    def _load_open_quests(self, ids=None):
+        stmt = (db.select(Quest.id, quest_skills.c.skill_id)
+                .join(quest_skills, quest_skills.c.quest_id == Quest.id)
+                .where(Quest.player_id.is_(None)))
+        if ids is not None:
+            stmt = stmt.where(Quest.id.in_(ids))
+        return self._group(db.session.execute(stmt))
+
+    def _rebuild(self):
+        self._player_skills = {pid: frozenset(skills)
+                               for pid, skills in self._load_players().items()}
+        self._quest_skills, self._skill_quests = {}, {}
+        for quest_id, skill_ids in self._load_open_quests().items():
+            self._put_quest(quest_id, skill_ids)
+
+    def _refresh(self, collection, ids):
+        if collection == "players":
+            loaded = self._load_players(ids)
+            for player_id in ids:
+                if player_id in loaded:
+                    self._player_skills[player_id] = frozenset(loaded[player_id])
+                else:
+                    self._player_skills.pop(player_id, None)
+        else:
+            loaded = self._load_open_quests(ids)
+            for quest_id in ids:
+                if quest_id in loaded:
+                    self._put_quest(quest_id, loaded[quest_id])
+                else:
+                    self._remove_quest(quest_id)
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def recommend(self, player_id, limit=10):
+        """Return [(quest_id, score, shared skills)] best first."""
+        with self._lock:
+            skills = self._player_skills.get(player_id, frozenset())
+            shared = Counter()
+            for skill_id in skills:
+                shared.update(self._skill_quests.get(skill_id, ()))
+
+            scored = ((quest_id, count / len(self._quest_skills[quest_id]), count)
+                      for quest_id, count in shared.items())
+            return heapq.nlargest(
+                limit, scored, key=lambda item: (item[1], item[2], -item[0]))
+
+
+def get_recommender(app=None):
+    """Return the synced quest recommender attached to the app."""
+    return get_synced_index(app or current_app, "quest_recommender", QuestRecommender)
@@ -0,0 +1,177 @@
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from backend.models import db, RevokedToken
+from backend.utils.async_db import IOLock
+
+# Tokens without an `exp` claim stay revoked for good
+NEVER = datetime(9999, 12, 31)
+
+
+def _utcnow():
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class BloomFilter:
+    """Fixed-size bit array answering "maybe present" / "surely absent"."""
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.size = max(64, math.ceil(
+            -self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+
+class RevocationFilter:
+    """
+    In-process view of the revoked_tokens table for the JWT blocklist.
+
+    A Bloom filter of revoked JTIs answers the common case (token not
+    revoked) without touching the database; a filter hit is confirmed
+    with a primary-key read whose answer is kept in a small LRU. JTIs
+    revoked by other workers are pulled in every `sync_interval`
+    seconds, and the filter is rebuilt from the unexpired rows every
+    `rebuild_interval` seconds, which drops expired entries.
+    """
+
+    def __init__(self, capacity=100000, error_rate=0.001, sync_interval=5,
+                 rebuild_interval=3600, sync_margin=5, cache_size=10000):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.rebuild_interval = rebuild_interval
+        self.sync_margin = sync_margin
+        self.cache_size = cache_size
+        self._bloom = None
+        self._confirmed = OrderedDict()   # jti -> revoked (filter hits only)
+        self._synced_at = None
+        self._next_sync = 0.0
+        self._next_rebuild = 0.0
+        self._next_prune = 0.0
+        self._lock = IOLock()
+
+    # ------------------------
+    # Database sync
+    # ------------------------
+    def _rebuild(self):
+        now = _utcnow()
+        rows = db.session.execute(
+            db.select(RevokedToken.jti, RevokedToken.revoked_at)
+            .where(RevokedToken.expires_at > now)).all()
+        bloom = BloomFilter(max(self.capacity, 2 * len(rows)), self.error_rate)
+        for row in rows:
+            bloom.add(row.jti)
+        self._bloom = bloom
+        self._confirmed.clear()
+        self._synced_at = max([now] + [row.revoked_at for row in rows])
+        self._next_rebuild = time.monotonic() + self.rebuild_interval
+
+    def _sync(self):
+        rows = db.session.execute(
+            db.select(RevokedToken.jti, RevokedToken.revoked_at)
+            .where(RevokedToken.revoked_at >=
+                   self._synced_at - timedelta(seconds=self.sync_margin))).all()
+        for row in rows:
+            self._bloom.add(row.jti)
+            self._confirmed.pop(row.jti, None)
+            self._synced_at = max(self._synced_at, row.revoked_at)
+
+    def sync(self):
+        """Pull recent revocations (or rebuild) when the sync interval has passed."""
+        now = time.monotonic()
+        if now < self._next_sync:
+            return
+        with self._lock:
+            if self._bloom is None or now >= self._next_rebuild or \
+                    self._bloom.count > self._bloom.capacity:
+                self._rebuild()
+            else:
+                self._sync()
+            self._next_sync = now + self.sync_interval
+
+    # ------------------------
+    # Checks and writes
+    # ------------------------
+    def is_revoked(self, jti):
+        self.sync()
+        if jti not in self._bloom:
+            return False
+        with self._lock:
+            revoked = self._confirmed.get(jti)
+            if revoked is None:
+                revoked = db.session.get(RevokedToken, jti) is not None
+                self._confirmed[jti] = revoked
+                while len(self._confirmed) > self.cache_size:
+                    self._confirmed.popitem(last=False)
+            else:
+                self._confirmed.move_to_end(jti)
+            return revoked
+
+    def revoke(self, jti, expires_at):
+        """
+        Add a revoked JTI to the session (the caller commits) and flush,
+        so a concurrent revocation of the same token raises IntegrityError.
+        Expired rows are pruned in the same transaction from time to time.
+        """
+        now = _utcnow()
+        if time.monotonic() >= self._next_prune:
+            db.session.execute(
+                db.delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            self._next_prune = time.monotonic() + self.rebuild_interval
+        db.session.add(RevokedToken(jti=jti, expires_at=expires_at, revoked_at=now))
+        db.session.flush()
+
+        self.sync()
+        with self._lock:
+            self._bloom.add(jti)
+            self._confirmed[jti] = True
+
+
+def get_revocation_filter(app=None):
+    """Return the revocation filter attached to the app, creating it if needed."""
+    app = app or current_app
+    revocations = app.extensions.get("revocation_filter")
+    if revocations is None:
+        revocations = app.extensions["revocation_filter"] = RevocationFilter(
+            capacity=app.config.get("REVOCATION_FILTER_CAPACITY", 100000),
+            sync_interval=app.config.get("REVOCATION_SYNC_INTERVAL", 5),
+            rebuild_interval=app.config.get("REVOCATION_REBUILD_INTERVAL", 3600),
+            sync_margin=app.config.get("INDEX_SYNC_MARGIN", 5))
+    return revocations
+
+
+def revoke_token(payload):
+    """Revoke a decoded JWT until its own expiry (see RevocationFilter.revoke)."""
+    exp = payload.get("exp")
+    expires_at = datetime.fromtimestamp(exp, timezone.utc).replace(tzinfo=None) \
+        if exp else NEVER
+    get_revocation_filter().revoke(payload["jti"], expires_at)
+
+
+def init_revocation(jwt):
+    """Check every JWT against the revocation filter."""
+
+    @jwt.token_in_blocklist_loader
+    def token_in_blocklist(jwt_header, jwt_payload):
+        jti = jwt_payload.get("jti")
+        return bool(jti) and get_revocation_filter().is_revoked(jti)
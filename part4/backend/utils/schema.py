@@ -0,0 +1,120 @@
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import inspect
+from backend.models import db
+
+
+class SchemaUpgradeError(Exception):
+    """Raised when the database cannot be brought in line in place."""
+
+
+def _new_column(table, column, sqlite):
+    """
+    Copy of a model column to add to an existing table. A scalar Python
+    default becomes the server default, so existing rows get the value.
+    """
+    if column.primary_key or (column.unique and sqlite):
+        raise SchemaUpgradeError(
+            f"Cannot add {table.name}.{column.name} in place, migrate it by hand")
+    server_default = getattr(column.server_default, "arg", None)
+    if server_default is None and column.default is not None and column.default.is_scalar:
+        value = column.default.arg
+        server_default = str(int(value) if isinstance(value, bool) else value)
+    if not column.nullable and server_default is None:
+        raise SchemaUpgradeError(
+            f"Cannot add NOT NULL column {table.name}.{column.name} without a default")
+    foreign_keys = [db.ForeignKey(fk.target_fullname, ondelete=fk.ondelete)
+                    for fk in column.foreign_keys]
+    return db.Column(column.name, column.type, *foreign_keys,
+                     nullable=column.nullable, server_default=server_default)
+
+
+def _fk_spec(columns, referred_table, ondelete):
+    return (tuple(columns), referred_table, (ondelete or "NO ACTION").upper())
+
+
+def _stale_foreign_keys(inspector, table):
+    """Return the model FKs whose ON DELETE rule differs from the database."""
+    existing = {
+        _fk_spec(fk["constrained_columns"], fk["referred_table"],
+                 fk.get("options", {}).get("ondelete")): fk.get("name")
+        for fk in inspector.get_foreign_keys(table.name)}
+    stale = []
+    for constraint in table.foreign_key_constraints:
+        spec = _fk_spec(constraint.column_keys, constraint.referred_table.name,
+                        constraint.ondelete)
+        if spec not in existing:
+            match = [name for (cols, ref, _), name in existing.items()
+                     if cols == spec[0] and ref == spec[1]]
+            stale.append((constraint, match[0] if match else None))
+    return stale
+
+
+def upgrade_schema():
+    """
+    Bring an existing database in line with the models.
+
+    Creates missing tables, columns and indexes, and rewrites foreign
+    keys whose ON DELETE rule changed (SQLite tables are rebuilt, other
+    databases get the constraint dropped and re-created). Idempotent;
+    returns the list of applied steps. Raises SchemaUpgradeError, with
+    nothing applied, when a missing column cannot be added in place.
+    """
+    engine = db.engine
+    steps = []
+    with engine.connect() as connection:
+        sqlite = connection.dialect.name == "sqlite"
+        if sqlite:
+            # Rebuilding a table must not cascade into its children
+            foreign_keys = connection.exec_driver_sql("PRAGMA foreign_keys").scalar()
+            connection.exec_driver_sql("PRAGMA foreign_keys=OFF")
+            connection.commit()
+        try:
+            with connection.begin():
+                inspector = inspect(connection)
+                missing = [t for t in db.metadata.sorted_tables
+                           if not inspector.has_table(t.name)]
+                db.metadata.create_all(connection, tables=missing)
+                steps += [f"create table {t.name}" for t in missing]
+
+                op = Operations(MigrationContext.configure(connection))
+                for table in db.metadata.sorted_tables:
+                    if table in missing:
+                        continue
+                    existing = {c["name"] for c in inspector.get_columns(table.name)}
+                    for column in table.columns:
+                        if column.name not in existing:
+                            op.add_column(table.name, _new_column(table, column, sqlite))
+                            steps.append(f"add column {table.name}.{column.name}")
+
+                    stale = _stale_foreign_keys(inspector, table)
+                    if stale and sqlite:
+                        with op.batch_alter_table(table.name, recreate="always",
+                                                  copy_from=table):
+                            pass
+                        steps.append(f"rebuild {table.name} (foreign keys)")
+                        stale = []
+                    for constraint, name in stale:
+                        if name:
+                            op.drop_constraint(name, table.name, type_="foreignkey")
+                        op.create_foreign_key(
+                            name or f"fk_{table.name}_{'_'.join(constraint.column_keys)}",
+                            table.name, constraint.referred_table.name,
+                            constraint.column_keys,
+                            [e.column.name for e in constraint.elements],
+                            ondelete=constraint.ondelete)
+                        steps.append(f"foreign key {table.name}"
+                                     f"({', '.join(constraint.column_keys)}) "
+                                     f"ON DELETE {constraint.ondelete or 'NO ACTION'}")
+
+                    inspector = inspect(connection)
+                    existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+                    for index in table.indexes:
+                        if index.name not in existing:
+                            index.create(connection)
+                            steps.append(f"create index {index.name}")
+        finally:
+            if sqlite:
+                connection.exec_driver_sql(f"PRAGMA foreign_keys={foreign_keys}")
+                connection.commit()
+    return steps
@@ -0,0 +1,141 @@
+import math
+import re
+import unicodedata
+from bisect import bisect_left, insort
+from collections import Counter
+from flask import current_app
+from backend.models import db, Quest
+from backend.utils.synced_index import SyncedIndex, get_synced_index
+
+TOKEN_RE = re.compile(r"\w+")
+TITLE_WEIGHT = 2
+MAX_PREFIX_EXPANSIONS = 50
+
+
+def tokenize(text):
+    """Lowercase, strip accents and split on word boundaries."""
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return TOKEN_RE.findall(text)
+
+
+class QuestSearchIndex(SyncedIndex):
+    """
+    Inverted index over quest titles and summaries, ranked with BM25.
+
+    Title terms count TITLE_WEIGHT times. The last query term also
+    matches as a prefix, through a sorted vocabulary. The index follows
+    the "quests" version counter (see SyncedIndex).
+    """
+
+    collections = ("quests",)
+    k1 = 1.2
+    b = 0.75
+
+    def __init__(self, sync_margin=5):
+        super().__init__(sync_margin)
+        self._postings = {}   # term -> {quest_id: term frequency}
+        self._docs = {}       # quest_id -> Counter of terms
+        self._lengths = {}    # quest_id -> weighted term count
+        self._vocabulary = []
+        self._total_length = 0
+
+    # ------------------------
+    # Incremental maintenance
+    # ------------------------
+    def _remove(self, quest_id):
+        terms = self._docs.pop(quest_id, None)
+        if terms is None:
+            return
+        self._total_length -= self._lengths.pop(quest_id)
+        for term in terms:
+            postings = self._postings[term]
+            del postings[quest_id]
+            if not postings:
+                del self._postings[term]
+                del self._vocabulary[bisect_left(self._vocabulary, term)]
+
+    def _put(self, quest_id, title, summary):
+        self._remove(quest_id)
+        terms = Counter(tokenize(summary))
+        for token in tokenize(title):
+            terms[token] += TITLE_WEIGHT
+
+        self._docs[quest_id] = terms
+        self._lengths[quest_id] = sum(terms.values())
+        self._total_length += self._lengths[quest_id]
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                insort(self._vocabulary, term)
+            postings[quest_id] = frequency
+
+    def _rebuild(self):
+        self._postings, self._docs, self._lengths = {}, {}, {}
+        self._vocabulary, self._total_length = [], 0
+        rows = db.session.execute(
+            db.select(Quest.id, Quest.title, Quest.summary))
+        for row in rows:
+            self._put(row.id, row.title, row.summary)
+
+    def _refresh(self, collection, ids):
+        rows = db.session.execute(
+            db.select(Quest.id, Quest.title, Quest.summary)
+            .where(Quest.id.in_(ids))).all()
+        for row in rows:
+            self._put(row.id, row.title, row.summary)
+        for quest_id in ids - {row.id for row in rows}:
+            self._remove(quest_id)
+
+    # ------------------------
+    # Queries
+    # ------------------------
+    def _expand(self, prefix):
+        start = bisect_left(self._vocabulary, prefix)
+        terms = []
+        for term in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+        return terms
+
+    def search(self, query):
+        """Return [(quest_id, score)] best first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            count = len(self._docs)
+            if not count:
+                return []
+            average_length = self._total_length / count
+
+            scores = {}
+            for position, token in enumerate(tokens):
+                last = position == len(tokens) - 1
+                terms = self._expand(token) if last else [token]
+                # A document matching several expansions scores its best one
+                best = {}
+                for term in terms:
+                    postings = self._postings.get(term, {})
+                    idf = math.log(
+                        1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                    for quest_id, frequency in postings.items():
+                        norm = self.k1 * (1 - self.b + self.b *
+                                          self._lengths[quest_id] / average_length)
+                        score = idf * frequency * (self.k1 + 1) / (frequency + norm)
+                        if score > best.get(quest_id, 0):
+                            best[quest_id] = score
+                for quest_id, score in best.items():
+                    scores[quest_id] = scores.get(quest_id, 0) + score
+
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+
+
+def get_search_index(app=None):
+    """Return the synced quest search index attached to the app."""
+    return get_synced_index(app or current_app, "quest_search", QuestSearchIndex)
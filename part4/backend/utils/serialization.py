@@ -0,0 +1,29 @@
+import json
+from flask import Response
+
+try:
+    import orjson
+except ImportError:  # optional, see requirements.txt
+    orjson = None
+
+
+def dumps(payload):
+    """Encode to compact JSON bytes, keys sorted like jsonify()."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(payload, separators=(",", ":"), sort_keys=True,
+                      ensure_ascii=False).encode()
+
+
+def rows_to_dicts(rows):
+    """Turn projected result rows into to_dict(False)-shaped dicts."""
+    if not rows:
+        return []
+    keys = rows[0]._fields
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def json_response(payload, status_code=200):
+    """Return a Response with an already-encoded JSON body."""
+    return Response(dumps(payload), status=status_code,
+                    mimetype="application/json")
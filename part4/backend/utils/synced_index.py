@@ -0,0 +1,89 @@
+from abc import ABC, abstractmethod
+from datetime import timedelta
+from sqlalchemy import func
+from backend.models import db
+from backend.models.version import ResourceVersion
+from backend.utils.async_db import IOLock
+
+
+class SyncedIndex(ABC):
+    """
+    Base class for in-process indexes derived from database collections.
+
+    The index follows the version counters of its `collections`: when
+    one changes, only the entities written since the last sync are
+    handed to `_refresh(collection, ids)`, so writes made by other
+    workers or by the bulk endpoints are picked up incrementally. A
+    change in one of the `rebuild_on` collections triggers a full
+    `_rebuild()` instead. Subclasses hold `self._lock` while reading.
+    """
+
+    collections = ()
+    rebuild_on = ()
+
+    def __init__(self, sync_margin=5):
+        self.sync_margin = timedelta(seconds=sync_margin)
+        self._versions = None
+        self._synced_at = {}
+        self._lock = IOLock()
+
+    @abstractmethod
+    def _rebuild(self):
+        """Rebuild the whole index from the database."""
+
+    @abstractmethod
+    def _refresh(self, collection, ids):
+        """Re-read the entities `ids` of `collection`; ids not found were deleted."""
+
+    def _latest_write(self, collection):
+        return db.session.execute(
+            db.select(func.max(ResourceVersion.updated_at))
+            .where(ResourceVersion.key.like(f"{collection}:%"))).scalar()
+
+    def _changed_since(self, collection, since):
+        """Return the entity ids written since `since` and the latest stamp."""
+        rows = db.session.execute(
+            db.select(ResourceVersion.key, ResourceVersion.updated_at)
+            .where(ResourceVersion.key.like(f"{collection}:%"),
+                   ResourceVersion.updated_at >= since)).all()
+        ids = {int(row.key.split(":", 1)[1]) for row in rows}
+        latest = max([since] + [row.updated_at for row in rows])
+        return ids, latest
+
+    def sync(self):
+        """Bring the index up to date (a single PK read when nothing changed)."""
+        watched = (*self.collections, *self.rebuild_on)
+        versions = dict(db.session.execute(
+            db.select(ResourceVersion.key, ResourceVersion.version)
+            .where(ResourceVersion.key.in_(watched))).all())
+        versions = {name: versions.get(name, 0) for name in watched}
+
+        with self._lock:
+            if self._versions == versions:
+                return
+
+            stale = self._versions is None or any(
+                versions[name] != self._versions[name] for name in self.rebuild_on)
+            if stale or any(self._synced_at.get(c) is None for c in self.collections):
+                self._rebuild()
+                self._synced_at = {c: self._latest_write(c) for c in self.collections}
+            else:
+                for collection in self.collections:
+                    if versions[collection] == self._versions[collection]:
+                        continue
+                    synced_at = self._synced_at[collection]
+                    ids, latest = self._changed_since(
+                        collection, synced_at - self.sync_margin)
+                    self._refresh(collection, ids)
+                    self._synced_at[collection] = max(synced_at, latest)
+            self._versions = versions
+
+
+def get_synced_index(app, name, factory):
+    """Return the named index attached to the app, synced with the database."""
+    index = app.extensions.get(name)
+    if index is None:
+        index = app.extensions[name] = factory(
+            app.config.get("INDEX_SYNC_MARGIN", 5))
+    index.sync()
+    return index
@@ -0,0 +1,86 @@
+import asyncio
+import os
+import sys
+
+from flask.testing import FlaskClient
+from werkzeug.datastructures import Headers
+
+# Ensure backend directory is always on the Python path
+sys.path.append(os.path.join(os.path.abspath(os.path.dirname(__file__)), "backend"))
+
+
+def pytest_addoption(parser):
+    parser.addoption("--asgi", action="store_true",
+                     help="Send every test request through the ASGI entry point.")
+
+
+def pytest_configure(config):
+    if config.getoption("--asgi"):
+        from flask import Flask
+        Flask.test_client_class = AsgiTestClient
+
+
+class AsgiTestClient(FlaskClient):
+    """Flask test client that round-trips requests through backend.asgi."""
+
+    def run_wsgi_app(self, environ, buffered=False):
+        from backend.asgi import create_asgi_app
+
+        self._add_cookies_to_wsgi(environ)
+        body = environ["wsgi.input"].read()
+        headers = [(key[5:].replace("_", "-").lower().encode("latin-1"),
+                    value.encode("latin-1"))
+                   for key, value in environ.items() if key.startswith("HTTP_")]
+        for key in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            if environ.get(key):
+                headers.append((key.replace("_", "-").lower().encode(),
+                                environ[key].encode("latin-1")))
+        scope = {
+            "type": "http",
+            "http_version": "1.1",
+            "method": environ["REQUEST_METHOD"],
+            "scheme": environ["wsgi.url_scheme"],
+            "path": environ["PATH_INFO"].encode("latin-1").decode("utf-8"),
+            "raw_path": environ["PATH_INFO"].encode("latin-1"),
+            "query_string": environ["QUERY_STRING"].encode("latin-1"),
+            "root_path": environ.get("SCRIPT_NAME", ""),
+            "headers": headers,
+            "server": (environ["SERVER_NAME"], int(environ["SERVER_PORT"])),
+            "client": ("127.0.0.1", 0),
+        }
+
+        messages = []
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send(message):
+            messages.append(message)
+
+        async def serve():
+            adapter = create_asgi_app(self.application, max_threads=1)
+            try:
+                await adapter(scope, receive, send)
+            finally:
+                # Every request runs its own event loop
+                await adapter.aclose()
+
+        asyncio.run(serve())
+
+        start = messages[0]
+        response_headers = Headers([(k.decode("latin-1"), v.decode("latin-1"))
+                                    for k, v in start["headers"]])
+        status = f"{start['status']} {_reason(start['status'])}"
+        data = b"".join(m.get("body", b"") for m in messages[1:])
+        self._update_cookies_from_response(
+            environ["SERVER_NAME"], environ["PATH_INFO"],
+            response_headers.getlist("Set-Cookie"))
+        return [data], status, response_headers
+
+
+def _reason(status):
+    from http import HTTPStatus
+    try:
+        return HTTPStatus(status).phrase.upper()
+    except ValueError:
+        return "UNKNOWN"
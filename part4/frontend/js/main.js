@@ -3,6 +3,7 @@
 
 const API_URL = "http://localhost:5000/api";
 const AUTH_URL = "http://localhost:5000/auth";
+const STREAM_RETRY_MS = 5000;
 
 // === Check for valid token ===
 function checkAuth() {
@@ -12,6 +13,20 @@ function checkAuth() {
     }
 }
 
+// === Render player profile ===
+function renderPlayer(player) {
+    const playerDiv = document.getElementById("player-info");
+
+    playerDiv.innerHTML = `
+        <h2>${player.name} — Level ${player.level}</h2>
+        <p>Class: ${player.class_name}</p>
+        <div class="xp-bar">
+            <div class="xp-fill" style="width:${player.xp % 100}%"></div>
+        </div>
+        <p>XP: ${player.xp}</p>
+    `;
+}
+
 // === Fetch player profile ===
 async function loadPlayerProfile() {
     checkAuth();
@@ -21,16 +36,48 @@ async function loadPlayerProfile() {
     });
 
     const data = await response.json();
-    const playerDiv = document.getElementById("player-info");
+    renderPlayer(data.user);
+    return data.user;
+}
 
-    playerDiv.innerHTML = `
-        <h2>${data.name} — Level ${data.level}</h2>
-        <p>Class: ${data.class}</p>
-        <div class="xp-bar">
-            <div class="xp-fill" style="width:${data.xp % 100}%"></div>
-        </div>
-        <p>XP: ${data.xp}</p>
-    `;
+// === Live progress (Server-Sent Events) ===
+// EventSource cannot send headers, so it passes a short-lived stream token
+// in the query string, never the access token. It reconnects on its own
+// and replays missed events with Last-Event-ID; once the stream token has
+// expired the reconnect is refused, so a fresh one is minted.
+async function fetchStreamToken() {
+    const token = localStorage.getItem("jwt");
+    const response = await fetch(`${API_URL}/stream/token`, {
+        method: "POST",
+        headers: { "Authorization": `Bearer ${token}` }
+    });
+
+    const data = await response.json();
+    return data.data.token;
+}
+
+async function watchPlayerProgress(player) {
+    const streamToken = await fetchStreamToken();
+    const stream = new EventSource(
+        `${API_URL}/stream/progress?jwt=${encodeURIComponent(streamToken)}`);
+
+    stream.addEventListener("player", (event) => {
+        Object.assign(player, JSON.parse(event.data));
+        renderPlayer(player);
+    });
+    stream.addEventListener("resync", async () => {
+        Object.assign(player, await loadPlayerProfile());
+    });
+    stream.addEventListener("error", () => {
+        if (stream.readyState === EventSource.CLOSED) {
+            // Events may have been missed while reconnecting
+            setTimeout(async () => {
+                Object.assign(player, await loadPlayerProfile());
+                watchPlayerProgress(player);
+            }, STREAM_RETRY_MS);
+        }
+    });
+    return stream;
 }
 
 // === Logout ===
@@ -41,5 +88,5 @@ document.getElementById("logout-btn")?.addEventListener("click", () => {
 
 // === Load player info if on index ===
 if (document.getElementById("player-info")) {
-    loadPlayerProfile();
+    loadPlayerProfile().then(watchPlayerProgress);
 }